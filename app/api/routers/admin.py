@@ -11,8 +11,15 @@ from app.batch.models.job_def import JobDef
 from app.batch.models.job_unit import JobUnit
 from app.core.db.session import transaction
 from app.core.utils.logger import get_logger
+from app.ml.prediction.precompute import Precomputer
 from app.ml.prediction.ts_lstm import Predictor as TSLSTM_Predictor
+from app.ml.prediction.ts_shared import SharedPredictor as TSShared_Predictor
 from app.ml.training.ts_lstm import Trainer as TSLSTM_Trainer
+from app.ml.training.sweep import Sweeper as TSLSTM_Sweeper
+from app.ml.training.pack import PackTrainer as TSLSTM_PackTrainer
+from app.ml.training.ts_shared import SharedTrainer as TSShared_Trainer
+from app.ml.training.distill import Distiller as TSLSTM_Distiller
+from app.ml.training.quantize import Quantizer as TSLSTM_Quantizer
 from ..utils.security import auth
 from ...ml.data.clients.av_client import AVClient
 from ...ml.data.clients.polygon_client import PolygonClient
@@ -111,13 +118,15 @@ class SeedDailyAggPayload(BaseModel):
     market - if seeing all tickers for a market type, define market\n
     start - date to start counting backwards from\n
     end - date to conclude\n
-    retries - how many retries the job is allowed
+    retries - how many retries the job is allowed\n
+    next_job - display name of a JobDef to enqueue once the bars are written
     """
     ticker:str=None
     market:str=None
     start:str=None
     end:str=None
     retries:int=None
+    next_job:str=None
 
 @router.post("/seed/daily_agg")
 @auth
@@ -127,7 +136,8 @@ async def post_seedDailyAgg(payload:SeedDailyAggPayload) -> JSONResponse:
         "market": payload.market,
         "start": payload.start,
         "end": payload.end,
-        "retries": payload.retries
+        "retries": payload.retries,
+        "next_job": payload.next_job
     }
     _job = SeedDailyAgg()
     _job.configure(config)
@@ -281,19 +291,192 @@ async def post_seedJobs() -> JSONResponse:
                 "ticker": None,
                 "model_type": "TimeSeriesLSTM",
                 "f_cols": [],
+                "t_cols": [],
+                "seq_len": 10,
+                "horizon": 1,
+                "stride": 1,
+                "chronological": True,
                 "epochs": 100,
+                "arch": "lstm",
                 "hidden_size": 64,
                 "num_layers": 2,
                 "dropout": 0.2,
+                "kernel_size": 3,
                 "batch_size": 64,
+                "auto_batch": False,
+                "max_batch_size": 1024,
+                "memory_budget_mb": None,
                 "learning_rate": 0.001,
                 "weight_decay": 1e-5,
                 "patience": 15,
                 "grad_clip": 1.0,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None,
+                "loader_workers": 0,
+                "train_split": 0.8,
+                "checkpoint_every": 5,
+                "folds": 0,
+                "fold_mode": "expanding",
+                "fold_window": None,
+                "fold_epochs": None,
+                "stream": False,
+                "chunk_rows": 10000,
+                "gid_parent_run": None,
+                "replay": 250,
+                "finetune_epochs": 5,
+                "finetune_learning_rate": None
+            },
+            enabled=True
+        ),
+        JobDef(
+            display_name="Sweep TimeSeries LSTM",
+            job_class=TSLSTM_Sweeper.get_class_name(),
+            default_config={
+                "ticker": None,
+                "model_type": "TimeSeriesLSTM",
+                "f_cols": [],
+                "t_cols": [],
+                "seq_len": 10,
+                "horizon": 1,
+                "stride": 1,
+                "chronological": True,
+                "epochs": 81,
+                "arch": "lstm",
+                "hidden_size": 64,
+                "num_layers": 2,
+                "dropout": 0.2,
+                "kernel_size": 3,
+                "batch_size": 64,
+                "learning_rate": 0.001,
+                "weight_decay": 1e-5,
+                "patience": 15,
+                "grad_clip": 1.0,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None,
+                "loader_workers": 0,
+                "train_split": 0.8,
+                "space": {
+                    "hidden_size": [32, 64, 128],
+                    "num_layers": [1, 2, 3],
+                    "dropout": [0.1, 0.2, 0.3],
+                    "learning_rate": [0.0005, 0.001, 0.005]
+                },
+                "trials": 27,
+                "min_epochs": 1,
+                "reduction_factor": 3,
+                "max_workers": None,
+                "seed": None
+            },
+            enabled=True
+        ),
+        JobDef(
+            display_name="Pack Train TimeSeries LSTM",
+            job_class=TSLSTM_PackTrainer.get_class_name(),
+            default_config={
+                "tickers": [],
+                "model_type": "TimeSeriesLSTM",
+                "f_cols": [],
+                "t_cols": [],
+                "seq_len": 10,
+                "horizon": 1,
+                "stride": 1,
+                "chronological": True,
+                "epochs": 100,
+                "hidden_size": 64,
+                "num_layers": 2,
+                "dropout": 0.2,
+                "batch_size": 64,
+                "learning_rate": 0.001,
+                "weight_decay": 1e-5,
+                "patience": 15,
+                "grad_clip": 1.0,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None,
+                "loader_workers": 0,
                 "train_split": 0.8
             },
             enabled=True
         ),
+        JobDef(
+            display_name="Train Shared TimeSeries LSTM",
+            job_class=TSShared_Trainer.get_class_name(),
+            default_config={
+                "tickers": [],
+                "market": None,
+                "model_type": "TimeSeriesSharedLSTM",
+                "f_cols": [],
+                "t_cols": [],
+                "seq_len": 10,
+                "horizon": 1,
+                "stride": 1,
+                "chronological": True,
+                "embedding_dim": 8,
+                "epochs": 100,
+                "hidden_size": 128,
+                "num_layers": 2,
+                "dropout": 0.2,
+                "batch_size": 256,
+                "learning_rate": 0.001,
+                "weight_decay": 1e-5,
+                "patience": 15,
+                "grad_clip": 1.0,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None,
+                "loader_workers": 0,
+                "train_split": 0.8,
+                "checkpoint_every": 5
+            },
+            enabled=True
+        ),
+        JobDef(
+            display_name="Distill TimeSeries LSTM",
+            job_class=TSLSTM_Distiller.get_class_name(),
+            default_config={
+                "gid_training_run": None,
+                "student_hidden_size": None,
+                "student_num_layers": None,
+                "alpha": 0.5,
+                "epochs": None,
+                "batch_size": None,
+                "learning_rate": None,
+                "patience": None,
+                "prune_amount": 0,
+                "prune_epochs": 5,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None
+            },
+            enabled=True
+        ),
+        JobDef(
+            display_name="Quantize TimeSeries LSTM",
+            job_class=TSLSTM_Quantizer.get_class_name(),
+            default_config={
+                "gid_training_run": None,
+                "source_variant": None,
+                "serve": False,
+                "max_drift": None,
+                "latency_samples": 50,
+                "jobs_per_host": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None
+            },
+            enabled=True
+        ),
+        JobDef(
+            display_name=Precomputer.DISPLAY_NAME,
+            job_class=Precomputer.get_class_name(),
+            default_config={
+                "gid_training_runs": None,
+                "tickers": None,
+                "chunk_size": 200
+            },
+            enabled=True
+        ),
         JobDef(
             display_name="Seed Tickers",
             job_class=SeedTickers.get_class_name(),
@@ -310,7 +493,8 @@ async def post_seedJobs() -> JSONResponse:
                 "market": None,
                 "start": None,
                 "end": None,
-                "retries": 3
+                "retries": 3,
+                "next_job": None
             },
             enabled=True
         ),
@@ -388,6 +572,12 @@ async def post_seedModels() -> JSONResponse:
             is_available=True,
             trainer_name=TSLSTM_Trainer.get_class_name(),
             predictor_name=TSLSTM_Predictor.get_class_name()
+        ),
+        ModelType(
+            model_name="TimeSeriesSharedLSTM",
+            is_available=True,
+            trainer_name=TSShared_Trainer.get_class_name(),
+            predictor_name=TSShared_Predictor.get_class_name()
         )
     ]
 
@@ -2,10 +2,19 @@ from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from app.core.utils import ftdates
 from app.core.utils.logger import get_logger
 from app.ml.core.models.model_type import ModelType
+from app.ml.core.models.prediction import Prediction
 from app.ml.core.models.training_run import TrainingRun
+from app.ml.data.models.ticker import Ticker
 from app.ml.model_defs.model_facade import ModelFacade
+from app.ml.prediction.batch import BatchPredictor
+from app.ml.prediction.client import UNAVAILABLE, InferenceClient, InferenceServerError
+from app.ml.prediction.executor import get_inference_executor
+from app.ml.prediction.model_cache import get_model_cache
+from app.ml.prediction.prediction_cache import get_prediction_cache
+from ..utils.responses import WrappedException
 from ..utils.security import auth
 
 # SETUP #
@@ -13,6 +22,8 @@ router = APIRouter(
     prefix="/predict"
 )
 L = get_logger(__name__)
+# Largest number of items accepted by /predict/batch
+MAX_BATCH_ITEMS = 1000
 # END SETUP #
 
 ####################
@@ -23,11 +34,26 @@ L = get_logger(__name__)
 class TrainingRunPredictPayload(BaseModel):
     gid_training_run:int
     artifact:str
-    seq_len:int
+    seq_len:int=None
+    ticker:str=None
+    variant:str=None
+    # Bars to predict; above 1 the model is rolled out and the whole path returned
+    horizon:int=None
+    # False skips the prediction cache lookup; the fresh result is still cached
+    cache:bool=True
 
 @router.post("/training_run")
 @auth
 async def post_ticker(payload:TrainingRunPredictPayload) -> JSONResponse:
+    # The cache's redis client is blocking, so its calls go through the executor
+    cache, executor = get_prediction_cache(), get_inference_executor()
+    if payload.cache:
+        cached = await executor.call(
+            cache.get, payload.gid_training_run, payload.artifact, payload.ticker, payload.variant, payload.horizon or 1
+        )
+        if cached:
+            return JSONResponse({"result": "Ok", "subject": {**cached, "cached": True}})
+
     training_run = await TrainingRun.find_by_id(payload.gid_training_run)
 
     if not training_run:
@@ -43,24 +69,185 @@ async def post_ticker(payload:TrainingRunPredictPayload) -> JSONResponse:
         training_run.gid, 
         {
             "artifact":payload.artifact,
-            "seq_len":payload.seq_len
+            "seq_len":payload.seq_len,
+            "ticker":payload.ticker,
+            "variant":payload.variant,
+            "steps":payload.horizon
         },
-        training_run.data
+        {**training_run.data}
     )
     print(config)
     predictor.configure(config)
+    # Read before predicting, so bars landing mid-prediction invalidate the result
+    generation = await executor.call(cache.generation, config.get("ticker"))
+
+    try:
+        result = await predictor.predict()
+    except ValueError as e:
+        raise WrappedException(str(e), status.HTTP_400_BAD_REQUEST)
+    except InferenceServerError as e:
+        raise WrappedException(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    subject = {
+        "prediction": result,
+        "gid_training_run": training_run.gid,
+        "config": {
+            **predictor.config
+        }
+    }
+    await executor.call(
+        cache.put,
+        training_run.gid,
+        {
+            "ticker": training_run.data.get("ticker"),
+            "variant": training_run.data.get("serve_variant"),
+            "seq_len": predictor.config.get("seq_len")
+        },
+        predictor.config.get("ticker"),
+        payload.variant,
+        payload.artifact,
+        payload.horizon or 1,
+        generation,
+        subject
+    )
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": subject
+        }
+    )
+
+class BatchPredictItem(BaseModel):
+    gid_training_run:int
+    artifact:str
+    seq_len:int=None
+    variant:str=None
+    horizon:int=None
+
+class BatchPredictPayload(BaseModel):
+    items:list[BatchPredictItem]
+
+@router.post("/batch")
+@auth
+async def post_batch(payload:BatchPredictPayload) -> JSONResponse:
+    if not payload.items:
+        raise WrappedException("No items to predict", status.HTTP_400_BAD_REQUEST)
+    if len(payload.items) > MAX_BATCH_ITEMS:
+        raise WrappedException(f"At most {MAX_BATCH_ITEMS} items per batch, got {len(payload.items)}", status.HTTP_400_BAD_REQUEST)
+
+    # 'horizon' travels as 'steps', clear of the runs' own training horizon
+    items = [{**i.model_dump(exclude={"horizon"}), "steps": i.horizon} for i in payload.items]
+    results = None
+    client = InferenceClient.configured()
+    if client:
+        try:
+            results = await client.batch(items)
+        except UNAVAILABLE as e:
+            L.warning(f"Inference server unavailable ({e!r}) - predicting in-process")
+        except ValueError as e:
+            raise WrappedException(str(e), status.HTTP_400_BAD_REQUEST)
+        except InferenceServerError as e:
+            raise WrappedException(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if results is None:
+        results = await BatchPredictor(items).predict()
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": {
+                "predictions": results,
+                "errors": sum(1 for r in results if "error" in r)
+            }
+        }
+    )
+
+async def _precomputed_ticker(gid_training_run:int, ticker:str=None) -> Ticker:
+    """
+    The ticker whose precomputed predictions to read: the given one, or the
+    run's own. Shared runs have a row per ticker, so they need one given.
+    """
+    training_run = await TrainingRun.find_by_id(gid_training_run)
+    if not training_run:
+        raise WrappedException(f"TrainingRun {gid_training_run} not found", status.HTTP_404_NOT_FOUND)
+    symbol = ticker or training_run.data.get("ticker")
+    if not symbol:
+        raise WrappedException(f"TrainingRun {gid_training_run} is a shared run - pass 'ticker'", status.HTTP_400_BAD_REQUEST)
+    found = await Ticker.findByTicker(symbol)
+    if not found:
+        raise WrappedException(f"Unknown ticker {symbol}", status.HTTP_404_NOT_FOUND)
+    return found
 
-    result = await predictor.predict()
+@router.get("/precomputed/{gid_training_run}")
+@auth
+async def get_precomputed(gid_training_run:int, artifact:str, ticker:str=None, as_of:str=None) -> JSONResponse:
+    """
+    The run's latest precomputed prediction of the artifact for the ticker
+    (default the run's; required for shared runs), or the latest made from
+    bars up to as_of. Served from the prediction table - no model is loaded.
+    """
+    found = await _precomputed_ticker(gid_training_run, ticker)
+    prediction = await Prediction.find_latest(gid_training_run, found.gid, artifact, ftdates.str_to_date(as_of) if as_of else None)
+    if not prediction:
+        return JSONResponse(
+            {"result": "Error", "detail": f"No precomputed '{artifact}' prediction of {found.ticker} for TrainingRun {gid_training_run}"},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": prediction.to_json()
+        }
+    )
 
+@router.get("/precomputed/{gid_training_run}/history")
+@auth
+async def get_precomputed_history(gid_training_run:int, artifact:str, ticker:str=None, start:str=None, end:str=None) -> JSONResponse:
+    found = await _precomputed_ticker(gid_training_run, ticker)
+    predictions = await Prediction.find_history(
+        gid_training_run,
+        found.gid,
+        artifact,
+        ftdates.str_to_date(start) if start else None,
+        ftdates.str_to_date(end) if end else None
+    )
     return JSONResponse(
         {
             "result": "Ok",
             "subject": {
-                "prediction": result,
-                "gid_training_run": training_run.gid,
-                "config": {
-                    **predictor.config
-                }
+                "predictions": [p.to_json() for p in predictions]
             }
         }
-    )
\ No newline at end of file
+    )
+
+async def _stats(key:str) -> dict:
+    """
+    The inference server's cache or executor stats, or this process's when
+    there's no server
+    """
+    client = InferenceClient.configured()
+    if client:
+        try:
+            return {"source": "server", **(await client.stats())[key]}
+        except UNAVAILABLE as e:
+            L.warning(f"Inference server unavailable ({e!r}) - reporting in-process stats")
+    stats = get_model_cache().stats() if key == "cache" else get_inference_executor().stats()
+    return {"source": "local", **stats}
+
+@router.get("/cache")
+@auth
+async def get_cache() -> JSONResponse:
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": await _stats("cache")
+        }
+    )
+
+@router.get("/executor")
+@auth
+async def get_executor() -> JSONResponse:
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": await _stats("executor")
+        }
+    )
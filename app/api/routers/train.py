@@ -5,9 +5,11 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.batch.models.job_def import JobDef
+from app.batch.models.job_unit import JobUnit
 from app.core.db.session import transaction
 from app.core.utils.logger import get_logger
-from app.ml.core.models.training_run import TrainingRun
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.fingerprint import config_hash, dataset_fingerprint
 from app.ml.model_defs.model_facade import ModelFacade
 from app.ml.training.trainable import Trainable
 from ..utils.security import auth
@@ -27,9 +29,14 @@ L = get_logger(__name__)
 ####################
 
 class TickerTrainPayload(BaseModel):
+    """
+    reuse - return an existing COMPLETE run trained with the same config on
+    the same data instead of training again
+    """
     gid_job_def:int
     model_name:str
     config:dict[str, Any]={}
+    reuse:bool=True
 
 @router.post("/ticker")
 @auth
@@ -40,10 +47,34 @@ async def post_ticker(payload:TickerTrainPayload) -> JSONResponse:
         _job:Trainable = job_def.get_instance()
         # Get model
         model = await ModelType.find_by_name(payload.model_name)
+        # Configure job
+        _job.configure(None, payload.config)
+        # Hashed once, as requested - resumes and fine-tunes keep this hash
+        _job.config["config_hash"] = config_hash(_job.config)
+
+        # Identical request on unchanged data - serve the earlier run
+        if payload.reuse and _job.config.get("ticker") and _job.config.get("f_cols"):
+            fingerprint = await dataset_fingerprint(_job.config.get("ticker"), _job.config.get("f_cols"))
+            reusable = await TrainingRun.find_reusable(model.gid, _job.config["config_hash"], fingerprint) if fingerprint else None
+            if reusable:
+                L.info(f"Reusing TrainingRun {reusable.gid} for {_job.config.get('ticker')}")
+                return JSONResponse(
+                    {
+                        "result": "Ok",
+                        "subject": {
+                            "training_run": {
+                                "gid": reusable.gid,
+                                "data": reusable.data
+                            },
+                            "reused": True
+                        }
+                    },
+                    status_code=status.HTTP_200_OK
+                )
+
         # Create training run record
         training_run = await TrainingRun.create(model=model)
-        # Configure job
-        _job.configure(training_run.gid, payload.config)
+        _job.config["gid_training_run"] = training_run.gid
         training_run.data = _job.config
         await training_run.update()
         _job.training_run = training_run
@@ -60,8 +91,85 @@ async def post_ticker(payload:TickerTrainPayload) -> JSONResponse:
                     "data": _job.training_run.data
                 },
                 "job_id": f"{job.id}",
+                "job_status": f"{job.get_status()}",
+                "reused": False
+            }
+        },
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+@router.post("/resume/{gid_training_run}")
+@auth
+async def post_resume(gid_training_run:int) -> JSONResponse:
+    """
+    Re-enqueues an unfinished TrainingRun. The trainer continues from the
+    run's last checkpoint if one was written.
+    """
+    async with transaction():
+        training_run = await TrainingRun.find_by_id(gid_training_run)
+        if not training_run:
+            return JSONResponse(
+                {"result": "Error", "detail": f"TrainingRun {gid_training_run} not found"},
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        if training_run.status == RunStatus.COMPLETE:
+            return JSONResponse(
+                {"result": "Error", "detail": f"TrainingRun {gid_training_run} is already complete"},
+                status_code=status.HTTP_409_CONFLICT
+            )
+        unit = await JobUnit.find_by_gid(training_run.gid_job_unit) if training_run.gid_job_unit else None
+        if not unit:
+            return JSONResponse(
+                {"result": "Error", "detail": f"TrainingRun {gid_training_run} has never been started"},
+                status_code=status.HTTP_409_CONFLICT
+            )
+
+        job_def = await JobDef.find_by_gid(unit.gid_job_def)
+        _job:Trainable = job_def.get_instance()
+        _job.config = {**training_run.data}
+        _job.training_run = training_run
+
+        Q = RedisQueue.get_queue("long")
+        job = await Q.put(_job)
+
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": {
+                "training_run": {
+                    "gid": training_run.gid,
+                    "data": training_run.data
+                },
+                "job_id": f"{job.id}",
                 "job_status": f"{job.get_status()}"
             }
         },
         status_code=status.HTTP_202_ACCEPTED
-    )
\ No newline at end of file
+    )
+
+@router.get("/stats/{gid_training_run}")
+@auth
+async def get_stats(gid_training_run:int) -> JSONResponse:
+    """
+    Returns the JobUnit stats (phase timings, throughput, memory) recorded
+    by the job that trained the run
+    """
+    training_run = await TrainingRun.find_by_id(gid_training_run)
+    if not training_run:
+        return JSONResponse(
+            {"result": "Error", "detail": f"TrainingRun {gid_training_run} not found"},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    stats = await JobUnit.find_stats(training_run.gid_job_unit) if training_run.gid_job_unit else {}
+
+    return JSONResponse(
+        {
+            "result": "Ok",
+            "subject": {
+                "gid_training_run": training_run.gid,
+                "gid_job_unit": training_run.gid_job_unit,
+                "status": training_run.status,
+                "stats": stats
+            }
+        }
+    )
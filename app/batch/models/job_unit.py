@@ -175,6 +175,16 @@ class JobUnit(FindableEntity):
         finally:
             session.close()
 
+    @staticmethod
+    async def find_stats(gid:int) -> dict[str, str]:
+        """
+        Returns the persisted stats of a unit as {key: value}
+        """
+        async with transaction() as session:
+            stmt = select(_JobStats).where(_JobStats.gid_job_unit==gid)
+            tups = await session.execute(statement=stmt)
+            return {t[0].key: t[0].value for t in tups}
+
     @staticmethod
     async def find_by_rqtoken(rq_token:int) -> "JobUnit":
         async with transaction() as session:
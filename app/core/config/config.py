@@ -23,6 +23,16 @@ class EnvConfig(BaseSettings):
     alpha_vantage_api_key:str
     polygon_api_key:str
     news_api_key:str #TODO
+    # WORKERS
+    jobs_per_host:int = 1
+    worker_memory_mb:int = 0
+    # SERVING
+    model_cache_mb:int = 256
+    inference_threads:int = 2
+    inference_window_ms:float = 2.0
+    inference_max_batch:int = 64
+    inference_socket:str = ""
+    prediction_cache_ttl_s:int = 3600
 
     class Config:
         env_file = ".env"
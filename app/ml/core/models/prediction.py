@@ -0,0 +1,112 @@
+from datetime import date as _date
+
+from sqlalchemy import BIGINT, String, TIMESTAMP, DATE, DOUBLE_PRECISION, Index, delete, select, tuple_
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db.entity_finder import BATCH_CHUNK_SIZE
+from app.core.db.session import transaction
+from app.core.models.entity import Entity
+
+
+class Prediction(Entity):
+    """
+    A precomputed next-bar prediction of one artifact by a TrainingRun, made
+    from the ticker's bars up to and including as_of
+    """
+    __tablename__ = "prediction"
+    # Serves the latest-prediction and history lookups, and makes a rerun for
+    # the same bars replace its rows
+    __table_args__ = (
+        Index("ux_prediction_run_ticker_artifact_as_of", "gid_training_run", "gid_ticker", "artifact", "as_of", unique=True),
+    )
+
+    s_id:Mapped[BIGINT] = mapped_column(
+        BIGINT,
+        nullable=False,
+        primary_key=True
+    )
+    gid_training_run:Mapped[BIGINT] = mapped_column(
+        BIGINT,
+        nullable=False
+    )
+    gid_ticker:Mapped[BIGINT] = mapped_column(
+        BIGINT,
+        nullable=False
+    )
+    as_of:Mapped[DATE] = mapped_column(
+        DATE,
+        nullable=False
+    )
+    artifact:Mapped[String] = mapped_column(
+        String,
+        nullable=False
+    )
+    value:Mapped[DOUBLE_PRECISION] = mapped_column(
+        DOUBLE_PRECISION,
+        nullable=False
+    )
+    variant:Mapped[String] = mapped_column(
+        String
+    )
+    gid_job_unit:Mapped[BIGINT] = mapped_column(
+        BIGINT
+    )
+    created:Mapped[TIMESTAMP] = mapped_column(
+        TIMESTAMP(timezone=True),
+        nullable=False
+    )
+
+    @staticmethod
+    async def find_latest(gid_training_run:int, gid_ticker:int, artifact:str, as_of:_date=None) -> "Prediction":
+        """
+        The run's newest prediction of the artifact for the ticker, or the
+        newest made from bars up to as_of
+        """
+        async with transaction() as session:
+            stmt = select(Prediction).where(
+                Prediction.gid_training_run==gid_training_run,
+                Prediction.gid_ticker==gid_ticker,
+                Prediction.artifact==artifact
+            )
+            if as_of is not None:
+                stmt = stmt.where(Prediction.as_of <= as_of)
+            stmt = stmt.order_by(Prediction.as_of.desc()).limit(1)
+            return await session.scalar(statement=stmt)
+
+    @staticmethod
+    async def find_history(gid_training_run:int, gid_ticker:int, artifact:str, start:_date=None, end:_date=None) -> list["Prediction"]:
+        """
+        The run's predictions of the artifact for the ticker, oldest first
+        """
+        async with transaction() as session:
+            stmt = select(Prediction).where(
+                Prediction.gid_training_run==gid_training_run,
+                Prediction.gid_ticker==gid_ticker,
+                Prediction.artifact==artifact
+            )
+            if start is not None:
+                stmt = stmt.where(Prediction.as_of >= start)
+            if end is not None:
+                stmt = stmt.where(Prediction.as_of <= end)
+            tups = await session.execute(statement=stmt.order_by(Prediction.as_of))
+            return [t[0] for t in tups]
+
+    @staticmethod
+    async def replace(predictions:list["Prediction"]) -> int:
+        """
+        Writes the predictions in one transaction, replacing any already made
+        by the same run for the same ticker, artifact and as_of
+        """
+        async with transaction() as session:
+            for i in range(0, len(predictions), BATCH_CHUNK_SIZE):
+                chunk = predictions[i:i + BATCH_CHUNK_SIZE]
+                await session.execute(
+                    delete(Prediction).where(
+                        tuple_(Prediction.gid_training_run, Prediction.gid_ticker, Prediction.artifact, Prediction.as_of).in_(
+                            [(p.gid_training_run, p.gid_ticker, p.artifact, p.as_of) for p in chunk]
+                        )
+                    )
+                )
+                session.add_all(chunk)
+                await session.flush()
+        return len(predictions)
@@ -79,9 +79,42 @@ class TrainingRun(FindableEntity):
             stmt = select(TrainingRun).where(TrainingRun.gid==gid)
             return await session.scalar(statement=stmt)
 
+    @staticmethod
+    async def find_by_ids(gids:list[int]) -> list["TrainingRun"]:
+        async with transaction() as session:
+            stmt = select(TrainingRun).where(TrainingRun.gid.in_(gids))
+            tups = await session.execute(statement=stmt)
+            return [t[0] for t in tups]
+
     @staticmethod
     async def find_by_model(gid_model_type:int) -> list["TrainingRun"]:
         async with transaction() as session:
             stmt = select(TrainingRun).where(TrainingRun.gid_model_type==gid_model_type)
             tups = await session.execute(statement=stmt)
             return [t[0] for t in tups]
+
+    @staticmethod
+    async def find_by_status(status:str) -> list["TrainingRun"]:
+        async with transaction() as session:
+            stmt = select(TrainingRun).where(TrainingRun.status==status).order_by(TrainingRun.gid)
+            tups = await session.execute(statement=stmt)
+            return [t[0] for t in tups]
+
+    @staticmethod
+    async def find_reusable(gid_model_type:int, config_hash:str, fingerprint:dict[str, Any]) -> "TrainingRun":
+        """
+        Latest COMPLETE run of the model type trained with the same config hash
+        on data with the same fingerprint
+        """
+        async with transaction() as session:
+            stmt = select(TrainingRun).where(
+                TrainingRun.gid_model_type==gid_model_type,
+                TrainingRun.status==RunStatus.COMPLETE,
+                TrainingRun.data["config_hash"].as_string()==config_hash,
+                TrainingRun.data["fingerprint"]["checksum"].as_string()==fingerprint["checksum"]
+            ).order_by(TrainingRun.created.desc())
+            tups = await session.execute(statement=stmt)
+            for t in tups:
+                if t[0].data.get("fingerprint") == fingerprint:
+                    return t[0]
+            return None
@@ -0,0 +1,78 @@
+"""
+Identity of a training request: a normalized hash of its config and a
+content fingerprint of the bars it trains on. A COMPLETE run with the same
+model type, config hash and fingerprint would train to the same result, so
+its artifacts can be reused instead of training again.
+"""
+import hashlib
+import json
+from datetime import date
+from typing import Any
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+
+# Keys which change how a run is executed or record its results, but not
+# what it learns
+IGNORED_KEYS = {
+    # Run identity and outputs written by trainers
+    "gid_training_run",
+    "config_hash",
+    "fingerprint",
+    "window",
+    "data_end",
+    "split",
+    "lineage",
+    "walk_forward",
+    "sweep",
+    "pack",
+    "gid_pack_run",
+    "batch_probe",
+    # Execution
+    "checkpoint_every",
+    "persist_best",
+    "stream",
+    "chunk_rows",
+    "jobs_per_host",
+    "intra_op_threads",
+    "inter_op_threads",
+    "loader_workers",
+    "blas_threads",
+    "auto_batch",
+    "max_batch_size",
+    "memory_budget_mb"
+}
+
+# Window keys are folded into the spec they resolve to
+WINDOW_KEYS = {"f_cols", "t_cols", "seq_len", "horizon", "stride", "chronological"}
+
+def normalize_config(config:dict[str, Any]) -> dict[str, Any]:
+    """
+    Drops ignored and unset keys and replaces the window keys with the
+    WindowSpec they resolve to, so that equivalent requests compare equal
+    """
+    out = {
+        k: v for k, v in config.items()
+        if k not in IGNORED_KEYS and k not in WINDOW_KEYS and v not in (None, "", [])
+    }
+    if config.get("f_cols"):
+        out["window"] = WindowSpec.from_config(config).to_dict()
+    return out
+
+def config_hash(config:dict[str, Any]) -> str:
+    normalized = json.dumps(normalize_config(config), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+async def dataset_fingerprint(symbol:str, columns:list[str], until:date=None) -> dict[str, Any] | None:
+    """
+    Content fingerprint of a ticker's bars (up to and including until) over
+    the given columns. None if the ticker is unknown or has no bars.
+    """
+    ticker = await Ticker.findByTicker(symbol)
+    if not ticker:
+        return None
+    fingerprint = await TickerTimeseries.fingerprint(ticker, columns, until=until)
+    if not fingerprint["rows"]:
+        return None
+    return {"ticker": symbol, **fingerprint}
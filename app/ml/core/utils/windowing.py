@@ -0,0 +1,158 @@
+"""
+Shared windowing for time series models. Trainers and predictors build a
+WindowSpec from the TrainingRun config so that a model is always served with
+the same window it was trained on.
+"""
+from typing import Any
+
+import numpy as np
+import torch
+
+# Window length used by every run trained before the spec was recorded
+LEGACY_SEQ_LEN = 10
+
+class WindowSpec:
+    """
+    Describes how a (rows, features) series is cut into input/target windows.
+
+    For window i starting at row s = i * stride:
+        x[i] = data[s : s + seq_len]
+        y[i] = data[s + seq_len + horizon - 1, t_cols]
+
+    Rows are expected oldest-first when chronological is True. Legacy runs
+    were trained on newest-first rows, which is kept for serving them.
+    """
+
+    def __init__(
+        self,
+        f_cols:list[str],
+        seq_len:int=LEGACY_SEQ_LEN,
+        horizon:int=1,
+        stride:int=1,
+        t_cols:list[str]=None,
+        chronological:bool=False
+    ):
+        if seq_len < 1 or horizon < 1 or stride < 1:
+            raise ValueError(f"Bad window - seq_len: {seq_len}, horizon: {horizon}, stride: {stride}")
+        self.f_cols = list(f_cols)
+        self.seq_len = int(seq_len)
+        self.horizon = int(horizon)
+        self.stride = int(stride)
+        self.t_cols = list(t_cols) if t_cols else list(self.f_cols)
+        self.chronological = bool(chronological)
+
+        missing = [c for c in self.t_cols if c not in self.f_cols]
+        if missing:
+            raise ValueError(f"Target columns {missing} are not in feature columns {self.f_cols}")
+        self.t_idx = [self.f_cols.index(c) for c in self.t_cols]
+
+    @staticmethod
+    def from_config(config:dict[str, Any]) -> "WindowSpec":
+        """
+        Builds a spec from the training config keys. Used when training a new run.
+        """
+        return WindowSpec(
+            f_cols=config.get("f_cols"),
+            seq_len=config.get("seq_len") or LEGACY_SEQ_LEN,
+            horizon=config.get("horizon") or 1,
+            stride=config.get("stride") or 1,
+            t_cols=config.get("t_cols"),
+            chronological=config.get("chronological", False)
+        )
+
+    @staticmethod
+    def trained(config:dict[str, Any]) -> "WindowSpec":
+        """
+        Returns the spec a run was trained with. Runs which predate the recorded
+        'window' key were always trained on the legacy newest-first window.
+        """
+        window = config.get("window")
+        if window:
+            return WindowSpec(**window)
+        return WindowSpec(f_cols=config.get("f_cols"))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "f_cols": self.f_cols,
+            "seq_len": self.seq_len,
+            "horizon": self.horizon,
+            "stride": self.stride,
+            "t_cols": self.t_cols,
+            "chronological": self.chronological
+        }
+
+    @property
+    def span(self) -> int:
+        """
+        Number of rows covered by one input window plus its target
+        """
+        return self.seq_len + self.horizon
+
+    @property
+    def n_features(self) -> int:
+        return len(self.f_cols)
+
+    @property
+    def n_targets(self) -> int:
+        return len(self.t_cols)
+
+    def count(self, rows:int) -> int:
+        """
+        Number of complete windows in a series of the given length
+        """
+        if rows < self.span:
+            return 0
+        return (rows - self.span) // self.stride + 1
+
+    def windows(self, data:torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Cuts a (rows, features) tensor into (windows, seq_len, features) inputs and
+        (windows, targets) outputs in one pass. Inputs are an unfold() view of data,
+        as are the targets when every feature is a target.
+        """
+        n = self.count(len(data))
+        if n == 0:
+            return data.new_empty((0, self.seq_len, data.shape[1])), data.new_empty((0, self.n_targets))
+
+        w = data.unfold(0, self.span, self.stride).transpose(1, 2)[:n]
+        x = w[:, :self.seq_len]
+        y = w[:, self.span - 1]
+        if self.t_idx != list(range(self.n_features)):
+            y = y[:, self.t_idx]
+        return x, y
+
+    def sort(self, rows:Any, key:str="date") -> Any:
+        """
+        Orders a DataFrame the way this spec expects its rows
+        """
+        return rows.sort_values(by=key, ascending=self.chronological)
+
+    def order(self, data:np.ndarray) -> np.ndarray:
+        """
+        Orders oldest-first rows (e.g. TickerTimeseries.tail) the way this
+        spec expects them
+        """
+        return data if self.chronological else data[::-1]
+
+    def feedback(self) -> list[int]:
+        """
+        The target column predicting each feature column - how a prediction is
+        fed back in as the next bar of a multi-step rollout. Only specs which
+        predict the next bar of every feature can be rolled out.
+        """
+        if self.horizon != 1:
+            raise ValueError(f"Multi-step rollout needs a next-bar model, this one predicts {self.horizon} bars ahead")
+        missing = [c for c in self.f_cols if c not in self.t_cols]
+        if missing:
+            raise ValueError(f"Multi-step rollout needs every feature as a target - {missing} are not predicted")
+        return [self.t_cols.index(c) for c in self.f_cols]
+
+    def latest(self, data:np.ndarray | torch.Tensor) -> np.ndarray | torch.Tensor:
+        """
+        Returns the most recent input window from ordered rows
+        """
+        if len(data) < self.seq_len:
+            raise ValueError(f"Need {self.seq_len} rows for a window, got {len(data)}")
+        if self.chronological:
+            return data[len(data) - self.seq_len:]
+        return data[:self.seq_len]
@@ -2,17 +2,28 @@ from datetime import datetime, date as _date, timedelta, timezone
 import asyncio
 
 from app.batch.job import Job
+from app.batch.models.job_def import JobDef
 from app.batch.models.job_unit import JobUnit
+from app.batch.redis_queue import RedisQueue
 from app.core.db.entity_finder import EntityFinder
 from app.core.utils import ftdates
 from app.core.utils.logger import get_logger
 from app.ml.data.models.daily_agg import DailyAgg
 from app.ml.data.models.ticker import Ticker
 from app.ml.data.models.sma import SMA
+from app.ml.prediction.prediction_cache import get_prediction_cache
 from ..clients.polygon_client import PolygonClient
 
 L = get_logger(__name__)
 
+def invalidate_predictions(tickers:list[Ticker], rows:list) -> None:
+    """
+    Expires cached predictions of the tickers that got new bars
+    """
+    written = {row.gid_ticker for row in rows}
+    if written:
+        get_prediction_cache().invalidate(t.ticker for t in tickers if t.gid in written)
+
 class SeedTickers(Job):
 
     def run(self, unit):
@@ -131,6 +142,7 @@ class SeedSMA(Job):
                     continue
                 to_create.append(_new)
         created = await EntityFinder.batch_create(to_create)
+        invalidate_predictions(tickers, to_create)
         unit.accumulate("SMA created", created)
         unit.log("Job completed successfully")
 
@@ -195,6 +207,15 @@ class SeedDailyAgg(Job):
                     retries -= 1
                 date = ftdates.prev_weekday(date, ticker.primary_exchange)
         created = await EntityFinder.batch_create(to_create)
+        invalidate_predictions(tickers, to_create)
 
         unit.accumulate("Daily Agg created", created)
+        # Chains a job over the new bars, e.g. "Precompute Predictions"
+        next_job = conf.get("next_job")
+        if next_job:
+            job_def = await JobDef.find_by_display_name(next_job)
+            if not job_def:
+                raise ValueError(f"No JobDef named '{next_job}'")
+            rj = await RedisQueue.get_queue("long").put(job_def.get_instance())
+            unit.log(f"Enqueued '{next_job}' ({rj.id})")
         unit.log("Job completed")
\ No newline at end of file
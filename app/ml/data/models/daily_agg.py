@@ -2,7 +2,7 @@ from datetime import datetime, date as _date, timezone
 
 from sqlalchemy import BIGINT
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import TIMESTAMP, DATE, DOUBLE_PRECISION, INTEGER, BIGINT, select
+from sqlalchemy import TIMESTAMP, DATE, DOUBLE_PRECISION, INTEGER, BIGINT, Index, select
 
 from app.core.db.session import transaction
 from app.core.models.entity import Entity
@@ -11,6 +11,10 @@ from app.ml.data.models.ticker import Ticker
 
 class DailyAgg(Entity):
     __tablename__ = "ticker_dailyagg"
+    # Serves vw_ticker_timeseries lookups by ticker, newest first (TickerTimeseries.tail)
+    __table_args__ = (
+        Index("ix_ticker_dailyagg_gid_ticker_date", "gid_ticker", "date"),
+    )
 
     s_id:Mapped[BIGINT] = mapped_column(
         BIGINT,
@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from datetime import date as _date
 
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, TIMESTAMP, DATE, DOUBLE_PRECISION, INTEGER, BIGINT, select
+from sqlalchemy import String, TIMESTAMP, DATE, DOUBLE_PRECISION, INTEGER, BIGINT, Index, select
 
 from app.core.db.session import transaction
 from app.core.models.entity import Entity
@@ -11,6 +11,10 @@ from app.ml.data.models.ticker import Ticker
 
 class SMA(Entity):
     __tablename__ = "ticker_sma"
+    # Serves vw_ticker_timeseries lookups by ticker, newest first (TickerTimeseries.tail)
+    __table_args__ = (
+        Index("ix_ticker_sma_gid_ticker_date", "gid_ticker", "date"),
+    )
 
     s_id:Mapped[BIGINT] = mapped_column(
         BIGINT,
@@ -57,6 +57,16 @@ class Ticker(FindableEntity):
             stmt = select(Ticker).where(Ticker.ticker == ticker)
             return await session.scalar(statement=stmt)
 
+    @staticmethod
+    async def findByTickers(tickers:list[str]) -> list["Ticker"]:
+        """
+        Finds the Ticker objects for several ticker values in one query
+        """
+        async with transaction() as session:
+            stmt = select(Ticker).where(Ticker.ticker.in_(tickers))
+            tups = await session.execute(statement=stmt)
+            return [t[0] for t in tups]
+
     @staticmethod
     async def findAll() -> list["Ticker"]:
         """
@@ -1,11 +1,19 @@
-from app.core.db.session import transaction
+from datetime import date as _date
+
+import numpy as np
+
+from app.core.db.session import get_sync_session, transaction
 from app.core.models.entity import View
 
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import BIGINT, String, TIMESTAMP, BOOLEAN, select, DOUBLE_PRECISION, DATE, INTEGER
+from sqlalchemy import BIGINT, String, TIMESTAMP, BOOLEAN, func, select, tuple_, DOUBLE_PRECISION, DATE, INTEGER
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from app.ml.data.models.ticker import Ticker
 
+# A ticker's rows are unique by date and SMA series - a date has one row per
+# SMA window, timespan and series type seeded - so pages are keyed on all four
+SERIES_KEY = ("date", "sma_series_type", "sma_timespan", "sma_window")
 
 class TickerTimeseries(View):
     __tablename__ = "vw_ticker_timeseries"
@@ -68,4 +76,166 @@ class TickerTimeseries(View):
                 TickerTimeseries.ticker_gid==ticker.gid
             ).order_by(TickerTimeseries.date)
             tups = await session.execute(statement=stmt)
-            return [t[0] for t in tups]
\ No newline at end of file
+            return [t[0] for t in tups]
+
+    @staticmethod
+    async def tail(ticker_gid:int, columns:list[str], n:int, until:_date=None) -> np.ndarray:
+        """
+        The last n bars (up to and including until) of the given columns as a
+        (rows, columns) float array, oldest first. Reads only those rows -
+        ORDER BY date DESC LIMIT n over the (gid_ticker, date) index.
+        """
+        async with transaction() as session:
+            stmt = select(*[getattr(TickerTimeseries, c) for c in columns]).where(
+                TickerTimeseries.ticker_gid==ticker_gid
+            )
+            if until is not None:
+                stmt = stmt.where(TickerTimeseries.date <= until)
+            stmt = stmt.order_by(TickerTimeseries.date.desc()).limit(n)
+            rows = (await session.execute(statement=stmt)).all()
+        return np.asarray(rows[::-1], dtype=np.float64).reshape(len(rows), len(columns))
+
+    @staticmethod
+    async def tails(ticker_gids:list[int], columns:list[str], n:int) -> dict[int, np.ndarray]:
+        """
+        tail() for several tickers in one query: the last n bars of each, keyed
+        by ticker gid. Tickers without bars are left out.
+        """
+        async with transaction() as session:
+            rn = func.row_number().over(
+                partition_by=TickerTimeseries.ticker_gid,
+                order_by=TickerTimeseries.date.desc()
+            ).label("rn")
+            inner = select(
+                TickerTimeseries.ticker_gid,
+                TickerTimeseries.date,
+                *[getattr(TickerTimeseries, c) for c in columns],
+                rn
+            ).where(TickerTimeseries.ticker_gid.in_(ticker_gids)).subquery()
+            stmt = select(inner.c.ticker_gid, *[inner.c[c] for c in columns]).where(
+                inner.c.rn <= n
+            ).order_by(inner.c.ticker_gid, inner.c.date)
+            rows = (await session.execute(statement=stmt)).all()
+        grouped:dict[int, list[tuple]] = {}
+        for ticker_gid, *values in rows:
+            grouped.setdefault(ticker_gid, []).append(values)
+        return {gid: np.asarray(v, dtype=np.float64) for gid, v in grouped.items()}
+
+    @staticmethod
+    async def last_dates(ticker_gids:list[int]) -> dict[int, _date]:
+        """
+        The date of each ticker's newest bar, keyed by ticker gid
+        """
+        async with transaction() as session:
+            stmt = select(TickerTimeseries.ticker_gid, func.max(TickerTimeseries.date)).where(
+                TickerTimeseries.ticker_gid.in_(ticker_gids)
+            ).group_by(TickerTimeseries.ticker_gid)
+            rows = (await session.execute(statement=stmt)).all()
+        return {gid: d for gid, d in rows}
+
+    @staticmethod
+    async def fingerprint(ticker:Ticker, columns:list[str], until:_date=None) -> dict:
+        """
+        Row count, date range and an md5 over the date and given columns of
+        every bar, computed in the DB
+        """
+        async with transaction() as session:
+            row_text = func.concat_ws(",", TickerTimeseries.date, *[getattr(TickerTimeseries, c) for c in columns])
+            stmt = select(
+                func.count(),
+                func.min(TickerTimeseries.date),
+                func.max(TickerTimeseries.date),
+                func.md5(func.string_agg(row_text, aggregate_order_by(";", TickerTimeseries.date)))
+            ).where(TickerTimeseries.ticker_gid==ticker.gid)
+            if until is not None:
+                stmt = stmt.where(TickerTimeseries.date <= until)
+            rows, start, end, checksum = (await session.execute(statement=stmt)).one()
+            return {
+                "columns": list(columns),
+                "start": str(start) if start else None,
+                "end": str(end) if end else None,
+                "rows": rows,
+                "checksum": checksum
+            }
+
+    # Sync column-level reads for streaming datasets, which are iterated from
+    # inside the training loop. They return plain tuples, not ORM objects.
+
+    @staticmethod
+    def _summary(ticker_gid:int, until:_date=None) -> tuple[int, _date]:
+        """
+        Returns (rows, last date) of a ticker's series, up to and including until
+        """
+        session = get_sync_session()
+        try:
+            stmt = select(func.count(), func.max(TickerTimeseries.date)).where(
+                TickerTimeseries.ticker_gid==ticker_gid
+            )
+            if until is not None:
+                stmt = stmt.where(TickerTimeseries.date <= until)
+            rows, last = session.execute(statement=stmt).one()
+            return rows, last
+        finally:
+            session.close()
+
+    @staticmethod
+    def _date_at(ticker_gid:int, offset:int) -> _date:
+        """
+        Date of the row at the given position of the oldest-first series
+        """
+        session = get_sync_session()
+        try:
+            stmt = select(TickerTimeseries.date).where(
+                TickerTimeseries.ticker_gid==ticker_gid
+            ).order_by(TickerTimeseries.date).offset(offset).limit(1)
+            return session.scalar(statement=stmt)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _range(ticker_gid:int, columns:list[str], until:_date=None) -> tuple[list[float], list[float]]:
+        """
+        Per-column (minimums, maximums) up to and including until, computed in the DB
+        """
+        session = get_sync_session()
+        try:
+            cols = [getattr(TickerTimeseries, c) for c in columns]
+            stmt = select(*[func.min(c) for c in cols], *[func.max(c) for c in cols]).where(
+                TickerTimeseries.ticker_gid==ticker_gid
+            )
+            if until is not None:
+                stmt = stmt.where(TickerTimeseries.date <= until)
+            row = session.execute(statement=stmt).one()
+            return list(row[:len(cols)]), list(row[len(cols):])
+        finally:
+            session.close()
+
+    @staticmethod
+    def _chunk(
+        ticker_gid:int,
+        columns:list[str],
+        after:_date=None,
+        until:_date=None,
+        cursor:tuple=None,
+        limit:int=10000
+    ) -> list[tuple]:
+        """
+        Keyset page of (*SERIES_KEY, *columns) rows in key order, strictly
+        after the cursor (the last key of the previous page) and the date 'after'
+        """
+        session = get_sync_session()
+        try:
+            key = [getattr(TickerTimeseries, k) for k in SERIES_KEY]
+            stmt = select(*key, *[getattr(TickerTimeseries, c) for c in columns]).where(
+                TickerTimeseries.ticker_gid==ticker_gid
+            )
+            if after is not None:
+                stmt = stmt.where(TickerTimeseries.date > after)
+            if until is not None:
+                stmt = stmt.where(TickerTimeseries.date <= until)
+            if cursor is not None:
+                stmt = stmt.where(tuple_(*key) > tuple_(*cursor))
+            stmt = stmt.order_by(*key).limit(limit)
+            return [tuple(r) for r in session.execute(statement=stmt)]
+        finally:
+            session.close()
@@ -0,0 +1,84 @@
+"""
+Single-series architectures served through the TimeSeriesLSTM trainer and
+predictor. A run picks one with the 'arch' config key; runs without it are
+LSTMs.
+"""
+from typing import Any
+
+import torch
+import torch.nn as nn
+
+from app.ml.model_defs.gru import GRUModel
+from app.ml.model_defs.lstm import LSTMModel
+from app.ml.model_defs.tcn import TCNModel
+
+DEFAULT_ARCH = "lstm"
+
+ARCHITECTURES:dict[str, type[nn.Module]] = {
+    "lstm": LSTMModel,
+    "gru": GRUModel,
+    "tcn": TCNModel
+}
+
+def build_model(config:dict[str, Any], input_size:int, output_size:int) -> nn.Module:
+    """
+    Builds the run's architecture from its config. Every architecture takes
+    (batch, seq_len, input_size) and returns (batch, output_size).
+    """
+    arch = config.get("arch") or DEFAULT_ARCH
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Unknown arch '{arch}' - use one of {list(ARCHITECTURES)}")
+    kwargs = {
+        "input_size": input_size,
+        "hidden_size": config.get("hidden_size"),
+        "num_layers": config.get("num_layers"),
+        "output_size": output_size,
+        "dropout": config.get("dropout") or 0.0
+    }
+    if arch == "tcn":
+        kwargs["kernel_size"] = config.get("kernel_size") or 3
+    return ARCHITECTURES[arch](**kwargs)
+
+# Layers with dynamic int8 kernels. TCN convolutions have none, so only a
+# TCN's output layer is quantized.
+QUANTIZABLE:set[type[nn.Module]] = {nn.LSTM, nn.GRU, nn.Linear}
+
+def quantize(model:nn.Module) -> nn.Module:
+    """
+    Dynamically quantized (int8 weights, float activations) copy of a model
+    for CPU inference. A quantized state dict loads into the result of
+    quantize(build_model(...)).
+    """
+    return torch.ao.quantization.quantize_dynamic(model.cpu().eval(), QUANTIZABLE, dtype=torch.qint8)
+
+def rollout(model:nn.Module, x:torch.Tensor, steps:int, feedback:list[int], chronological:bool=True, extra:tuple=()) -> torch.Tensor:
+    """
+    Predicts the next steps bars after each window of x (batch, seq_len,
+    input_size) by feeding every prediction back in as the next bar.
+    feedback maps feature columns to output columns (WindowSpec.feedback())
+    and extra is passed on to the model after the input, e.g. ticker_idx.
+
+    Recurrent models (those with step()) encode the window once and then
+    advance their hidden state by one predicted bar per step, so later steps
+    see the whole window plus the predicted bars. TCNs and legacy
+    newest-first windows re-encode the slid window every step.
+
+    Returns (batch, steps, output_size).
+    """
+    path = []
+    with torch.no_grad():
+        if chronological and hasattr(model, "step"):
+            out, state = model.step(x, *extra)
+            path.append(out)
+            for _ in range(steps - 1):
+                out, state = model.step(out[:, feedback].unsqueeze(1), *extra, state=state)
+                path.append(out)
+        else:
+            window = x
+            for n in range(steps):
+                out = model(window, *extra)
+                path.append(out)
+                if n < steps - 1:
+                    bar = out[:, feedback].unsqueeze(1)
+                    window = torch.cat([window[:, 1:], bar], dim=1) if chronological else torch.cat([bar, window[:, :-1]], dim=1)
+    return torch.stack(path, dim=1)
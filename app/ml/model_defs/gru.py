@@ -0,0 +1,24 @@
+import torch.nn as nn
+
+class GRUModel(nn.Module):
+    """
+    LSTMModel with a GRU in place of the LSTM. Same inputs, outputs and
+    constructor, with three gates instead of four per step.
+    """
+    def __init__(self, input_size:int=1, hidden_size:int=64, num_layers:int=2, output_size:int=1, dropout:float=0.2):
+        super().__init__()
+        self.gru = nn.GRU(input_size, hidden_size, num_layers, batch_first=True, dropout=dropout if num_layers > 1 else 0)
+        self.dropout = nn.Dropout(dropout)
+        self.linear = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x):
+        return self.step(x)[0]
+
+    def step(self, x, state=None):
+        """
+        forward() which also takes and returns the GRU's hidden state
+        """
+        gru_out, state = self.gru(x, state)
+        last_output = gru_out[:, -1, :]
+        last_output = self.dropout(last_output)
+        return self.linear(last_output), state
@@ -1,3 +1,4 @@
+import torch
 import torch.nn as nn
 
 class LSTMModel(nn.Module):
@@ -10,8 +11,151 @@ class LSTMModel(nn.Module):
         self.linear = nn.Linear(hidden_size, output_size)
 
     def forward(self, x):
-        lstm_out, _ = self.lstm(x)
+        return self.step(x)[0]
+
+    def step(self, x, state=None):
+        """
+        forward() which also takes and returns the LSTM's (h, c), so an encoded
+        window can be extended one bar at a time (see architectures.rollout)
+        """
+        lstm_out, state = self.lstm(x, state)
         last_output = lstm_out[:, -1, :]
         # Apply dropout before final prediction
         last_output = self.dropout(last_output)
-        return self.linear(last_output)
+        return self.linear(last_output), state
+
+class PackedLSTMModel(nn.Module):
+    """
+    K independent LSTMModels evaluated as one grouped network. Every parameter
+    carries a leading model dimension, so a single forward/backward pass trains
+    all K models on their own inputs: x is (K, batch, seq_len, input_size) and
+    the output is (K, batch, output_size).
+
+    Gate order and parameter shapes match nn.LSTM, so from_models()/unpack()
+    convert to and from plain LSTMModel state dicts exactly.
+    """
+    def __init__(self, k:int, input_size:int=1, hidden_size:int=64, num_layers:int=2, output_size:int=1, dropout:float=0.2):
+        super().__init__()
+        self.k = k
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.output_size = output_size
+        self.dropout_p = dropout
+        self.weight_ih = nn.ParameterList()
+        self.weight_hh = nn.ParameterList()
+        self.bias_ih = nn.ParameterList()
+        self.bias_hh = nn.ParameterList()
+        for layer in range(num_layers):
+            layer_in = input_size if layer == 0 else hidden_size
+            self.weight_ih.append(nn.Parameter(torch.empty(k, 4 * hidden_size, layer_in)))
+            self.weight_hh.append(nn.Parameter(torch.empty(k, 4 * hidden_size, hidden_size)))
+            self.bias_ih.append(nn.Parameter(torch.empty(k, 4 * hidden_size)))
+            self.bias_hh.append(nn.Parameter(torch.empty(k, 4 * hidden_size)))
+        self.linear_weight = nn.Parameter(torch.empty(k, output_size, hidden_size))
+        self.linear_bias = nn.Parameter(torch.empty(k, output_size))
+        self.dropout = nn.Dropout(dropout)
+
+    @staticmethod
+    def from_models(models:list[LSTMModel]) -> "PackedLSTMModel":
+        """
+        Packs K LSTMModels with identical shapes into one network
+        """
+        lstm = models[0].lstm
+        packed = PackedLSTMModel(
+            k=len(models),
+            input_size=lstm.input_size,
+            hidden_size=lstm.hidden_size,
+            num_layers=lstm.num_layers,
+            output_size=models[0].linear.out_features,
+            dropout=models[0].dropout.p
+        )
+        with torch.no_grad():
+            for layer in range(packed.num_layers):
+                packed.weight_ih[layer].copy_(torch.stack([getattr(m.lstm, f"weight_ih_l{layer}") for m in models]))
+                packed.weight_hh[layer].copy_(torch.stack([getattr(m.lstm, f"weight_hh_l{layer}") for m in models]))
+                packed.bias_ih[layer].copy_(torch.stack([getattr(m.lstm, f"bias_ih_l{layer}") for m in models]))
+                packed.bias_hh[layer].copy_(torch.stack([getattr(m.lstm, f"bias_hh_l{layer}") for m in models]))
+            packed.linear_weight.copy_(torch.stack([m.linear.weight for m in models]))
+            packed.linear_bias.copy_(torch.stack([m.linear.bias for m in models]))
+        return packed
+
+    @staticmethod
+    def from_state_dicts(states:list[dict[str, torch.Tensor]], **kwargs) -> "PackedLSTMModel":
+        """
+        Packs K LSTMModel state dicts; kwargs are the LSTMModel constructor args
+        """
+        models = []
+        for state in states:
+            m = LSTMModel(**kwargs)
+            m.load_state_dict(state)
+            models.append(m)
+        return PackedLSTMModel.from_models(models)
+
+    def unpack(self, i:int, state:dict[str, torch.Tensor]=None) -> dict[str, torch.Tensor]:
+        """
+        Returns model i as an LSTMModel state dict. Reads from the given packed
+        state dict (e.g. a saved best state) instead of the live parameters if passed.
+        """
+        state = state if state is not None else self.state_dict()
+        out = {}
+        for layer in range(self.num_layers):
+            out[f"lstm.weight_ih_l{layer}"] = state[f"weight_ih.{layer}"][i].detach().clone().cpu()
+            out[f"lstm.weight_hh_l{layer}"] = state[f"weight_hh.{layer}"][i].detach().clone().cpu()
+            out[f"lstm.bias_ih_l{layer}"] = state[f"bias_ih.{layer}"][i].detach().clone().cpu()
+            out[f"lstm.bias_hh_l{layer}"] = state[f"bias_hh.{layer}"][i].detach().clone().cpu()
+        out["linear.weight"] = state["linear_weight"][i].detach().clone().cpu()
+        out["linear.bias"] = state["linear_bias"][i].detach().clone().cpu()
+        return out
+
+    def forward(self, x):
+        k, b, t, _ = x.shape
+        h_out = x
+        for layer in range(self.num_layers):
+            if layer > 0:
+                # nn.LSTM applies dropout to the outputs of every layer but the last
+                h_out = self.dropout(h_out)
+            # Input projections for every time step at once
+            gi = torch.einsum("kbtf,kgf->kbtg", h_out, self.weight_ih[layer]) \
+                + (self.bias_ih[layer] + self.bias_hh[layer])[:, None, None, :]
+            w_hh = self.weight_hh[layer].transpose(1, 2)
+            h = x.new_zeros((k, b, self.hidden_size))
+            c = x.new_zeros((k, b, self.hidden_size))
+            outputs = []
+            for step in range(t):
+                gates = gi[:, :, step] + torch.bmm(h, w_hh)
+                i, f, g, o = gates.chunk(4, dim=-1)
+                c = torch.sigmoid(f) * c + torch.sigmoid(i) * torch.tanh(g)
+                h = torch.sigmoid(o) * torch.tanh(c)
+                if layer < self.num_layers - 1:
+                    outputs.append(h)
+            if layer < self.num_layers - 1:
+                h_out = torch.stack(outputs, dim=2)
+        last_output = self.dropout(h)
+        return torch.baddbmm(self.linear_bias[:, None, :], last_output, self.linear_weight.transpose(1, 2))
+
+class SharedLSTMModel(nn.Module):
+    """
+    One LSTM shared across many tickers. A learned per-ticker embedding is
+    concatenated to the features at every time step, so the network can tell
+    the series apart while sharing all recurrent weights.
+    """
+    def __init__(self, n_tickers:int, embedding_dim:int=8, input_size:int=1, hidden_size:int=64, num_layers:int=2, output_size:int=1, dropout:float=0.2):
+        super().__init__()
+        self.embedding = nn.Embedding(n_tickers, embedding_dim)
+        self.lstm = nn.LSTM(input_size + embedding_dim, hidden_size, num_layers, batch_first=True, dropout=dropout if num_layers > 1 else 0)
+        self.dropout = nn.Dropout(dropout)
+        self.linear = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x, ticker_idx):
+        return self.step(x, ticker_idx)[0]
+
+    def step(self, x, ticker_idx, state=None):
+        """
+        forward() which also takes and returns the LSTM's (h, c)
+        """
+        emb = self.embedding(ticker_idx)[:, None, :].expand(-1, x.shape[1], -1)
+        lstm_out, state = self.lstm(torch.cat([x, emb], dim=-1), state)
+        last_output = lstm_out[:, -1, :]
+        last_output = self.dropout(last_output)
+        return self.linear(last_output), state
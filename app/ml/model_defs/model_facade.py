@@ -1,6 +1,7 @@
 from typing import Any
 from app.core.db.entity_finder import EntityFinder
 from app.ml.core.models.model_type import ModelType
+from app.ml.prediction.client import InferenceClient, RemotePredictor
 from app.ml.prediction.predictable import Predictable
 from app.ml.training.trainable import Trainable
 
@@ -10,6 +11,9 @@ class ModelFacade():
     This is a facade class used for retrieving objects
     used in models/training/prediction, etc...
     """
+    # Resolved predictor classes by name, so a prediction doesn't re-import them
+    _predictors:dict[str, type[Predictable]] = {}
+
     @staticmethod
     def trainer_for(model:ModelType) -> Trainable:
         """
@@ -24,17 +28,27 @@ class ModelFacade():
         return c()
     
     @staticmethod
-    def predictor_for(model:ModelType) -> Predictable:
+    def predictor_for(model:ModelType, local:bool=False) -> Predictable:
         """
         Docstring for predictor_for
         
         :param model:
         :type model: ModelType
-        :return: Instance of the model's predictor class
+        :param local: Always predict in this process, even if an inference server is running
+        :type local: bool
+        :return: Instance of the model's predictor class, wrapped in a RemotePredictor
+            when an inference server is running (INFERENCE_SOCKET)
         :rtype: Predictable
         """
-        c = EntityFinder.resolve(model.predictor_name)
-        return c()
+        c = ModelFacade._predictors.get(model.predictor_name)
+        if c is None:
+            c = EntityFinder.resolve(model.predictor_name)
+            ModelFacade._predictors[model.predictor_name] = c
+        predictor = c()
+        if local:
+            return predictor
+        client = InferenceClient.configured()
+        return RemotePredictor(client, predictor) if client else predictor
     
     @staticmethod
     def build_config(gid_training_run:int, config:dict[str, Any], default:dict[str, Any]={}) -> dict[str, Any]:
@@ -0,0 +1,60 @@
+import torch
+import torch.nn as nn
+
+class CausalConv1d(nn.Conv1d):
+    """
+    Conv1d padded on the left only, so output step t sees inputs up to t
+    """
+    def __init__(self, in_channels:int, out_channels:int, kernel_size:int, dilation:int=1):
+        super().__init__(in_channels, out_channels, kernel_size, dilation=dilation)
+        self.left_pad = (kernel_size - 1) * dilation
+
+    def forward(self, x):
+        return super().forward(nn.functional.pad(x, (self.left_pad, 0)))
+
+class TemporalBlock(nn.Module):
+    """
+    Two dilated causal convolutions with a residual connection
+    """
+    def __init__(self, in_channels:int, out_channels:int, kernel_size:int, dilation:int, dropout:float):
+        super().__init__()
+        self.conv1 = CausalConv1d(in_channels, out_channels, kernel_size, dilation)
+        self.conv2 = CausalConv1d(out_channels, out_channels, kernel_size, dilation)
+        self.dropout = nn.Dropout(dropout)
+        self.downsample = nn.Conv1d(in_channels, out_channels, 1) if in_channels != out_channels else None
+
+    def forward(self, x):
+        out = self.dropout(torch.relu(self.conv1(x)))
+        out = self.dropout(torch.relu(self.conv2(out)))
+        residual = x if self.downsample is None else self.downsample(x)
+        return torch.relu(out + residual)
+
+class TCNModel(nn.Module):
+    """
+    Temporal convolutional network. num_layers TemporalBlocks of hidden_size
+    channels with dilations 1, 2, 4, ...; every time step is computed in
+    parallel. Takes and returns the same shapes as LSTMModel:
+    (batch, seq_len, input_size) -> (batch, output_size), read from the last step.
+
+    The receptive field is 1 + 2 * (kernel_size - 1) * (2^num_layers - 1) steps;
+    see receptive_field().
+    """
+    def __init__(self, input_size:int=1, hidden_size:int=64, num_layers:int=2, output_size:int=1, dropout:float=0.2, kernel_size:int=3):
+        super().__init__()
+        self.kernel_size = kernel_size
+        self.blocks = nn.Sequential(*[
+            TemporalBlock(input_size if i == 0 else hidden_size, hidden_size, kernel_size, 2 ** i, dropout)
+            for i in range(num_layers)
+        ])
+        self.dropout = nn.Dropout(dropout)
+        self.linear = nn.Linear(hidden_size, output_size)
+
+    @staticmethod
+    def receptive_field(num_layers:int, kernel_size:int=3) -> int:
+        return 1 + 2 * (kernel_size - 1) * (2 ** num_layers - 1)
+
+    def forward(self, x):
+        out = self.blocks(x.transpose(1, 2))
+        last_output = out[:, :, -1]
+        last_output = self.dropout(last_output)
+        return self.linear(last_output)
@@ -0,0 +1,164 @@
+from typing import Any
+
+import torch
+
+from app.core.utils.logger import get_logger
+from app.ml.core.models.model_type import ModelType
+from app.ml.core.models.training_run import TrainingRun
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.model_defs.architectures import rollout
+from app.ml.model_defs.lstm import LSTMModel, PackedLSTMModel
+from app.ml.model_defs.model_facade import ModelFacade
+from app.ml.prediction.executor import get_inference_executor
+from app.ml.prediction.ts_lstm import Predictor
+
+L = get_logger(__name__)
+
+class BatchPredictor:
+    """
+    Predicts many {gid_training_run, artifact, steps} items of single-ticker
+    runs at once. Runs, tickers and input windows are each fetched in one
+    query, and items of the same run and variant share one forward pass.
+
+    Runs whose models have the same shape are grouped: float LSTMs of a group
+    are packed into one PackedLSTMModel and evaluated in a single pass; other
+    architectures and int8 variants run one pass per model.
+
+    Items with steps > 1 are rolled out autoregressively; items of the same
+    run and variant share the rollout of the longest.
+
+    Items fail individually: a bad item gets an 'error' instead of a
+    'prediction' and the rest of the batch is still served.
+    """
+
+    def __init__(self, items:list[dict[str, Any]]):
+        self.items = items
+
+    async def predict(self) -> list[dict[str, Any]]:
+        results:list[dict[str, Any]] = [
+            {"gid_training_run": i.get("gid_training_run"), "artifact": i.get("artifact")} for i in self.items
+        ]
+
+        runs = {r.gid: r for r in await TrainingRun.find_by_ids(list({i["gid_training_run"] for i in self.items}))}
+        model_types = {gid: await ModelType.find_by_gid(gid) for gid in {r.gid_model_type for r in runs.values()}}
+
+        # Resolve each item's model from the ModelCache. Loads and the forward
+        # pass run on the inference pool, off the event loop.
+        executor = get_inference_executor()
+        predictors:dict[int, Predictor] = {}
+        for n, item in enumerate(self.items):
+            run = runs.get(item["gid_training_run"])
+            if not run:
+                results[n]["error"] = f"TrainingRun {item['gid_training_run']} not found"
+                continue
+            predictor = ModelFacade.predictor_for(model_types[run.gid_model_type], local=True)
+            if not isinstance(predictor, Predictor):
+                results[n]["error"] = f"TrainingRun {run.gid} is not a single-ticker run - use /predict/training_run"
+                continue
+            predictor.training_run = run
+            predictor.configure(ModelFacade.build_config(run.gid, {**item}, {**run.data}))
+            try:
+                await executor.call(predictor.load)
+            except (ValueError, FileNotFoundError) as e:
+                results[n]["error"] = str(e)
+                continue
+            results[n]["variant"] = predictor.variant
+            predictors[n] = predictor
+
+        # Every ticker's last bars in one query, over the union of the runs' features
+        tickers = {t.ticker: t for t in await Ticker.findByTickers(list({p.config.get("ticker") for p in predictors.values()}))}
+        columns = sorted({c for p in predictors.values() for c in p.features})
+        tails = await TickerTimeseries.tails(
+            [t.gid for t in tickers.values()],
+            columns,
+            max([p.seq_length for p in predictors.values()], default=0)
+        ) if predictors else {}
+
+        # One input per run and variant
+        inputs:dict[tuple[int, str], tuple[torch.nn.Module, torch.Tensor]] = {}
+        failed:dict[tuple[int, str], str] = {}
+        for predictor in predictors.values():
+            key = (predictor.training_run.gid, predictor.variant)
+            if key in inputs or key in failed:
+                continue
+            ticker = tickers.get(predictor.config.get("ticker"))
+            values = tails.get(ticker.gid) if ticker else None
+            if values is None:
+                failed[key] = f"No bars for {predictor.config.get('ticker')}"
+                continue
+            predictor.values = values[-predictor.seq_length:, [columns.index(c) for c in predictor.features]]
+            try:
+                inputs[key] = (predictor.model, await executor.call(predictor.__prep_sequence__))
+            except ValueError as e:
+                failed[key] = str(e)
+
+        # Items of a run and variant share one rollout of their longest horizon
+        rolls:dict[tuple[int, str], tuple[torch.nn.Module, torch.Tensor, int, list[int], bool]] = {}
+        for predictor in predictors.values():
+            key = (predictor.training_run.gid, predictor.variant)
+            if predictor.steps > 1 and key in inputs:
+                steps = max(predictor.steps, rolls[key][2] if key in rolls else 1)
+                rolls[key] = (*inputs[key], steps, predictor.feedback, predictor.spec.chronological)
+
+        outputs = await executor.call(BatchPredictor.forward, {k: v for k, v in inputs.items() if k not in rolls})
+        paths = await executor.call(BatchPredictor.rollouts, rolls)
+        for n, predictor in predictors.items():
+            key = (predictor.training_run.gid, predictor.variant)
+            if key in failed:
+                results[n]["error"] = failed[key]
+            elif key in paths:
+                path = paths[key][:predictor.steps]
+                results[n]["prediction"] = predictor.inverse_path(path) if predictor.steps > 1 else predictor.inverse(path[0])
+            else:
+                results[n]["prediction"] = predictor.inverse(outputs[key])
+        return results
+
+    @staticmethod
+    def rollouts(inputs:dict[Any, tuple[torch.nn.Module, torch.Tensor, int, list[int], bool]]) -> dict[Any, torch.Tensor]:
+        """
+        Rolls each (model, x, steps, feedback, chronological) out and returns
+        the (steps, outputs) path of the first window per key
+        """
+        return {
+            key: rollout(model, x, steps, feedback, chronological)[0]
+            for key, (model, x, steps, feedback, chronological) in inputs.items()
+        }
+
+    @staticmethod
+    def forward(inputs:dict[Any, tuple[torch.nn.Module, torch.Tensor]]) -> dict[Any, torch.Tensor]:
+        """
+        Runs each (model, x) and returns the first output row per key. Float
+        LSTMs with the same shape and window length run as one packed pass.
+        """
+        outputs:dict[Any, torch.Tensor] = {}
+        groups:dict[tuple, list[Any]] = {}
+        with torch.no_grad():
+            for key, (model, x) in inputs.items():
+                shape = BatchPredictor.packable(model, x)
+                if shape is None:
+                    outputs[key] = model(x)[0]
+                else:
+                    groups.setdefault(shape, []).append(key)
+
+            for keys in groups.values():
+                if len(keys) == 1:
+                    model, x = inputs[keys[0]]
+                    outputs[keys[0]] = model(x)[0]
+                    continue
+                packed = PackedLSTMModel.from_models([inputs[k][0] for k in keys]).eval()
+                out = packed(torch.stack([inputs[k][1] for k in keys]))
+                for i, k in enumerate(keys):
+                    outputs[k] = out[i, 0]
+        L.info(f"Batch forward: {len(inputs)} models, {len(groups)} packed groups")
+        return outputs
+
+    @staticmethod
+    def packable(model:torch.nn.Module, x:torch.Tensor) -> tuple | None:
+        """
+        The group a model packs into, or None if it can't be packed (not a
+        float LSTMModel, e.g. a GRU, TCN or int8 variant)
+        """
+        if type(model) is not LSTMModel or not isinstance(model.lstm, torch.nn.LSTM) or type(model.linear) is not torch.nn.Linear:
+            return None
+        return (model.lstm.input_size, model.lstm.hidden_size, model.lstm.num_layers, model.linear.out_features, tuple(x.shape))
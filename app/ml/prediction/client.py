@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import struct
+from typing import Any
+
+import torch
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.models.training_run import TrainingRun
+from app.ml.prediction.predictable import Predictable
+
+L = get_logger(__name__)
+
+# Frames are a 4-byte big-endian length followed by that many bytes of JSON
+HEADER = struct.Struct(">I")
+
+# Exceptions which mean the server isn't there, as opposed to a failed or slow
+# prediction. Only these fall back to predicting in-process.
+UNAVAILABLE = (FileNotFoundError, ConnectionRefusedError)
+
+class InferenceServerError(RuntimeError):
+    """
+    The inference server failed a request on its side - an internal error, a
+    timeout or a dropped connection - as opposed to a bad request, which
+    raises ValueError
+    """
+
+async def read_frame(reader:asyncio.StreamReader) -> Any:
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return json.loads(await reader.readexactly(size))
+
+async def write_frame(writer:asyncio.StreamWriter, message:Any) -> None:
+    body = json.dumps(message, default=str).encode()
+    writer.write(HEADER.pack(len(body)) + body)
+    await writer.drain()
+
+class InferenceClient:
+    """
+    Talks to the inference server (app/ml/prediction/server.py) over its Unix
+    socket. One connection per request. Bad requests come back as ValueError,
+    failures of the server itself as InferenceServerError, and a missing or
+    refusing socket raises one of UNAVAILABLE.
+    """
+
+    TIMEOUT_S = 30
+
+    def __init__(self, socket_path:str):
+        self.socket_path = socket_path
+
+    @staticmethod
+    def configured() -> "InferenceClient | None":
+        """
+        A client for the INFERENCE_SOCKET server, or None if none is set up
+        """
+        path = get_config().inference_socket
+        if not path or not os.path.exists(path):
+            return None
+        return InferenceClient(path)
+
+    async def request(self, message:dict[str, Any]) -> dict[str, Any]:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(self.socket_path), self.TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise InferenceServerError(f"Inference server did not accept a connection within {self.TIMEOUT_S}s")
+        try:
+            await write_frame(writer, message)
+            response = await asyncio.wait_for(read_frame(reader), self.TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise InferenceServerError(f"Inference server did not answer within {self.TIMEOUT_S}s")
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise InferenceServerError(f"Inference server dropped the connection: {e!r}")
+        finally:
+            writer.close()
+        if "error" in response:
+            if response.get("kind") == "server":
+                raise InferenceServerError(response["error"])
+            raise ValueError(response["error"])
+        return response
+
+    async def predict(self, gid_training_run:int, config:dict[str, Any]) -> dict[str, Any]:
+        return await self.request({"op": "predict", "gid_training_run": gid_training_run, "config": config})
+
+    async def batch(self, items:list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return (await self.request({"op": "batch", "items": items}))["predictions"]
+
+    async def stats(self) -> dict[str, Any]:
+        return await self.request({"op": "stats"})
+
+class RemotePredictor(Predictable):
+    """
+    Stand-in for a model's predictor that runs it on the inference server,
+    which owns the host's model cache. The wrapped local predictor shares its
+    run and config, and runs in-process instead if the server isn't there
+    (UNAVAILABLE). Failed or timed out predictions are not retried locally.
+    """
+
+    def __init__(self, client:InferenceClient, local:Predictable):
+        self.client = client
+        self.local = local
+
+    @property
+    def training_run(self) -> TrainingRun:
+        return self.local.training_run
+
+    @training_run.setter
+    def training_run(self, training_run:TrainingRun) -> None:
+        self.local.training_run = training_run
+
+    def configure(self, config:dict) -> None:
+        super().configure(config)
+        self.local.configure(config)
+
+    async def predict(self):
+        try:
+            response = await self.client.predict(self.training_run.gid, self.config)
+        except UNAVAILABLE as e:
+            L.warning(f"Inference server unavailable ({e!r}) - predicting in-process")
+            result = await self.local.predict()
+            self.config = self.local.config
+            return result
+        self.config = response["config"]
+        return response["prediction"]
+
+    def __load_model__(self) -> torch.nn.Module:
+        return self.local.__load_model__()
+
+    def __prep_sequence__(self) -> torch.Tensor:
+        return self.local.__prep_sequence__()
+
+    def __predict_next__(self) -> float:
+        return self.local.__predict_next__()
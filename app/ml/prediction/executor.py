@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+import torch
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+
+L = get_logger(__name__)
+
+class _Pending:
+    """
+    Requests for one model waiting to be flushed as a batch
+    """
+
+    def __init__(self, model:torch.nn.Module):
+        self.model = model
+        self.inputs:list[tuple[torch.Tensor, ...]] = []
+        self.futures:list[asyncio.Future] = []
+        self.timer:asyncio.TimerHandle = None
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound inference off the event loop on a bounded thread pool.
+
+    submit() queues a forward pass for a model. Requests for the same model
+    key arriving within window_ms of the first are concatenated along the
+    batch dimension and run as one pass (flushed early at max_batch), and
+    each caller's future gets its own rows back. call() runs any other
+    blocking step - artifact loads, scaling - on the same pool.
+
+    Torch releases the GIL inside its kernels, so forward passes on the
+    pool run in parallel with each other and with the event loop.
+    """
+
+    def __init__(self, threads:int=2, window_ms:float=2.0, max_batch:int=64):
+        self.window_s = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="inference")
+        self.threads = max(1, threads)
+        self.pending:dict[Hashable, _Pending] = {}
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def submit(self, key:Hashable, model:torch.nn.Module, *inputs:torch.Tensor) -> torch.Tensor:
+        """
+        The model's output for inputs (each with a leading batch dimension),
+        computed in a batch with other requests for the same key
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self.pending.get(key)
+        if pending is None:
+            pending = _Pending(model)
+            self.pending[key] = pending
+            pending.timer = loop.call_later(self.window_s, self._flush, key)
+        pending.inputs.append(inputs)
+        pending.futures.append(future)
+        self.requests += 1
+        if len(pending.inputs) >= self.max_batch:
+            pending.timer.cancel()
+            self._flush(key)
+        return await future
+
+    async def call(self, fn:Callable[..., Any], *args:Any) -> Any:
+        """
+        Runs a blocking function on the inference pool
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "window_ms": self.window_s * 1000,
+            "max_batch": self.max_batch,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": round(self.requests / self.batches, 2) if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "queued": sum(len(p.inputs) for p in self.pending.values())
+        }
+
+    def _flush(self, key:Hashable) -> None:
+        pending = self.pending.pop(key, None)
+        if pending is None:
+            return
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(pending.inputs))
+        sizes = [len(i[0]) for i in pending.inputs]
+        batch = [torch.cat(parts) for parts in zip(*pending.inputs)]
+        task = asyncio.get_running_loop().run_in_executor(self.pool, InferenceExecutor.forward, pending.model, batch)
+        task.add_done_callback(lambda t: InferenceExecutor._resolve(t, pending.futures, sizes))
+
+    @staticmethod
+    def forward(model:torch.nn.Module, batch:list[torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            return model(*batch)
+
+    @staticmethod
+    def _resolve(task:asyncio.Future, futures:list[asyncio.Future], sizes:list[int]) -> None:
+        """
+        Hands each caller its rows of the batch output, or the batch's error
+        """
+        error = task.exception()
+        if error is not None:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, rows in zip(futures, torch.split(task.result(), sizes)):
+            if not future.done():
+                future.set_result(rows)
+
+_inference_executor:InferenceExecutor = None
+_inference_executor_lock = threading.Lock()
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    The process's InferenceExecutor, sized by the INFERENCE_THREADS,
+    INFERENCE_WINDOW_MS and INFERENCE_MAX_BATCH env vars
+    """
+    global _inference_executor
+    with _inference_executor_lock:
+        if _inference_executor is None:
+            config = get_config()
+            _inference_executor = InferenceExecutor(
+                threads=config.inference_threads,
+                window_ms=config.inference_window_ms,
+                max_batch=config.inference_max_batch
+            )
+        return _inference_executor
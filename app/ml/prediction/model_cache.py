@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import torch
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+
+L = get_logger(__name__)
+
+class CachedModel:
+    """
+    What a predictor needs from a run's artifacts: the model in eval mode, its
+    scaler (or scalers) and the config the model was built from
+    """
+
+    def __init__(self, model:torch.nn.Module, scaler:Any, config:dict[str, Any]):
+        self.model = model.eval()
+        self.scaler = scaler
+        self.config = config
+        self.paths:list[str] = []
+        self.mtimes:list[float] = []
+        self.nbytes = 0
+
+class ModelCache:
+    """
+    Process-wide LRU of loaded models, keyed by (gid_training_run, variant).
+
+    The bound is the total size of the cached artifact files (weights and
+    scaler pickles), which tracks the memory their tensors take. An entry is
+    reloaded if any of its files changed on disk since it was cached, e.g. a
+    variant re-exported under the same name.
+    """
+
+    def __init__(self, max_mb:float):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.entries:OrderedDict[Hashable, CachedModel] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key:Hashable, paths:list[str], loader:Callable[[], CachedModel]) -> CachedModel:
+        """
+        The cached entry for key, or loader()'s result, cached if it fits.
+        paths are the artifact files the entry is loaded from.
+        """
+        mtimes = [os.path.getmtime(p) for p in paths]
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.mtimes == mtimes:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry is not None:
+                self._remove(key)
+
+        # Loaded outside the lock so a cold load doesn't stall hits on other runs
+        entry = loader()
+        entry.paths = paths
+        entry.mtimes = mtimes
+        entry.nbytes = sum(os.path.getsize(p) for p in paths)
+        if entry.nbytes > self.max_bytes:
+            L.warning(f"Model {key} ({entry.nbytes} bytes) is larger than the cache ({self.max_bytes} bytes) - not cached")
+            return entry
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes:
+                evicted, _ = next(iter(self.entries.items()))
+                self._remove(evicted)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, gid_training_run:int) -> None:
+        """
+        Drops every cached variant of a run
+        """
+        with self._lock:
+            for key in [k for k in self.entries if k[0] == gid_training_run]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None
+            }
+
+    def _remove(self, key:Hashable) -> None:
+        self.nbytes -= self.entries.pop(key).nbytes
+
+_model_cache:ModelCache = None
+_model_cache_lock = threading.Lock()
+
+def get_model_cache() -> ModelCache:
+    """
+    The process's ModelCache, sized by the MODEL_CACHE_MB env var
+    """
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache(get_config().model_cache_mb)
+        return _model_cache
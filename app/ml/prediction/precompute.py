@@ -0,0 +1,173 @@
+import asyncio
+from datetime import date as _date, datetime
+from typing import Any
+
+from app.batch.job import Job
+from app.batch.models.job_unit import JobUnit
+from app.core.utils.logger import get_logger
+from app.ml.core.models.prediction import Prediction
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.model_defs.model_facade import ModelFacade
+from app.ml.prediction.batch import BatchPredictor
+from app.ml.prediction.ts_shared import SharedPredictor
+
+L = get_logger(__name__)
+
+class Precomputer(Job):
+    """
+    Predicts the next bar of every target of every COMPLETE run from the
+    latest bars and writes the results to the prediction table, which
+    GET /predict/precomputed serves. Meant to run after the daily seed, e.g.
+    as SeedDailyAgg's next_job.
+
+    Single-ticker runs are fanned out in chunks; each chunk is one
+    BatchPredictor batch, so runs with the same model shape share a packed
+    forward pass. Shared (multi-ticker) runs get one row per ticker they were
+    trained on; BatchPredictor only takes single-ticker runs, so each ticker
+    is one SharedPredictor pass over all of the run's targets. Like the
+    batches, this runs in the job's process, not on the inference server. Rows are keyed by the date
+    of the last bar used (as_of), so a rerun over the same bars replaces them
+    and the table keeps one prediction per bar for accuracy tracking.
+
+    Config:
+        gid_training_runs - runs to predict (default every COMPLETE run)
+        tickers - only these tickers, and runs trained on them (default all)
+        chunk_size - single-ticker runs per batch (default 200)
+    """
+
+    DISPLAY_NAME = "Precompute Predictions"
+
+    def run(self, unit:JobUnit) -> None:
+        super().run(unit)
+        asyncio.run(self._run(unit))
+
+    async def _run(self, unit:JobUnit) -> None:
+        runs = await Precomputer.runs(self.config)
+        single = [r for r in runs if r.data.get("ticker")]
+        shared = [r for r in runs if not r.data.get("ticker")]
+        chunk_size = self.config.get("chunk_size") or 200
+        unit.log(f"Precomputing predictions for {len(single)} single-ticker and {len(shared)} shared runs")
+
+        for i in range(0, len(single), chunk_size):
+            chunk = single[i:i + chunk_size]
+            results = await BatchPredictor(Precomputer.items(chunk)).predict()
+            await self._write(unit, chunk, results)
+            L.info(f"Precomputed runs {i + 1}-{i + len(chunk)} of {len(single)}")
+
+        for run in shared:
+            results = await Precomputer.predict_shared(run, Precomputer.tickers(run, self.config))
+            await self._write(unit, [run], results)
+            L.info(f"Precomputed shared TrainingRun {run.gid}")
+        unit.log("Job completed")
+
+    async def _write(self, unit:JobUnit, runs:list[TrainingRun], results:list[dict[str, Any]]) -> None:
+        symbols = {r.get("ticker") for r in results} | {r.data.get("ticker") for r in runs}
+        tickers = {t.ticker: t for t in await Ticker.findByTickers([s for s in symbols if s])}
+        as_of = await TickerTimeseries.last_dates([t.gid for t in tickers.values()])
+        predictions, errors = Precomputer.rows(runs, results, tickers, as_of, unit.gid, Job.now())
+        written = await Prediction.replace(predictions)
+
+        unit.accumulate("Predictions written", written)
+        unit.accumulate("Predictions failed", len(errors))
+        for error in errors:
+            unit.log(error)
+
+    @staticmethod
+    async def runs(config:dict[str, Any]) -> list[TrainingRun]:
+        """
+        The COMPLETE runs selected by the config which have a ticker to predict
+        """
+        if config.get("gid_training_runs"):
+            runs = await TrainingRun.find_by_ids(config["gid_training_runs"])
+        else:
+            runs = await TrainingRun.find_by_status(RunStatus.COMPLETE)
+        return [r for r in runs if r.status == RunStatus.COMPLETE and Precomputer.tickers(r, config)]
+
+    @staticmethod
+    def tickers(run:TrainingRun, config:dict[str, Any]) -> list[str]:
+        """
+        The tickers to predict a run on: its ticker, or every ticker a shared
+        run (one with 'n_tickers', set by SharedTrainer) was trained on,
+        narrowed to the config's tickers. Model pack runs also list 'tickers'
+        but have no model of their own; their child runs are single-ticker.
+        """
+        tickers = set(config.get("tickers") or [])
+        if run.data.get("ticker"):
+            trained = [run.data["ticker"]]
+        elif run.data.get("n_tickers"):
+            trained = run.data.get("tickers") or []
+        else:
+            trained = []
+        return [t for t in trained if not tickers or t in tickers]
+
+    @staticmethod
+    async def predict_shared(run:TrainingRun, tickers:list[str]) -> list[dict[str, Any]]:
+        """
+        Results in BatchPredictor's shape, plus "ticker", for every target of
+        a shared run on each of the tickers. Each ticker is one forward pass
+        over all the targets, and a ticker that fails only fails its own items.
+        """
+        t_cols = WindowSpec.trained(run.data).t_cols
+        results = []
+        for ticker in tickers:
+            item = {"gid_training_run": run.gid, "ticker": ticker}
+            predictor = SharedPredictor()
+            predictor.training_run = run
+            predictor.configure(ModelFacade.build_config(run.gid, {"ticker": ticker}, {**run.data}))
+            try:
+                values = await predictor.predict_targets()
+            except (ValueError, FileNotFoundError) as e:
+                results.extend({**item, "artifact": artifact, "error": str(e)} for artifact in t_cols)
+                continue
+            results.extend({**item, "artifact": artifact, "prediction": values[artifact]} for artifact in t_cols)
+        return results
+
+    @staticmethod
+    def items(runs:list[TrainingRun]) -> list[dict[str, Any]]:
+        """
+        One BatchPredictor item per target of each run
+        """
+        return [
+            {"gid_training_run": r.gid, "artifact": artifact}
+            for r in runs
+            for artifact in WindowSpec.trained(r.data).t_cols
+        ]
+
+    @staticmethod
+    def rows(
+        runs:list[TrainingRun],
+        results:list[dict[str, Any]],
+        tickers:dict[str, Ticker],
+        as_of:dict[int, _date],
+        gid_job_unit:int,
+        created:datetime
+    ) -> tuple[list[Prediction], list[str]]:
+        """
+        Prediction rows for the successful results, and a message per failed one.
+        A result's ticker is its "ticker", or else its run's.
+        """
+        by_gid = {r.gid: r for r in runs}
+        predictions:list[Prediction] = []
+        errors:list[str] = []
+        for result in results:
+            gid = result["gid_training_run"]
+            # Shared runs' results carry the ticker
+            symbol = result.get("ticker") or by_gid[gid].data.get("ticker")
+            ticker = tickers.get(symbol)
+            if "error" in result or not ticker or ticker.gid not in as_of:
+                errors.append(f"TrainingRun {gid} {symbol} '{result['artifact']}': {result.get('error') or 'no bars'}")
+                continue
+            predictions.append(Prediction(
+                gid_training_run=gid,
+                gid_ticker=ticker.gid,
+                as_of=as_of[ticker.gid],
+                artifact=result["artifact"],
+                value=float(result["prediction"]),
+                variant=result.get("variant"),
+                gid_job_unit=gid_job_unit,
+                created=created
+            ))
+        return predictions, errors
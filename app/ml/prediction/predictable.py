@@ -5,9 +5,21 @@ from app.ml.core.models.training_run import TrainingRun
 
 class Predictable(ABC):
     training_run:TrainingRun
+    # Longest multi-step rollout a request may ask for
+    MAX_STEPS = 250
 
     def configure(self, config:dict) -> None:
         self.config = {k: v for k, v in config.items() if v is not None}
+
+    def rollout_steps(self) -> int:
+        """
+        Bars to predict, from the config's 'steps' (default 1, the next bar)
+        """
+        steps = int(self.config.get("steps") or 1)
+        if not 1 <= steps <= Predictable.MAX_STEPS:
+            raise ValueError(f"steps must be between 1 and {Predictable.MAX_STEPS}, got {steps}")
+        return steps
+
     def predict(self) -> float: ...
     
     @abstractmethod
@@ -0,0 +1,166 @@
+import json
+from typing import Any, Iterable
+
+from redis import Redis
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+
+L = get_logger(__name__)
+
+class PredictionCache:
+    """
+    Redis cache of /predict/training_run responses.
+
+    A prediction only changes when the ticker's bars do, so responses are
+    keyed by (gid_training_run, ticker, variant, artifact, seq_len, steps,
+    bars generation). The generation is a per-ticker counter which seeders bump
+    after they write bars, so every cached prediction of that ticker stops
+    matching at once, including after backfills that don't move the last bar
+    date. Stale entries expire with the TTL.
+
+    A run's default ticker, serving variant and seq_len are cached alongside,
+    so a hit needs no DB read. Jobs which change a run's variants drop its
+    entries with forget_run().
+
+    If Redis is unavailable the cache is disabled and every lookup misses.
+    """
+
+    PREFIX = "pred"
+
+    def __init__(self, redis:Redis, ttl_s:int=3600):
+        self.redis = redis
+        self.ttl_s = ttl_s
+        self.enabled = True
+
+    @staticmethod
+    def connect(ttl_s:int=3600) -> "PredictionCache":
+        config = get_config()
+        cache = PredictionCache(
+            Redis(
+                host="redis",
+                port=int(config.redis_port),
+                db=2, # db=0 is for RQ, db=1 for rate limiting
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            ),
+            ttl_s=ttl_s
+        )
+        try:
+            cache.redis.ping()
+        except Exception as e:
+            L.warning(f"Prediction cache disabled - Redis connection failed: {e}")
+            cache.enabled = False
+        return cache
+
+    @staticmethod
+    def run_key(gid_training_run:int) -> str:
+        return f"{PredictionCache.PREFIX}:run:{gid_training_run}"
+
+    @staticmethod
+    def generation_key(ticker:str) -> str:
+        return f"{PredictionCache.PREFIX}:gen:{ticker}"
+
+    @staticmethod
+    def key(gid_training_run:int, ticker:str, variant:str, artifact:str, seq_len:int, steps:int, generation:int) -> str:
+        return f"{PredictionCache.PREFIX}:{gid_training_run}:{ticker}:{variant or '-'}:{artifact}:{seq_len}:{steps}:g{generation}"
+
+    def get(self, gid_training_run:int, artifact:str, ticker:str=None, variant:str=None, steps:int=1) -> dict[str, Any] | None:
+        """
+        The cached response for a request, or None
+        """
+        if not self.enabled:
+            return None
+        try:
+            run = self.redis.get(PredictionCache.run_key(gid_training_run))
+            if run is None:
+                return None
+            run = json.loads(run)
+            ticker = ticker or run["ticker"]
+            generation = int(self.redis.get(PredictionCache.generation_key(ticker)) or 0)
+            cached = self.redis.get(PredictionCache.key(gid_training_run, ticker, variant or run["variant"], artifact, run["seq_len"], steps, generation))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            L.warning(f"Prediction cache read failed: {e}")
+            return None
+
+    def generation(self, ticker:str) -> int:
+        """
+        The ticker's current bars generation. Read it before predicting, so a
+        prediction made while bars are being written is stored under the old one.
+        """
+        if not self.enabled:
+            return 0
+        try:
+            return int(self.redis.get(PredictionCache.generation_key(ticker)) or 0)
+        except Exception as e:
+            L.warning(f"Prediction cache read failed: {e}")
+            return 0
+
+    def put(
+        self,
+        gid_training_run:int,
+        run:dict[str, Any],
+        ticker:str,
+        variant:str,
+        artifact:str,
+        steps:int,
+        generation:int,
+        response:dict[str, Any]
+    ) -> None:
+        """
+        Stores a response. 'run' is the run's default ticker, serving variant
+        and seq_len: {"ticker", "variant", "seq_len"}
+        """
+        if not self.enabled:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            pipe.set(PredictionCache.run_key(gid_training_run), json.dumps(run), ex=self.ttl_s)
+            pipe.set(
+                PredictionCache.key(gid_training_run, ticker, variant or run["variant"], artifact, run["seq_len"], steps, generation),
+                json.dumps(response, default=str),
+                ex=self.ttl_s
+            )
+            pipe.execute()
+        except Exception as e:
+            L.warning(f"Prediction cache write failed: {e}")
+
+    def invalidate(self, tickers:Iterable[str]) -> None:
+        """
+        Bumps the bars generation of each ticker. Call after the bars are committed.
+        """
+        if not self.enabled:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            for ticker in set(tickers):
+                pipe.incr(PredictionCache.generation_key(ticker))
+            pipe.execute()
+        except Exception as e:
+            L.warning(f"Prediction cache invalidation failed: {e}")
+
+    def forget_run(self, gid_training_run:int) -> None:
+        """
+        Drops a run's cached serving info and predictions, e.g. after a
+        variant was (re)exported or its serving variant changed
+        """
+        if not self.enabled:
+            return
+        try:
+            keys = [PredictionCache.run_key(gid_training_run), *self.redis.scan_iter(f"{PredictionCache.PREFIX}:{gid_training_run}:*")]
+            self.redis.delete(*keys)
+        except Exception as e:
+            L.warning(f"Prediction cache invalidation failed: {e}")
+
+_prediction_cache:PredictionCache = None
+
+def get_prediction_cache() -> PredictionCache:
+    """
+    The process's PredictionCache, with entries kept for PREDICTION_CACHE_TTL_S
+    """
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache.connect(get_config().prediction_cache_ttl_s)
+    return _prediction_cache
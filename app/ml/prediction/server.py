@@ -0,0 +1,102 @@
+"""
+Standalone inference server. One process per host owns the model cache and
+inference executor and serves every API worker over a Unix socket, so weights
+are loaded once per host rather than once per worker.
+
+    python -m app.ml.prediction.server
+
+listens on INFERENCE_SOCKET. API workers find it through
+ModelFacade.predictor_for and fall back to predicting in-process when the
+socket isn't there.
+"""
+import asyncio
+import os
+from typing import Any
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.models.model_type import ModelType
+from app.ml.core.models.training_run import TrainingRun
+from app.ml.model_defs.model_facade import ModelFacade
+from app.ml.prediction.batch import BatchPredictor
+from app.ml.prediction.client import read_frame, write_frame
+from app.ml.prediction.executor import get_inference_executor
+from app.ml.prediction.model_cache import get_model_cache
+
+L = get_logger(__name__)
+
+class InferenceServer:
+    """
+    Answers framed JSON requests (see client.py) from API workers:
+        {"op": "predict", "gid_training_run", "config"} -> {"prediction", "config"}
+        {"op": "batch", "items"} -> {"predictions"}
+        {"op": "stats"} -> {"cache", "executor"}
+    Failures come back as {"error", "kind"}: kind "request" for bad requests
+    (the client raises ValueError) and "server" for anything else
+    (InferenceServerError). A connection may send several requests.
+    """
+
+    def __init__(self, socket_path:str):
+        self.socket_path = socket_path
+
+    async def serve(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        L.info(f"Inference server listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def _handle(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                await write_frame(writer, await self.dispatch(request))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request:dict[str, Any]) -> dict[str, Any]:
+        op = request.get("op")
+        try:
+            if op == "predict":
+                return await self.predict(request["gid_training_run"], request.get("config") or {})
+            if op == "batch":
+                return {"predictions": await BatchPredictor(request.get("items") or []).predict()}
+            if op == "stats":
+                return {"cache": get_model_cache().stats(), "executor": get_inference_executor().stats()}
+            return {"error": f"Unknown op '{op}'", "kind": "request"}
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            return {"error": str(e), "kind": "request"}
+        except Exception as e:
+            L.error(f"Inference request failed: {e}", exc_info=True)
+            return {"error": f"Inference server error: {e}", "kind": "server"}
+
+    async def predict(self, gid_training_run:int, config:dict[str, Any]) -> dict[str, Any]:
+        training_run = await TrainingRun.find_by_id(gid_training_run)
+        if not training_run:
+            raise ValueError(f"TrainingRun {gid_training_run} not found")
+        model = await ModelType.find_by_gid(training_run.gid_model_type)
+        predictor = ModelFacade.predictor_for(model, local=True)
+        predictor.training_run = training_run
+        predictor.configure(config)
+        prediction = await predictor.predict()
+        return {"prediction": prediction, "config": predictor.config}
+
+def main() -> None:
+    socket_path = get_config().inference_socket
+    if not socket_path:
+        raise ValueError("INFERENCE_SOCKET is not set")
+    asyncio.run(InferenceServer(socket_path).serve())
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,16 @@
 
 import joblib
 import numpy as np
-import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import torch
 from app.core.config.config import get_config
 from app.core.utils.logger import get_logger
+from app.ml.core.utils.windowing import WindowSpec
 from app.ml.data.models.ticker import Ticker
 from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
-from app.ml.model_defs.lstm import LSTMModel
+from app.ml.model_defs.architectures import build_model, quantize, rollout
+from app.ml.prediction.executor import get_inference_executor
+from app.ml.prediction.model_cache import CachedModel, get_model_cache
 from app.ml.prediction.predictable import Predictable
 
 
@@ -19,51 +21,100 @@ class Predictor(Predictable):
     NAME = "TimeSeriesLSTM"
 
     async def predict(self):
+        # Artifact loads, scaling and the forward pass run on the inference
+        # pool, never on the event loop
+        executor = get_inference_executor()
+        await executor.call(self.load)
+        self.ticker = await Ticker.findByTicker(self.config.get("ticker"))
+        self.values = await TickerTimeseries.tail(self.ticker.gid, self.features, self.seq_length)
+
+        self.input_tensor = await executor.call(self.__prep_sequence__)
+        if self.steps > 1:
+            path = await executor.call(rollout, self.model, self.input_tensor, self.steps, self.feedback, self.spec.chronological)
+            return await executor.call(self.inverse_path, path[0])
+        scaled_prediction = await executor.submit((self.training_run.gid, self.variant), self.model, self.input_tensor)
+        return await executor.call(self.inverse, scaled_prediction[0])
+
+    def load(self) -> None:
+        """
+        Resolves the run's window, target and serving variant from the config
+        and takes the model and scaler from the ModelCache. No DB access.
+        """
         gid = self.training_run.gid
         config = self.config
 
-        self.ticker = await Ticker.findByTicker(config.get("ticker"))
-        self.features:list[str] = config.get("f_cols")
-        self.seq_length = config.get("seq_len")
+        if config.get("ticker") != self.training_run.data.get("ticker"):
+            raise ValueError(f"Run {gid} was trained on {self.training_run.data.get('ticker')}, not {config.get('ticker')}")
+        self.spec = WindowSpec.trained(config)
+        self.features:list[str] = self.spec.f_cols
+        self.seq_length = self.spec.seq_len
         self.artifact = config.get("artifact")
+        if config.get("seq_len") not in (None, self.seq_length):
+            L.warning(f"Requested seq_len {config.get('seq_len')} ignored - run {gid} was trained on {self.seq_length}")
+        self.config["seq_len"] = self.seq_length
+        if self.artifact not in self.spec.t_cols:
+            raise ValueError(f"Artifact '{self.artifact}' is not a target of run {gid}: {self.spec.t_cols}")
+        # Bars to roll out; more than one needs a spec whose outputs can be fed back
+        self.steps = self.rollout_steps()
+        self.feedback = self.spec.feedback() if self.steps > 1 else None
         self.num_layers = config.get("num_layers")
         self.hidden_size = config.get("hidden_size")
 
         self.dict_path = f"{get_config().mdl_dir}/{gid}.pth"
-        self.scaler:MinMaxScaler = joblib.load(f"{get_config().obj_dir}/{gid}_scaler.pkl")
+        self.model_config = config
+        self.quantized = False
+        # A serving variant registered on the run (a distilled student, an
+        # int8 export), requested explicitly or opted in by the run
+        self.variant = config.get("variant") or config.get("serve_variant")
+        if self.variant:
+            variant = (config.get("variants") or {}).get(self.variant)
+            if not variant:
+                raise ValueError(f"Run {gid} has no '{self.variant}' variant: {list((config.get('variants') or {}).keys())}")
+            self.dict_path = f"{get_config().mdl_dir}/{variant['file']}"
+            self.model_config = {**config, **variant.get("config", {})}
+            self.quantized = variant.get("quantized", False)
+        self.scaler_path = f"{get_config().obj_dir}/{gid}_scaler.pkl"
         self.input_size = len(self.features)
 
-        self.data = await TickerTimeseries.findByTicker(self.ticker)
-        self.df = pd.DataFrame([r.__dict__ for r in self.data])
-
-        self.model = self.__load_model__()
-        self.input_tensor = self.__prep_sequence__()
-        scaled_prediction = self.__predict_next__()
+        cached = get_model_cache().get_or_load((gid, self.variant), [self.dict_path, self.scaler_path], self.__load_cached__)
+        self.model = cached.model
+        self.scaler:MinMaxScaler = cached.scaler
 
+    def inverse(self, scaled:torch.Tensor) -> float:
+        """
+        The requested artifact's value from one scaled output row
+        """
         dummy = np.zeros((1, len(self.features)))
         artifact_index = self.features.index(self.artifact)
-        dummy[0][artifact_index] = scaled_prediction[0][artifact_index].item()
+        dummy[0][artifact_index] = scaled[self.spec.t_cols.index(self.artifact)].item()
         return self.scaler.inverse_transform(dummy)[0][artifact_index]
 
+    def inverse_path(self, scaled:torch.Tensor) -> list[float]:
+        """
+        The requested artifact's value at each step of a rolled out path
+        """
+        return [self.inverse(row) for row in scaled]
+
     def __predict_next__(self):
         with torch.no_grad():
             output:torch.Tensor = self.model(self.input_tensor)
             return output
 
     def __prep_sequence__(self):
-        self.df = self.df.sort_values(by="date", ascending=False)
-        values = self.df[self.features].values
-        scaled = self.scaler.transform(values)
-        seq = scaled[:self.seq_length]
+        scaled = self.scaler.transform(self.spec.order(self.values))
+        seq = self.spec.latest(scaled)
         return torch.tensor(seq, dtype=torch.float32).unsqueeze(0)
 
+    def __load_cached__(self) -> CachedModel:
+        return CachedModel(self.__load_model__(), joblib.load(self.scaler_path), self.model_config)
+
     def __load_model__(self):
-        model = LSTMModel(
-            input_size=self.input_size, 
-            hidden_size=self.hidden_size, 
-            num_layers=self.num_layers, 
-            output_size=self.input_size
-        )
-        model.load_state_dict(torch.load(self.dict_path))
+        model = build_model(self.model_config, self.input_size, self.spec.n_targets)
+        if self.quantized:
+            # Packed int8 weights are not plain tensors, so the full unpickler is needed
+            model = quantize(model)
+            model.load_state_dict(torch.load(self.dict_path, map_location="cpu", weights_only=False))
+        else:
+            model.load_state_dict(torch.load(self.dict_path))
         model.eval()
         return model
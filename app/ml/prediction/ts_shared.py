@@ -0,0 +1,136 @@
+import joblib
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+import torch
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.model_defs.architectures import rollout
+from app.ml.model_defs.lstm import SharedLSTMModel
+from app.ml.prediction.executor import get_inference_executor
+from app.ml.prediction.model_cache import CachedModel, get_model_cache
+from app.ml.prediction.predictable import Predictable
+
+
+L = get_logger(__name__)
+
+class SharedPredictor(Predictable):
+    """
+    Predicts for any ticker a shared run was trained on. The request's
+    'ticker' picks the ticker's scaler and embedding.
+    """
+
+    NAME = "TimeSeriesSharedLSTM"
+
+    async def predict(self):
+        gid = self.training_run.gid
+        self.spec = WindowSpec.trained(self.config)
+        self.artifact = self.config.get("artifact")
+        if self.artifact not in self.spec.t_cols:
+            raise ValueError(f"Artifact '{self.artifact}' is not a target of run {gid}: {self.spec.t_cols}")
+        steps = self.rollout_steps()
+        feedback = self.spec.feedback() if steps > 1 else None
+
+        executor = get_inference_executor()
+        await self.prepare()
+        if steps > 1:
+            path = await executor.call(rollout, self.model, self.input_tensor, steps, feedback, self.spec.chronological, (torch.tensor([self.ticker_idx]),))
+            return await executor.call(self.inverse_path, path[0])
+        scaled_prediction = await executor.submit((gid, None), self.model, self.input_tensor, torch.tensor([self.ticker_idx]))
+        return await executor.call(self.inverse, scaled_prediction[0])
+
+    async def predict_targets(self) -> dict[str, float]:
+        """
+        The next bar of every target of the run for the ticker, from one
+        forward pass. 'artifact' and 'steps' are not used.
+        """
+        executor = get_inference_executor()
+        await self.prepare()
+        scaled_prediction = await executor.submit((self.training_run.gid, None), self.model, self.input_tensor, torch.tensor([self.ticker_idx]))
+        return await executor.call(self.inverse_targets, scaled_prediction[0])
+
+    async def prepare(self) -> None:
+        """
+        Takes the run's model and the ticker's scaler from the ModelCache and
+        builds the input window from the ticker's latest bars
+        """
+        gid = self.training_run.gid
+        config = self.config
+
+        self.spec = WindowSpec.trained(config)
+        self.features:list[str] = self.spec.f_cols
+        self.seq_length = self.spec.seq_len
+        if config.get("seq_len") not in (None, self.seq_length):
+            L.warning(f"Requested seq_len {config.get('seq_len')} ignored - run {gid} was trained on {self.seq_length}")
+        self.config["seq_len"] = self.seq_length
+
+        self.dict_path = f"{get_config().mdl_dir}/{gid}.pth"
+        self.scaler_path = f"{get_config().obj_dir}/{gid}_scaler.pkl"
+        # Artifact loads, scaling and the forward pass run on the inference
+        # pool, never on the event loop. Requests for different tickers of
+        # the run are batched into one pass.
+        executor = get_inference_executor()
+        cached = await executor.call(get_model_cache().get_or_load, (gid, None), [self.dict_path, self.scaler_path], self.__load_cached__)
+        self.model = cached.model
+        scalers:dict[str, MinMaxScaler] = cached.scaler
+        symbol = config.get("ticker")
+        if symbol not in scalers:
+            raise ValueError(f"Ticker '{symbol}' is not part of shared run {gid}")
+        self.scaler = scalers[symbol]
+        self.ticker_idx = list(scalers.keys()).index(symbol)
+        self.n_tickers = len(scalers)
+
+        self.ticker = await Ticker.findByTicker(symbol)
+        self.values = await TickerTimeseries.tail(self.ticker.gid, self.features, self.seq_length)
+        self.input_tensor = await executor.call(self.__prep_sequence__)
+
+    def inverse(self, scaled:torch.Tensor, artifact:str=None) -> float:
+        """
+        An artifact's value (default the requested one) from one scaled output row
+        """
+        artifact = artifact or self.artifact
+        dummy = np.zeros((1, len(self.features)))
+        artifact_index = self.features.index(artifact)
+        dummy[0][artifact_index] = scaled[self.spec.t_cols.index(artifact)].item()
+        return self.scaler.inverse_transform(dummy)[0][artifact_index]
+
+    def inverse_targets(self, scaled:torch.Tensor) -> dict[str, float]:
+        """
+        Every target's value from one scaled output row
+        """
+        return {artifact: self.inverse(scaled, artifact) for artifact in self.spec.t_cols}
+
+    def inverse_path(self, scaled:torch.Tensor) -> list[float]:
+        """
+        The requested artifact's value at each step of a rolled out path
+        """
+        return [self.inverse(row) for row in scaled]
+
+    def __predict_next__(self):
+        with torch.no_grad():
+            output:torch.Tensor = self.model(self.input_tensor, torch.tensor([self.ticker_idx]))
+            return output
+
+    def __prep_sequence__(self):
+        scaled = self.scaler.transform(self.spec.order(self.values))
+        seq = self.spec.latest(scaled)
+        return torch.tensor(seq, dtype=torch.float32).unsqueeze(0)
+
+    def __load_cached__(self) -> CachedModel:
+        scalers:dict[str, MinMaxScaler] = joblib.load(self.scaler_path)
+        return CachedModel(self.__load_model__(len(scalers)), scalers, self.config)
+
+    def __load_model__(self, n_tickers:int):
+        model = SharedLSTMModel(
+            n_tickers=n_tickers,
+            embedding_dim=self.config.get("embedding_dim") or 8,
+            input_size=len(self.features),
+            hidden_size=self.config.get("hidden_size"),
+            num_layers=self.config.get("num_layers"),
+            output_size=self.spec.n_targets
+        )
+        model.load_state_dict(torch.load(self.dict_path))
+        model.eval()
+        return model
@@ -0,0 +1,143 @@
+import copy
+import time
+from typing import Any
+
+import torch
+from torch.utils.data import Dataset
+
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.training.profiling import TrainingProfiler
+
+L = get_logger(__name__)
+
+class BatchSizeProbe:
+    """
+    Picks a batch size by training a few steps at rising powers of two.
+
+    Each probe runs 'steps' optimizer steps on a copy of the model (the real
+    weights and RNG state are untouched) and measures samples/s and peak
+    memory - device memory on CUDA, process RSS on CPU. Probing stops at the
+    first size that runs out of memory, exceeds the memory budget or fails to
+    raise throughput by min_gain; the last size before it is chosen.
+
+    Config:
+        auto_batch - enable probing; batch_size is then the smallest size tried
+        max_batch_size - largest size tried (default 1024)
+        memory_budget_mb - worker memory budget (defaults to the WORKER_MEMORY_MB
+            env var on CPU, 90% of the device on CUDA; 0 = no limit)
+    """
+
+    MIN_GAIN = 0.05
+
+    def __init__(
+        self,
+        device:torch.device,
+        min_batch_size:int=16,
+        max_batch_size:int=1024,
+        budget_mb:float=0,
+        steps:int=3,
+        min_gain:float=MIN_GAIN
+    ):
+        self.device = device
+        self.min_batch_size = max(1, int(min_batch_size))
+        self.max_batch_size = max(self.min_batch_size, int(max_batch_size))
+        self.budget_mb = budget_mb or 0
+        self.steps = steps
+        self.min_gain = min_gain
+        self.probes:list[dict[str, Any]] = []
+
+    @staticmethod
+    def from_config(config:dict[str, Any], device:torch.device) -> "BatchSizeProbe":
+        budget = config.get("memory_budget_mb")
+        if budget is None:
+            if device.type == "cuda":
+                budget = 0.9 * torch.cuda.get_device_properties(device).total_memory / (1024 * 1024)
+            else:
+                budget = get_config().worker_memory_mb
+        return BatchSizeProbe(
+            device,
+            min_batch_size=config.get("batch_size") or 16,
+            max_batch_size=config.get("max_batch_size") or 1024,
+            budget_mb=budget
+        )
+
+    def candidates(self, windows:int) -> list[int]:
+        sizes = []
+        size = self.min_batch_size
+        while size <= min(self.max_batch_size, windows):
+            sizes.append(size)
+            size *= 2
+        return sizes or [self.min_batch_size]
+
+    def choose(self, model:torch.nn.Module, dataset:Dataset, learning_rate:float=0.001) -> int:
+        """
+        Returns the chosen batch size. Probe results are kept in self.probes.
+        """
+        rng = torch.get_rng_state()
+        chosen = None
+        best = 0.0
+        try:
+            for size in self.candidates(len(dataset)):
+                try:
+                    sps, peak_mb = self.measure(model, dataset, size, learning_rate)
+                except (torch.cuda.OutOfMemoryError, MemoryError):
+                    self.probes.append({"batch_size": size, "oom": True})
+                    break
+                self.probes.append({"batch_size": size, "samples_per_s": round(sps, 2), "peak_mb": round(peak_mb, 1)})
+                if self.budget_mb and peak_mb > self.budget_mb:
+                    break
+                if chosen is not None and sps < best * (1 + self.min_gain):
+                    break
+                chosen, best = size, sps
+        finally:
+            torch.set_rng_state(rng)
+            if self.device.type == "cuda":
+                torch.cuda.empty_cache()
+        return chosen or self.min_batch_size
+
+    def measure(self, model:torch.nn.Module, dataset:Dataset, size:int, learning_rate:float) -> tuple[float, float]:
+        """
+        Trains 'steps' steps at the given size on a copy of the model after one
+        warm-up step. Returns (samples/s, peak memory MB).
+        """
+        probe = copy.deepcopy(model).to(self.device)
+        probe.train()
+        optimizer = torch.optim.Adam(probe.parameters(), lr=learning_rate)
+        criterion = torch.nn.MSELoss()
+        *x, y = dataset[0:size]
+        x, y = [t.to(self.device) for t in x], y.to(self.device)
+        if self.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.device)
+
+        def step():
+            optimizer.zero_grad()
+            loss = criterion(probe(*x), y)
+            loss.backward()
+            optimizer.step()
+
+        step()
+        start = time.perf_counter()
+        for _ in range(self.steps):
+            step()
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(self.device)
+            peak_mb = torch.cuda.max_memory_allocated(self.device) / (1024 * 1024)
+        else:
+            peak_mb = TrainingProfiler.peak_rss_mb()
+        elapsed = time.perf_counter() - start
+        return (self.steps * len(y)) / elapsed if elapsed else 0.0, peak_mb
+
+    def record(self, unit:JobUnit, chosen:int) -> dict[str, Any]:
+        """
+        Writes the choice to the JobUnit and returns the summary kept on the TrainingRun
+        """
+        unit.stat("Batch size", chosen)
+        unit.log(f"Batch size {chosen} chosen from probes {self.probes}")
+        L.info(f"Batch size {chosen} chosen from probes {self.probes}")
+        return {
+            "chosen": chosen,
+            "budget_mb": round(self.budget_mb, 1),
+            "probes": self.probes
+        }
@@ -0,0 +1,128 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import torch
+
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+
+L = get_logger(__name__)
+
+class Checkpoint:
+    """
+    Full training state for a TrainingRun, keyed by gid_training_run.
+    Trainers write one every 'checkpoint_every' epochs so that a re-enqueued
+    run can pick up where a dead worker left off.
+    """
+
+    @staticmethod
+    def path(gid_training_run:int) -> str:
+        return f"{get_config().mdl_dir}/{gid_training_run}_ckpt.pth"
+
+    @staticmethod
+    def save(gid_training_run:int, state:dict[str, Any]) -> None:
+        """
+        Writes the state to a temp file and swaps it in, so a worker dying
+        mid-write never leaves a truncated checkpoint behind
+        """
+        path = Checkpoint.path(gid_training_run)
+        tmp = f"{path}.tmp"
+        torch.save(state, tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(gid_training_run:int) -> dict[str, Any] | None:
+        path = Checkpoint.path(gid_training_run)
+        if not os.path.exists(path):
+            return None
+        try:
+            return torch.load(path, map_location="cpu", weights_only=False)
+        except Exception:
+            L.exception(f"Unreadable checkpoint for TrainingRun {gid_training_run} - starting over")
+            return None
+
+    @staticmethod
+    def clear(gid_training_run:int) -> None:
+        path = Checkpoint.path(gid_training_run)
+        if os.path.exists(path):
+            os.remove(path)
+
+class BestState:
+    """
+    Keeps a CPU copy of the best weights seen in a run, replacing the
+    save-on-improvement / reload-at-end round trip through disk.
+
+    With persist=True each new best is also written to {gid}_best.pth on a
+    background thread. Writes are coalesced, so a burst of improvements costs
+    one write of the latest state rather than one per epoch.
+    """
+
+    def __init__(self, gid_training_run:int, persist:bool=False):
+        self.gid_training_run = gid_training_run
+        self.persist = persist
+        self.state:dict[str, torch.Tensor] = None
+        self._version = 0
+        self._written = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"best-{gid_training_run}") if persist else None
+
+    @property
+    def path(self) -> str:
+        return f"{get_config().mdl_dir}/{self.gid_training_run}_best.pth"
+
+    def update(self, model:torch.nn.Module) -> None:
+        """
+        Snapshots the model's weights. The copy is a new dict every time, so a
+        write in flight never sees a half-updated state.
+        """
+        state = {k: v.detach().to("cpu", copy=True) for k, v in model.state_dict().items()}
+        with self._lock:
+            self.state = state
+            self._version += 1
+        if self.persist:
+            self._executor.submit(self._write)
+
+    def load(self, state:dict[str, torch.Tensor]) -> None:
+        """
+        Seeds the tracker with a previously captured state, e.g. from a checkpoint
+        """
+        with self._lock:
+            self.state = state
+            self._version += 1
+
+    def restore(self, model:torch.nn.Module) -> bool:
+        """
+        Loads the best weights into the model. Returns False if there are none.
+        """
+        if self.state is None:
+            return False
+        model.load_state_dict(self.state)
+        return True
+
+    def save(self, path:str) -> None:
+        """
+        Writes the best weights to the final artifact path
+        """
+        torch.save(self.state, path)
+
+    def close(self) -> None:
+        """
+        Waits for any write in flight and removes the intermediate file
+        """
+        if not self.persist:
+            return
+        self._executor.shutdown(wait=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write(self) -> None:
+        with self._lock:
+            version, state = self._version, self.state
+        if version <= self._written:
+            return
+        tmp = f"{self.path}.tmp"
+        torch.save(state, tmp)
+        os.replace(tmp, self.path)
+        self._written = version
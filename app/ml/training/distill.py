@@ -0,0 +1,258 @@
+import asyncio
+from typing import Any
+
+import joblib
+import pandas as pd
+import torch
+
+from app.batch.job import Job
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.model_defs.architectures import build_model
+from app.ml.prediction.prediction_cache import get_prediction_cache
+from app.ml.training.checkpoint import BestState
+from app.ml.training.threads import ThreadBudget
+from app.ml.training.ts_lstm import EpochLoop, TimeSeriesLSTM, Trainer
+
+L = get_logger(__name__)
+
+class Distiller(Job):
+    """
+    Distills a COMPLETE single-ticker run (the teacher) into a smaller student
+    of the same architecture and registers it as the run's "student" variant.
+
+    The student is trained on the teacher's training split against a blend of
+    the teacher's outputs and the true targets,
+        alpha * MSE(student, teacher) + (1 - alpha) * MSE(student, y),
+    which has the same gradients as MSE against alpha * teacher + (1 - alpha) * y,
+    so the blended target is precomputed once and the Trainer's EpochLoop is
+    reused as is. Optionally the smallest prune_amount of its weights (by
+    magnitude, across all weight matrices) are then zeroed and the student is
+    fine-tuned with the mask held.
+
+    Config:
+        gid_training_run - the teacher run
+        student_hidden_size - default half the teacher's
+        student_num_layers - default the teacher's
+        alpha - weight of the teacher's outputs in the target (default 0.5)
+        epochs, learning_rate, batch_size, patience - default the teacher's
+        prune_amount - fraction of weights to zero (default 0, no pruning)
+        prune_epochs - fine-tune epochs after pruning (default 5)
+
+    Accuracy is reported as validation MSE (scaled) of teacher and student
+    on the teacher's validation split.
+    """
+
+    VARIANT = "student"
+
+    def run(self, unit:JobUnit) -> None:
+        super().run(unit)
+        budget = ThreadBudget.from_config(self.config)
+        with budget.apply():
+            budget.record(unit)
+            asyncio.run(self._run(unit))
+
+    async def _run(self, unit:JobUnit) -> None:
+        gid = self.config.get("gid_training_run")
+        teacher_run = await TrainingRun.find_by_id(gid)
+        if not teacher_run or teacher_run.status != RunStatus.COMPLETE:
+            raise ValueError(f"TrainingRun {gid} is not a complete run")
+        teacher_config:dict[str, Any] = teacher_run.data
+        if not teacher_config.get("ticker"):
+            raise ValueError(f"TrainingRun {gid} is not a single-ticker run")
+
+        spec = WindowSpec.trained(teacher_config)
+        scaler = joblib.load(f"{get_config().obj_dir}/{gid}_scaler.pkl")
+        train_df, val_df = await Distiller.split(teacher_config, spec)
+        train_dataset = TimeSeriesLSTM(train_df, ticker=teacher_config.get("ticker"), spec=spec, scaler=scaler)
+        val_dataset = TimeSeriesLSTM(val_df, ticker=teacher_config.get("ticker"), spec=spec, scaler=scaler)
+
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        teacher = build_model(teacher_config, spec.n_features, spec.n_targets)
+        teacher.load_state_dict(torch.load(f"{get_config().mdl_dir}/{gid}.pth", map_location="cpu"))
+        teacher = teacher.to(device).eval()
+
+        if not len(train_dataset) or not len(val_dataset):
+            raise ValueError(f"TrainingRun {gid} has too few bars to distill: {len(train_dataset)} train, {len(val_dataset)} validation windows")
+
+        student_config = Distiller.student_config(teacher_config, self.config)
+        student = build_model(student_config, spec.n_features, spec.n_targets).to(device)
+
+        # Training settings default to the teacher's
+        settings = {**teacher_config, **{k: v for k, v in self.config.items() if v is not None}}
+        alpha = self.config.get("alpha")
+        alpha = 0.5 if alpha is None else alpha
+        batch_size = settings.get("batch_size")
+        soft = Distiller._outputs(teacher, train_dataset.x, batch_size, device)
+        targets = alpha * soft + (1 - alpha) * train_dataset.y
+        train_batches = Distiller._batches(train_dataset.x, targets, batch_size)
+        val_batches = Distiller._batches(val_dataset.x, val_dataset.y, batch_size)
+
+        unit.log(f"Distilling TrainingRun {gid} into {student_config['num_layers']}x{student_config['hidden_size']} (alpha {alpha})")
+        L.info(f"Distilling TrainingRun {gid} into {student_config['num_layers']}x{student_config['hidden_size']} (alpha {alpha})")
+        self._train(unit, student, train_batches, val_batches, settings, settings.get("epochs"), device)
+
+        sparsity = 0.0
+        prune_amount = self.config.get("prune_amount") or 0
+        if prune_amount:
+            masks = Distiller.magnitude_masks(student, prune_amount)
+            Distiller.apply_masks(student, masks)
+            self._train(unit, student, train_batches, val_batches, settings, self.config.get("prune_epochs") or 5, device, masks=masks)
+            sparsity = Distiller.sparsity(student, masks)
+            unit.log(f"Pruned {sparsity:.1%} of student weights")
+
+        criterion = torch.nn.MSELoss()
+        teacher_val_loss = Trainer._validate(teacher, val_batches, criterion, device)
+        student_val_loss = Trainer._validate(student, val_batches, criterion, device)
+        # How closely the student tracks the teacher, as opposed to the targets
+        teacher_val = Distiller._outputs(teacher, val_dataset.x, batch_size, device)
+        fidelity_loss = Trainer._validate(student, Distiller._batches(val_dataset.x, teacher_val, batch_size), criterion, device)
+
+        file = f"{gid}_{Distiller.VARIANT}.pth"
+        torch.save({k: v.detach().cpu() for k, v in student.state_dict().items()}, f"{get_config().mdl_dir}/{file}")
+        variant = {
+            "file": file,
+            "config": {k: student_config[k] for k in ("arch", "hidden_size", "num_layers", "kernel_size") if k in student_config},
+            "alpha": alpha,
+            "prune_amount": prune_amount,
+            "sparsity": round(sparsity, 4),
+            "params": Distiller.count_params(student),
+            "teacher_params": Distiller.count_params(teacher),
+            "teacher_val_loss": teacher_val_loss,
+            "student_val_loss": student_val_loss,
+            "fidelity_loss": fidelity_loss,
+            "accuracy_loss_pct": round(100 * (student_val_loss - teacher_val_loss) / teacher_val_loss, 2) if teacher_val_loss else None,
+            "gid_job_unit": unit.gid
+        }
+        teacher_run.data = {
+            **teacher_run.data,
+            "variants": {**(teacher_run.data.get("variants") or {}), Distiller.VARIANT: variant}
+        }
+        await teacher_run.update()
+        get_prediction_cache().forget_run(teacher_run.gid)
+
+        for k in ("teacher_val_loss", "student_val_loss", "accuracy_loss_pct", "params", "teacher_params", "sparsity"):
+            unit.stat(f"Distill {k}", variant[k])
+        unit.log(f"Student registered on TrainingRun {gid} - Val Loss {student_val_loss:.6f} vs teacher {teacher_val_loss:.6f}")
+        L.info(f"Student registered on TrainingRun {gid} - Val Loss {student_val_loss:.6f} vs teacher {teacher_val_loss:.6f}")
+
+    def _train(
+        self,
+        unit:JobUnit,
+        model:torch.nn.Module,
+        train_batches:list[tuple[torch.Tensor, torch.Tensor]],
+        val_batches:list[tuple[torch.Tensor, torch.Tensor]],
+        settings:dict[str, Any],
+        epochs:int,
+        device:torch.device,
+        masks:dict[str, torch.Tensor]=None
+    ) -> None:
+        """
+        Early-stopped training with the Trainer's EpochLoop, leaving the best
+        weights in the model. With masks, pruned weights are held at zero after
+        every optimizer step.
+        """
+        loop = EpochLoop(
+            {
+                **settings,
+                "learning_rate": settings.get("learning_rate") or 0.001,
+                "weight_decay": settings.get("weight_decay") or 0,
+                "patience": settings.get("patience") or 15,
+                "grad_clip": settings.get("grad_clip") or 1.0
+            },
+            model,
+            device,
+            BestState(settings.get("gid_training_run"))
+        )
+        if masks:
+            loop.optimizer.register_step_post_hook(lambda *_: Distiller.apply_masks(model, masks))
+        for epoch in loop.epochs(train_batches, val_batches, epochs):
+            unit.log(f"Distill epoch {epoch+1}/{epochs} - Train Loss: {loop.train_losses[-1]:.6f}, Val Loss: {loop.val_losses[-1]:.6f}")
+        loop.finish()
+
+    @staticmethod
+    def student_config(teacher_config:dict[str, Any], config:dict[str, Any]) -> dict[str, Any]:
+        """
+        The teacher's architecture with the student's size. Students never
+        grow past the teacher.
+        """
+        hidden_size = config.get("student_hidden_size") or max(1, teacher_config.get("hidden_size") // 2)
+        num_layers = config.get("student_num_layers") or teacher_config.get("num_layers")
+        if hidden_size > teacher_config.get("hidden_size") or num_layers > teacher_config.get("num_layers"):
+            raise ValueError(f"Student {num_layers}x{hidden_size} is larger than the teacher")
+        return {**teacher_config, "hidden_size": hidden_size, "num_layers": num_layers, "arch": teacher_config.get("arch") or "lstm"}
+
+    @staticmethod
+    async def split(config:dict[str, Any], spec:WindowSpec) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        The teacher's train/validation split: the bars in the ranges it
+        recorded under 'split', ordered as it was trained. That covers
+        fine-tuned, walk-forward (the last fold) and streamed runs. Runs which
+        predate the record are split like a plain run: bars up to data_end,
+        cut at train_split.
+        """
+        symbol = config.get("ticker")
+        ticker = await Ticker.findByTicker(symbol)
+        if not ticker:
+            raise ValueError(f"Unknown ticker {symbol}")
+        df = pd.DataFrame([r.__dict__ for r in await TickerTimeseries.findByTicker(ticker=ticker)])
+        split = config.get("split")
+        if split and split.get("train") and split.get("validation"):
+            return spec.sort(Distiller._between(df, *split["train"])), spec.sort(Distiller._between(df, *split["validation"]))
+        if config.get("data_end"):
+            df = df[df["date"] <= pd.Timestamp(config["data_end"]).date()]
+        df = spec.sort(df)
+        train_size = int(config.get("train_split") * len(df))
+        return df.iloc[:train_size], df.iloc[train_size:]
+
+    @staticmethod
+    def _between(df:pd.DataFrame, first:str, last:str) -> pd.DataFrame:
+        return df[(df["date"] >= pd.Timestamp(first).date()) & (df["date"] <= pd.Timestamp(last).date())]
+
+    @staticmethod
+    def _outputs(model:torch.nn.Module, x:torch.Tensor, batch_size:int, device:torch.device) -> torch.Tensor:
+        with torch.no_grad():
+            return torch.cat([model(x[s].to(device)).cpu() for s in Distiller._slices(len(x), batch_size)])
+
+    @staticmethod
+    def _batches(x:torch.Tensor, y:torch.Tensor, batch_size:int) -> list[tuple[torch.Tensor, torch.Tensor]]:
+        return [(x[s], y[s]) for s in Distiller._slices(len(x), batch_size)]
+
+    @staticmethod
+    def _slices(length:int, batch_size:int) -> list[slice]:
+        return [slice(start, min(start + batch_size, length)) for start in range(0, length, batch_size)]
+
+    @staticmethod
+    def magnitude_masks(model:torch.nn.Module, amount:float) -> dict[str, torch.Tensor]:
+        """
+        Global magnitude pruning masks over every weight matrix (biases are
+        kept): the smallest 'amount' of weights by absolute value are masked
+        """
+        weights = {n: p for n, p in model.named_parameters() if "weight" in n and p.dim() > 1}
+        flat = torch.cat([p.detach().abs().flatten() for p in weights.values()])
+        k = int(amount * len(flat))
+        if k == 0:
+            return {n: torch.ones_like(p, dtype=torch.bool) for n, p in weights.items()}
+        threshold = flat.kthvalue(k).values
+        return {n: p.detach().abs() > threshold for n, p in weights.items()}
+
+    @staticmethod
+    def apply_masks(model:torch.nn.Module, masks:dict[str, torch.Tensor]) -> None:
+        params = dict(model.named_parameters())
+        with torch.no_grad():
+            for n, mask in masks.items():
+                params[n].mul_(mask)
+
+    @staticmethod
+    def sparsity(model:torch.nn.Module, masks:dict[str, torch.Tensor]) -> float:
+        total = sum(m.numel() for m in masks.values())
+        return 1 - sum(int(m.sum()) for m in masks.values()) / total if total else 0.0
+
+    @staticmethod
+    def count_params(model:torch.nn.Module) -> int:
+        return sum(p.numel() for p in model.parameters())
@@ -0,0 +1,330 @@
+from typing import Iterable
+
+import joblib
+import torch
+
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.models.model_type import ModelType
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.fingerprint import config_hash
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.lstm import PackedLSTMModel
+from app.ml.training.ts_lstm import ContiguousBatchSampler, TimeSeriesLSTM, Trainer
+
+L = get_logger(__name__)
+
+class PackTrainer(Trainer):
+    """
+    "Model pack" training: K independent per-ticker LSTMModels trained in one
+    vectorized pass with a PackedLSTMModel.
+
+    Config is the usual Trainer config with 'tickers' in place of 'ticker'.
+    Each ticker gets its own TrainingRun, scaler, early stopping and learning
+    rate schedule, and its artifact is a plain LSTMModel state dict, so the runs
+    are served by the TimeSeriesLSTM predictor like any other run.
+
+    Models are independent: losses are summed per model, gradients are clipped
+    per model and Adam keeps per-model learning rates, moments and step counts
+    (_PackedAdam), so a model that has stopped (or has no windows in a batch)
+    is left untouched, optimizer state included.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def _train(self, unit:JobUnit) -> None:
+        spec = WindowSpec.from_config(self.config)
+        tickers:list[str] = self.config.get("tickers") or []
+        if not tickers:
+            raise ValueError("Model pack needs 'tickers'")
+        if (self.config.get("arch") or "lstm") != "lstm":
+            raise ValueError("Model packs only train LSTMs")
+        epochs = self.config.get("epochs")
+        batch_size = self.config.get("batch_size")
+        learning_rate = self.config.get("learning_rate")
+        weight_decay = self.config.get("weight_decay")
+        patience = self.config.get("patience")
+        grad_clip = self.config.get("grad_clip")
+        train_split = self.config.get("train_split")
+
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        L.info(f"Training pack of {len(tickers)} on device: {device}")
+
+        self.config["window"] = spec.to_dict()
+        model_type = await ModelType.find_by_gid(self.training_run.gid_model_type)
+
+        runs:list[TrainingRun] = []
+        train_sets:list[TimeSeriesLSTM] = []
+        val_sets:list[TimeSeriesLSTM] = []
+        try:
+            for ticker in tickers:
+                df = await self._load(ascending=spec.chronological, ticker=ticker)
+                train_size = int(train_split * len(df))
+                if spec.count(train_size) == 0 or spec.count(len(df) - train_size) == 0:
+                    unit.log(f"Skipping {ticker} - not enough data ({len(df)} rows)")
+                    continue
+
+                run = await TrainingRun.create(model=model_type, unit=unit)
+                data = {
+                    **{k: v for k, v in self.config.items() if k != "tickers"},
+                    "ticker": ticker,
+                    "gid_training_run": run.gid,
+                    "gid_pack_run": self.training_run.gid,
+                    "data_end": str(df["date"].max()),
+                    "split": Trainer.split_range(df["date"].iloc[:train_size], df["date"].iloc[train_size:])
+                }
+                # Hashed as the single-ticker run it stands in for, not the pack
+                run.data = {**data, "config_hash": config_hash(data)}
+                run.status = RunStatus.RUNNING
+                await run.update()
+                runs.append(run)
+
+                train_sets.append(TimeSeriesLSTM(
+                    df.iloc[:train_size],
+                    ticker=ticker,
+                    spec=spec,
+                    scaler_path=f"{get_config().obj_dir}/{run.gid}_scaler.pkl"
+                ))
+                val_sets.append(TimeSeriesLSTM(df.iloc[train_size:], ticker=ticker, spec=spec, scaler=train_sets[-1].scaler))
+
+            if not runs:
+                raise ValueError("No ticker in the pack has enough data to train")
+
+            self.config["pack"] = {run.data["ticker"]: run.gid for run in runs}
+            self.training_run.data = {**self.config}
+
+            train_x, train_y, train_mask = PackTrainer._stack(train_sets, spec)
+            val_x, val_y, val_mask = PackTrainer._stack(val_sets, spec)
+
+            k = len(runs)
+            model = PackedLSTMModel.from_models([Trainer._build_model(self.config, spec) for _ in range(k)]).to(device)
+            optimizer = _PackedAdam(model.parameters(), weight_decay=weight_decay)
+            plateau = _PackedPlateau(k, learning_rate, factor=0.5, patience=5)
+
+            active = torch.ones(k, dtype=torch.bool)
+            best_val_loss = torch.full((k,), float('inf'))
+            best_epoch = torch.zeros(k, dtype=torch.long)
+            patience_counter = torch.zeros(k, dtype=torch.long)
+            best_state = {n: t.detach().clone() for n, t in model.state_dict().items()}
+            train_losses:list[list[float]] = [[] for _ in range(k)]
+            val_losses:list[list[float]] = [[] for _ in range(k)]
+            learning_rates:list[list[float]] = [[] for _ in range(k)]
+
+            L.info(f"Starting pack training for {epochs} epochs...")
+
+            for epoch in range(epochs):
+                train_loss = PackTrainer._train_pack_epoch(model, train_x, train_y, train_mask, batch_size, optimizer, plateau.lr * active, grad_clip, device)
+                val_loss = PackTrainer._validate_pack(model, val_x, val_y, val_mask, batch_size, device)
+
+                for i in active.nonzero().flatten().tolist():
+                    train_losses[i].append(train_loss[i].item())
+                    val_losses[i].append(val_loss[i].item())
+                    learning_rates[i].append(plateau.lr[i].item())
+
+                plateau.step(val_loss, active)
+
+                improved = active & (val_loss < best_val_loss)
+                best_val_loss = torch.where(improved, val_loss, best_val_loss)
+                best_epoch[improved] = epoch
+                patience_counter[improved] = 0
+                patience_counter[active & ~improved] += 1
+                if improved.any():
+                    idx = improved.to(device)
+                    for n, t in model.state_dict().items():
+                        best_state[n][idx] = t.detach()[idx]
+
+                stopped = active & (patience_counter >= patience)
+                for i in stopped.nonzero().flatten().tolist():
+                    unit.log(f"{runs[i].data['ticker']} early stopped at epoch {epoch+1}. Best epoch was {best_epoch[i].item()+1}")
+                active &= ~stopped
+
+                n_active = int(active.sum())
+                msg = f"Epoch {epoch+1}/{epochs} - Active: {n_active}/{k}, Mean Train Loss: {train_loss.mean():.6f}, Mean Val Loss: {val_loss.mean():.6f}"
+                unit.log(msg)
+                L.info(msg)
+                if n_active == 0:
+                    break
+
+            for i, run in enumerate(runs):
+                torch.save(model.unpack(i, best_state), f"{get_config().mdl_dir}/{run.gid}.pth")
+                joblib.dump(
+                    {
+                        'train_losses': train_losses[i],
+                        'val_losses': val_losses[i],
+                        'learning_rates': learning_rates[i],
+                        'best_epoch': best_epoch[i].item(),
+                        'best_val_loss': best_val_loss[i].item(),
+                        'final_train_loss': train_losses[i][-1],
+                        'final_val_loss': val_losses[i][-1]
+                    },
+                    f"{get_config().obj_dir}/{run.gid}_metrics.pkl"
+                )
+                run.status = RunStatus.COMPLETE
+                await run.update()
+
+            unit.accumulate("Models trained", len(runs))
+            unit.log(f"Pack complete! {len(runs)} models, Mean Best Val Loss: {best_val_loss.mean():.6f}")
+            L.info(f"Pack complete! {len(runs)} models, Mean Best Val Loss: {best_val_loss.mean():.6f}")
+        except BaseException:
+            for run in runs:
+                if run.status != RunStatus.COMPLETE:
+                    run.status = RunStatus.FAILED
+                    await run.update()
+            raise
+
+    @staticmethod
+    def _stack(datasets:list[TimeSeriesLSTM], spec:WindowSpec) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Pads the K scaled series to a common length and windows them in one
+        unfold(). Returns x (K, W, seq_len, F), y (K, W, targets) and a (K, W)
+        mask of the windows that exist in each series.
+        """
+        rows = max(len(d.data) for d in datasets)
+        data = datasets[0].data.new_zeros((len(datasets), rows, spec.n_features))
+        for i, d in enumerate(datasets):
+            data[i, :len(d.data)] = d.data
+
+        w = data.unfold(1, spec.span, spec.stride).transpose(2, 3)
+        x = w[:, :, :spec.seq_len]
+        y = w[:, :, spec.span - 1][:, :, spec.t_idx]
+        counts = torch.tensor([spec.count(len(d.data)) for d in datasets])
+        mask = torch.arange(w.shape[1])[None, :] < counts[:, None]
+        return x, y, mask
+
+    @staticmethod
+    def _masked_loss(pred:torch.Tensor, y:torch.Tensor, mask:torch.Tensor) -> torch.Tensor:
+        """
+        Per-model MSE over the valid windows of a batch, shape (K,)
+        """
+        err = ((pred - y) ** 2).mean(-1) * mask
+        return err.sum(1) / mask.sum(1).clamp(min=1)
+
+    @staticmethod
+    def _train_pack_epoch(
+        model:PackedLSTMModel,
+        x:torch.Tensor,
+        y:torch.Tensor,
+        mask:torch.Tensor,
+        batch_size:int,
+        optimizer:"_PackedAdam",
+        lr:torch.Tensor,
+        grad_clip:float,
+        device:torch.device
+    ) -> torch.Tensor:
+        """
+        One pass over the stacked windows with each model's learning rate in lr
+        (0 for stopped models). Returns each model's mean batch loss.
+        """
+        model.train()
+        k = x.shape[0]
+        loss_sum = torch.zeros(k)
+        batches = torch.zeros(k)
+        for s in ContiguousBatchSampler(x.shape[1], batch_size):
+            x_batch, y_batch, m_batch = x[:, s].to(device), y[:, s].to(device), mask[:, s].to(device)
+            has = m_batch.any(1)
+
+            optimizer.zero_grad()
+            loss = PackTrainer._masked_loss(model(x_batch), y_batch, m_batch)
+            loss.sum().backward()
+
+            # Per-model equivalent of clip_grad_norm_
+            params = [p for p in model.parameters() if p.grad is not None]
+            norms = torch.stack([p.grad.pow(2).flatten(1).sum(1) for p in params]).sum(0).sqrt()
+            coef = (grad_clip / (norms + 1e-6)).clamp(max=1.0)
+            for p in params:
+                p.grad.mul_(coef.view(-1, *[1] * (p.dim() - 1)))
+
+            optimizer.step(lr.to(device) * has)
+
+            has = has.cpu()
+            loss_sum += loss.detach().cpu() * has
+            batches += has
+
+        return loss_sum / batches.clamp(min=1)
+
+    @staticmethod
+    def _validate_pack(
+        model:PackedLSTMModel,
+        x:torch.Tensor,
+        y:torch.Tensor,
+        mask:torch.Tensor,
+        batch_size:int,
+        device:torch.device
+    ) -> torch.Tensor:
+        """
+        Returns each model's mean batch loss over the validation windows
+        """
+        model.eval()
+        k = x.shape[0]
+        loss_sum = torch.zeros(k)
+        batches = torch.zeros(k)
+        with torch.no_grad():
+            for s in ContiguousBatchSampler(x.shape[1], batch_size):
+                x_batch, y_batch, m_batch = x[:, s].to(device), y[:, s].to(device), mask[:, s].to(device)
+                has = m_batch.any(1).cpu()
+                loss = PackTrainer._masked_loss(model(x_batch), y_batch, m_batch).cpu()
+                loss_sum += loss * has
+                batches += has
+        return loss_sum / batches.clamp(min=1)
+
+class _PackedPlateau:
+    """
+    ReduceLROnPlateau (mode='min', relative threshold) tracked per model
+    """
+    def __init__(self, k:int, lr:float, factor:float=0.5, patience:int=5, threshold:float=1e-4):
+        self.lr = torch.full((k,), float(lr))
+        self.factor = factor
+        self.patience = patience
+        self.threshold = threshold
+        self.best = torch.full((k,), float('inf'))
+        self.bad_epochs = torch.zeros(k, dtype=torch.long)
+
+    def step(self, loss:torch.Tensor, active:torch.Tensor) -> None:
+        better = loss < self.best * (1 - self.threshold)
+        self.best = torch.where(better & active, loss, self.best)
+        self.bad_epochs = torch.where(better, torch.zeros_like(self.bad_epochs), self.bad_epochs + 1)
+        reduce = active & (self.bad_epochs > self.patience)
+        self.lr = torch.where(reduce, self.lr * self.factor, self.lr)
+        self.bad_epochs[reduce] = 0
+
+class _PackedAdam:
+    """
+    torch.optim.Adam (L2 weight decay, no amsgrad) over packed parameters whose
+    leading dim is the model. Each model has its own learning rate and step
+    count, and a model stepped with lr 0 keeps its weights, moments and step
+    count exactly as they were.
+    """
+    def __init__(self, params:Iterable[torch.Tensor], betas:tuple[float, float]=(0.9, 0.999), eps:float=1e-8, weight_decay:float=0):
+        self.params = list(params)
+        self.betas = betas
+        self.eps = eps
+        self.weight_decay = weight_decay or 0
+        self.steps = torch.zeros(self.params[0].shape[0], device=self.params[0].device)
+        self.exp_avg = [torch.zeros_like(p) for p in self.params]
+        self.exp_avg_sq = [torch.zeros_like(p) for p in self.params]
+
+    def zero_grad(self) -> None:
+        for p in self.params:
+            p.grad = None
+
+    @torch.no_grad()
+    def step(self, lr:torch.Tensor) -> None:
+        beta1, beta2 = self.betas
+        live = lr > 0
+        self.steps += live
+        # Frozen models that never stepped would divide by zero; their update is 0 anyway
+        steps = self.steps.clamp(min=1)
+        bias1 = 1 - beta1 ** steps
+        bias2 = 1 - beta2 ** steps
+        for p, exp_avg, exp_avg_sq in zip(self.params, self.exp_avg, self.exp_avg_sq):
+            if p.grad is None:
+                continue
+            shape = (-1, *[1] * (p.dim() - 1))
+            mask = live.view(shape)
+            grad = p.grad + self.weight_decay * p if self.weight_decay else p.grad
+            exp_avg.copy_(torch.where(mask, exp_avg * beta1 + (1 - beta1) * grad, exp_avg))
+            exp_avg_sq.copy_(torch.where(mask, exp_avg_sq * beta2 + (1 - beta2) * grad * grad, exp_avg_sq))
+            denom = exp_avg_sq.sqrt() / bias2.sqrt().view(shape) + self.eps
+            p.sub_((lr / bias1).view(shape) * exp_avg / denom)
@@ -0,0 +1,112 @@
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+import torch
+
+from app.batch.models.job_unit import JobUnit
+
+class TrainingProfiler:
+    """
+    Wall-clock timers around the phases of a training epoch, plus throughput,
+    peak RSS and torch thread count.
+
+    Each epoch is summarized to the JobUnit: stat() holds the latest epoch
+    ("Epoch forward s", ...) and accumulate() the run totals ("Forward s", ...).
+    On CUDA the device is synchronized at the end of each phase so that the
+    time lands in the phase that queued the work.
+    """
+
+    PHASES = {
+        "data": "Data load",
+        "forward": "Forward",
+        "backward": "Backward",
+        "optimizer": "Optimizer",
+        "validation": "Validation"
+    }
+
+    def __init__(self, device:torch.device=None):
+        self.sync = device is not None and device.type == "cuda"
+        self.epoch:dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.total:dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.epoch_samples = 0
+        self.total_samples = 0
+        self.epochs = 0
+
+    @contextmanager
+    def phase(self, name:str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.sync:
+                torch.cuda.synchronize()
+            self.epoch[name] += time.perf_counter() - start
+
+    def iterate(self, batches:Iterable[Any], name:str="data") -> Iterator[Any]:
+        """
+        Yields from batches, timing each fetch as the given phase
+        """
+        it = iter(batches)
+        while True:
+            with self.phase(name):
+                try:
+                    batch = next(it)
+                except StopIteration:
+                    return
+            yield batch
+
+    def samples(self, n:int) -> None:
+        self.epoch_samples += n
+
+    @staticmethod
+    def peak_rss_mb() -> float:
+        """
+        Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)
+        """
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+    def summary(self) -> dict[str, float]:
+        """
+        Summary of the current epoch
+        """
+        busy = sum(v for k, v in self.epoch.items() if k != "validation")
+        return {
+            **{k: round(v, 4) for k, v in self.epoch.items()},
+            "samples_per_s": round(self.epoch_samples / busy, 2) if busy else 0.0,
+            "peak_rss_mb": round(TrainingProfiler.peak_rss_mb(), 1),
+            "torch_threads": torch.get_num_threads()
+        }
+
+    def end_epoch(self, unit:JobUnit) -> dict[str, float]:
+        """
+        Writes the epoch summary to the JobUnit, folds it into the run totals and
+        starts a new epoch. Returns the epoch summary.
+        """
+        s = self.summary()
+        for k, label in self.PHASES.items():
+            unit.stat(f"Epoch {label.lower()} s", s[k])
+            unit.accumulate(f"{label} s", s[k])
+            self.total[k] += self.epoch[k]
+        unit.stat("Epoch samples/s", s["samples_per_s"])
+        unit.stat("Peak RSS MB", s["peak_rss_mb"])
+        unit.stat("Torch threads", s["torch_threads"])
+        unit.accumulate("Samples", self.epoch_samples)
+
+        self.total_samples += self.epoch_samples
+        self.epochs += 1
+        self.epoch = dict.fromkeys(self.PHASES, 0.0)
+        self.epoch_samples = 0
+        return s
+
+    def end_run(self, unit:JobUnit) -> None:
+        """
+        Writes the run-level throughput once training is done
+        """
+        busy = sum(v for k, v in self.total.items() if k != "validation")
+        unit.stat("Samples/s", round(self.total_samples / busy, 2) if busy else 0.0)
+        unit.stat("Epochs", self.epochs)
+        unit.stat("Peak RSS MB", round(TrainingProfiler.peak_rss_mb(), 1))
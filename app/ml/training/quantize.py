@@ -0,0 +1,173 @@
+import asyncio
+import os
+import statistics
+import time
+from typing import Any
+
+import joblib
+import numpy as np
+import torch
+
+from app.batch.job import Job
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.architectures import build_model, quantize
+from app.ml.prediction.prediction_cache import get_prediction_cache
+from app.ml.training.distill import Distiller
+from app.ml.training.threads import ThreadBudget
+from app.ml.training.ts_lstm import TimeSeriesLSTM
+
+L = get_logger(__name__)
+
+class Quantizer(Job):
+    """
+    Exports a dynamically quantized (int8) copy of a COMPLETE single-ticker
+    run - or of one of its variants, e.g. the distilled student - and
+    registers it as the run's "int8" (or "{source}_int8") variant.
+
+    A parity check runs the float and int8 models over the run's validation
+    windows and records the drift between their outputs, their validation
+    losses, file sizes and single-window CPU latency.
+
+    Config:
+        gid_training_run - the run to export
+        source_variant - variant to quantize (default the run's own weights)
+        serve - opt the run in to serving the int8 variant (default False)
+        max_drift - largest max_abs_drift (scaled) accepted for serve; unset = no limit
+        latency_samples - single-window predictions timed per model (default 50)
+    """
+
+    SUFFIX = "int8"
+
+    def run(self, unit:JobUnit) -> None:
+        super().run(unit)
+        budget = ThreadBudget.from_config(self.config)
+        with budget.apply():
+            budget.record(unit)
+            asyncio.run(self._run(unit))
+
+    async def _run(self, unit:JobUnit) -> None:
+        gid = self.config.get("gid_training_run")
+        training_run = await TrainingRun.find_by_id(gid)
+        if not training_run or training_run.status != RunStatus.COMPLETE:
+            raise ValueError(f"TrainingRun {gid} is not a complete run")
+        run_config:dict[str, Any] = training_run.data
+        if not run_config.get("ticker"):
+            raise ValueError(f"TrainingRun {gid} is not a single-ticker run")
+
+        source = self.config.get("source_variant")
+        model_config, source_path = Quantizer.source(run_config, source)
+        name = f"{source}_{Quantizer.SUFFIX}" if source else Quantizer.SUFFIX
+
+        spec = WindowSpec.trained(run_config)
+        scaler = joblib.load(f"{get_config().obj_dir}/{gid}_scaler.pkl")
+        _, val_df = await Distiller.split(run_config, spec)
+        val_dataset = TimeSeriesLSTM(val_df, ticker=run_config.get("ticker"), spec=spec, scaler=scaler)
+        if not len(val_dataset):
+            raise ValueError(f"TrainingRun {gid} has no validation windows for a parity check")
+
+        model = build_model(model_config, spec.n_features, spec.n_targets)
+        model.load_state_dict(torch.load(source_path, map_location="cpu"))
+        model.eval()
+        quantized = quantize(model)
+
+        file = f"{gid}_{name}.pth"
+        path = f"{get_config().mdl_dir}/{file}"
+        torch.save(quantized.state_dict(), path)
+
+        parity = Quantizer.parity(model, quantized, val_dataset.x, val_dataset.y, spec, scaler)
+        samples = self.config.get("latency_samples") or 50
+        sample = val_dataset.x[-1:]
+        variant = {
+            "file": file,
+            "source": source,
+            "quantized": True,
+            "config": {k: model_config[k] for k in ("arch", "hidden_size", "num_layers", "kernel_size") if k in model_config},
+            **parity,
+            "float_bytes": os.path.getsize(source_path),
+            "int8_bytes": os.path.getsize(path),
+            "float_latency_ms": Quantizer.latency_ms(model, sample, samples),
+            "int8_latency_ms": Quantizer.latency_ms(quantized, sample, samples),
+            "gid_job_unit": unit.gid
+        }
+        data = {
+            **training_run.data,
+            "variants": {**(training_run.data.get("variants") or {}), name: variant}
+        }
+
+        max_drift = self.config.get("max_drift")
+        if self.config.get("serve"):
+            if max_drift is None or variant["max_abs_drift"] <= max_drift:
+                data["serve_variant"] = name
+                unit.log(f"TrainingRun {gid} now serves the '{name}' variant")
+            else:
+                unit.log(f"TrainingRun {gid} not opted in to '{name}': drift {variant['max_abs_drift']:.6f} > {max_drift}")
+                L.warning(f"TrainingRun {gid} not opted in to '{name}': drift {variant['max_abs_drift']:.6f} > {max_drift}")
+        training_run.data = data
+        await training_run.update()
+        get_prediction_cache().forget_run(training_run.gid)
+
+        for k in ("max_abs_drift", "mean_abs_drift", "float_val_loss", "int8_val_loss", "float_bytes", "int8_bytes", "float_latency_ms", "int8_latency_ms"):
+            unit.stat(f"Quantize {k}", variant[k])
+        unit.log(f"Registered '{name}' on TrainingRun {gid} - max drift {variant['max_abs_drift']:.6f}, {variant['int8_bytes']} vs {variant['float_bytes']} bytes")
+        L.info(f"Registered '{name}' on TrainingRun {gid} - max drift {variant['max_abs_drift']:.6f}, {variant['int8_bytes']} vs {variant['float_bytes']} bytes")
+
+    @staticmethod
+    def source(run_config:dict[str, Any], variant:str=None) -> tuple[dict[str, Any], str]:
+        """
+        The model config and float weights path of the run or one of its variants
+        """
+        gid = run_config.get("gid_training_run")
+        if not variant:
+            return run_config, f"{get_config().mdl_dir}/{gid}.pth"
+        found = (run_config.get("variants") or {}).get(variant)
+        if not found:
+            raise ValueError(f"Run {gid} has no '{variant}' variant")
+        if found.get("quantized"):
+            raise ValueError(f"Variant '{variant}' of run {gid} is already quantized")
+        return {**run_config, **found.get("config", {})}, f"{get_config().mdl_dir}/{found['file']}"
+
+    @staticmethod
+    def parity(
+        model:torch.nn.Module,
+        quantized:torch.nn.Module,
+        x:torch.Tensor,
+        y:torch.Tensor,
+        spec:WindowSpec,
+        scaler:Any
+    ) -> dict[str, Any]:
+        """
+        Drift of the int8 outputs from the float outputs over the windows x:
+        scaled max/mean absolute drift, max absolute drift per target in the
+        target's own units, and both models' MSE against y
+        """
+        with torch.no_grad():
+            expected = model(x)
+            actual = quantized(x)
+        drift = (actual - expected).abs()
+        ranges = np.asarray(scaler.data_range_)[[spec.f_cols.index(t) for t in spec.t_cols]]
+        return {
+            "windows": len(x),
+            "max_abs_drift": drift.max().item(),
+            "mean_abs_drift": drift.mean().item(),
+            "max_target_drift": {t: float(drift[:, i].max().item() * ranges[i]) for i, t in enumerate(spec.t_cols)},
+            "float_val_loss": torch.nn.functional.mse_loss(expected, y).item(),
+            "int8_val_loss": torch.nn.functional.mse_loss(actual, y).item()
+        }
+
+    @staticmethod
+    def latency_ms(model:torch.nn.Module, x:torch.Tensor, samples:int) -> float:
+        """
+        Median wall time of a prediction on x, after one warm-up
+        """
+        times = []
+        with torch.no_grad():
+            model(x)
+            for _ in range(samples):
+                start = time.perf_counter()
+                model(x)
+                times.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(times), 4)
@@ -0,0 +1,230 @@
+import itertools
+import random
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any
+
+import joblib
+import torch
+import torch.multiprocessing as mp
+
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.training.checkpoint import BestState
+from app.ml.training.ts_lstm import ContiguousBatchSampler, EpochLoop, TimeSeriesLSTM, Trainer
+
+L = get_logger(__name__)
+
+# Data shared with trial processes, set once per process by _init_worker
+_SHARED:dict[str, Any] = {}
+
+class Sweeper(Trainer):
+    """
+    Hyperparameter sweep over the Trainer config keys (hidden_size, num_layers,
+    dropout, learning_rate, batch_size, ...).
+
+    The ticker's data is loaded and scaled once, moved to shared memory and handed
+    to a pool of trial processes. Weak trials are pruned with asynchronous
+    successive halving (ASHA): a trial is only trained past a rung if its
+    validation loss there is in the top 1/reduction_factor of the trials that
+    have reached it.
+
+    Config:
+        space - {config key: [candidate values]}
+        trials - number of configurations sampled from the grid (0 = full grid)
+        min_epochs - epochs trained before the first pruning decision
+        reduction_factor - ASHA eta; each rung keeps 1/eta of the trials
+        max_workers - trial processes (defaults to the job's intra-op thread budget)
+        seed - seed for trial sampling
+
+    The best trial's weights, scaler and settings become this run's artifacts,
+    so the run is served like any other TimeSeriesLSTM run.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def _train(self, unit:JobUnit) -> None:
+        spec = WindowSpec.from_config(self.config)
+        df = await self._timed_load(unit, ascending=spec.chronological)
+        gid_training_run = self.config.get("gid_training_run")
+        epochs = self.config.get("epochs")
+        min_epochs = self.config.get("min_epochs") or 1
+        eta = self.config.get("reduction_factor") or 3
+
+        trials = Sweeper.sample(self.config.get("space") or {}, self.config.get("trials") or 0, self.config.get("seed"))
+        if not trials:
+            raise ValueError("Sweep has no trials - define 'space'")
+        max_workers = min(self.config.get("max_workers") or self.budget.intra_op, len(trials))
+        rungs = Sweeper.rungs(min_epochs, eta, epochs)
+
+        # Scale once; every trial reads the same shared-memory tensors
+        train_size = int(self.config.get("train_split") * len(df))
+        train_df, val_df = df.iloc[:train_size], df.iloc[train_size:]
+        train_dataset = TimeSeriesLSTM(train_df, ticker=self.config.get("ticker"), spec=spec)
+        val_dataset = TimeSeriesLSTM(val_df, ticker=self.config.get("ticker"), spec=spec, scaler=train_dataset.scaler)
+        train_data = train_dataset.data.share_memory_()
+        val_data = val_dataset.data.share_memory_()
+
+        self.config["window"] = spec.to_dict()
+        self.config["data_end"] = str(df["date"].max())
+        self.config["split"] = Trainer.split_range(train_df["date"], val_df["date"])
+        unit.log(f"Sweeping {len(trials)} trials over rungs {rungs} with {max_workers} workers")
+        L.info(f"Sweeping {len(trials)} trials over rungs {rungs} with {max_workers} workers")
+
+        configs = [{**self.config, **params} for params in trials]
+        states:list[dict[str, Any]] = [None] * len(trials)
+        results:list[list[tuple[float, int]]] = [[] for _ in rungs]
+        promoted:list[set[int]] = [set() for _ in rungs]
+        waiting = list(range(len(trials)))
+        running:dict[Future, tuple[int, int]] = {}
+
+        # Trial processes split this job's thread budget, not the whole host
+        threads = max(1, self.budget.intra_op // max_workers)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(train_data, val_data, spec.to_dict(), threads)
+        ) as pool:
+            while True:
+                while len(running) < max_workers:
+                    job = Sweeper.next_job(results, promoted, states, waiting, eta, draining=not running)
+                    if job is None:
+                        break
+                    trial, rung = job
+                    running[pool.submit(_run_trial, configs[trial], states[trial], rungs[rung])] = (trial, rung)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial, rung = running.pop(future)
+                    states[trial] = future.result()
+                    states[trial]["rung"] = rung
+                    results[rung].append((states[trial]["best_val_loss"], trial))
+                    unit.log(f"Trial {trial} rung {rung} ({states[trial]['epoch']+1} epochs) - Best Val Loss: {states[trial]['best_val_loss']:.6f}")
+
+        # Best trial among those that got furthest
+        top = max(s["rung"] for s in states if s)
+        best = min((s["best_val_loss"], i) for i, s in enumerate(states) if s and s["rung"] == top)[1]
+        best_state = states[best]
+
+        self.config.update(trials[best])
+        self.config["sweep"] = {
+            "best_trial": best,
+            "rungs": rungs,
+            "trials": [
+                {
+                    "params": trials[i],
+                    "epochs": s["epoch"] + 1,
+                    "rung": s["rung"],
+                    "best_val_loss": s["best_val_loss"]
+                }
+                for i, s in enumerate(states) if s
+            ]
+        }
+        self.training_run.data = {**self.config}
+
+        torch.save(best_state["best_state"], f"{get_config().mdl_dir}/{gid_training_run}.pth")
+        joblib.dump(train_dataset.scaler, f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl")
+        joblib.dump(
+            {
+                'train_losses': best_state["train_losses"],
+                'val_losses': best_state["val_losses"],
+                'learning_rates': best_state["learning_rates"],
+                'best_epoch': best_state["best_epoch"],
+                'best_val_loss': best_state["best_val_loss"],
+                'final_train_loss': best_state["train_losses"][-1],
+                'final_val_loss': best_state["val_losses"][-1]
+            },
+            f"{get_config().obj_dir}/{gid_training_run}_metrics.pkl"
+        )
+
+        unit.accumulate("Trials trained", sum(1 for s in states if s))
+        unit.accumulate("Trial epochs", sum(s["epoch"] + 1 for s in states if s))
+        unit.log(f"Sweep complete! Best trial {best} {trials[best]} - Best Val Loss: {best_state['best_val_loss']:.6f}")
+        L.info(f"Sweep complete! Best trial {best} {trials[best]} - Best Val Loss: {best_state['best_val_loss']:.6f}")
+
+    @staticmethod
+    def sample(space:dict[str, list[Any]], trials:int=0, seed:int=None) -> list[dict[str, Any]]:
+        """
+        Expands the search space into a grid, optionally sampling 'trials' points of it
+        """
+        keys = list(space.keys())
+        grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))] if keys else []
+        if trials and trials < len(grid):
+            grid = random.Random(seed).sample(grid, trials)
+        return grid
+
+    @staticmethod
+    def rungs(min_epochs:int, eta:int, epochs:int) -> list[int]:
+        """
+        Epoch budgets at which trials are compared: min_epochs * eta^k, capped at epochs
+        """
+        rungs = []
+        budget = min_epochs
+        while budget < epochs:
+            rungs.append(budget)
+            budget *= eta
+        rungs.append(epochs)
+        return rungs
+
+    @staticmethod
+    def next_job(
+        results:list[list[tuple[float, int]]],
+        promoted:list[set[int]],
+        states:list[dict[str, Any]],
+        waiting:list[int],
+        eta:int,
+        draining:bool=False
+    ) -> tuple[int, int] | None:
+        """
+        ASHA scheduling: promote the best unpromoted trial from the highest rung
+        possible, otherwise start a new trial at rung 0. Returns (trial, rung).
+
+        Once nothing is waiting or running (draining), the best trial of each rung
+        may be promoted even if fewer than eta trials reached it, so small sweeps
+        still train at least one trial to the full budget.
+        """
+        for rung in reversed(range(len(results) - 1)):
+            ranked = sorted(results[rung])
+            keep = len(ranked) // eta
+            if draining and not waiting:
+                keep = max(keep, 1)
+            for _, trial in ranked[:keep]:
+                if trial in promoted[rung]:
+                    continue
+                promoted[rung].add(trial)
+                if states[trial]["stopped"]:
+                    continue
+                return trial, rung + 1
+        if waiting:
+            return waiting.pop(0), 0
+        return None
+
+def _init_worker(train_data:torch.Tensor, val_data:torch.Tensor, spec:dict[str, Any], threads:int) -> None:
+    torch.set_num_threads(threads)
+    _SHARED["train"] = train_data
+    _SHARED["val"] = val_data
+    _SHARED["spec"] = WindowSpec(**spec)
+
+def _run_trial(config:dict[str, Any], state:dict[str, Any], until:int) -> dict[str, Any]:
+    """
+    Trains one trial up to 'until' epochs, continuing from its previous state.
+    Runs in a pool process against the shared tensors.
+    """
+    spec:WindowSpec = _SHARED["spec"]
+    batch_size = config.get("batch_size")
+    train_x, train_y = spec.windows(_SHARED["train"])
+    val_x, val_y = spec.windows(_SHARED["val"])
+    train_batches = [(train_x[s], train_y[s]) for s in ContiguousBatchSampler(len(train_x), batch_size)]
+    val_batches = [(val_x[s], val_y[s]) for s in ContiguousBatchSampler(len(val_x), batch_size)]
+
+    model = Trainer._build_model(config, spec)
+    loop = EpochLoop(config, model, torch.device("cpu"), BestState(config.get("gid_training_run")))
+    if state is not None:
+        loop.load(state)
+    loop.run(train_batches, val_batches, until)
+    return loop.state()
@@ -0,0 +1,99 @@
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import torch
+from threadpoolctl import threadpool_limits
+
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+
+L = get_logger(__name__)
+
+class ThreadBudget:
+    """
+    CPU thread allocation for one training job on a host shared by
+    'jobs_per_host' jobs (rq workers). Each job gets an equal share of the
+    host's CPUs for torch intra-op and BLAS threads, so concurrent trainings
+    don't oversubscribe the cores.
+
+    Config (job config, falling back to the JOBS_PER_HOST env var):
+        jobs_per_host - jobs expected to train on the host at once
+        intra_op_threads - torch intra-op threads (defaults to the job's share)
+        inter_op_threads - torch inter-op threads (default 1)
+        loader_workers - DataLoader worker processes (default 0)
+        blas_threads - BLAS/OpenMP threads (defaults to intra_op_threads)
+    """
+
+    def __init__(self, cpus:int, jobs_per_host:int=1, intra_op:int=None, inter_op:int=None, loader_workers:int=None, blas:int=None):
+        self.cpus = max(1, int(cpus))
+        self.jobs_per_host = max(1, int(jobs_per_host))
+        share = max(1, self.cpus // self.jobs_per_host)
+        self.intra_op = max(1, int(intra_op or share))
+        self.inter_op = max(1, int(inter_op or 1))
+        self.loader_workers = max(0, int(loader_workers or 0))
+        self.blas = max(1, int(blas or self.intra_op))
+
+    @staticmethod
+    def host_cpus() -> int:
+        """
+        CPUs this process may run on - the affinity mask where the platform has
+        one, as containers often pin workers to a subset of the host
+        """
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def from_config(config:dict[str, Any], cpus:int=None) -> "ThreadBudget":
+        return ThreadBudget(
+            cpus=cpus or ThreadBudget.host_cpus(),
+            jobs_per_host=config.get("jobs_per_host") or get_config().jobs_per_host,
+            intra_op=config.get("intra_op_threads"),
+            inter_op=config.get("inter_op_threads"),
+            loader_workers=config.get("loader_workers"),
+            blas=config.get("blas_threads")
+        )
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            "cpus": self.cpus,
+            "jobs_per_host": self.jobs_per_host,
+            "intra_op_threads": self.intra_op,
+            "inter_op_threads": self.inter_op,
+            "loader_workers": self.loader_workers,
+            "blas_threads": self.blas
+        }
+
+    @contextmanager
+    def apply(self) -> Iterator["ThreadBudget"]:
+        """
+        Sets the torch and BLAS thread pools for the duration of the block and
+        restores the torch intra-op count afterwards. The inter-op pool can only
+        be sized before torch first uses it; if it already has been, the
+        actual size is kept and recorded instead.
+        """
+        previous = torch.get_num_threads()
+        torch.set_num_threads(self.intra_op)
+        try:
+            torch.set_num_interop_threads(self.inter_op)
+        except RuntimeError:
+            L.warning(f"Inter-op pool already started - keeping {torch.get_num_interop_threads()} threads")
+        self.inter_op = torch.get_num_interop_threads()
+        try:
+            with threadpool_limits(limits=self.blas):
+                yield self
+        finally:
+            torch.set_num_threads(previous)
+
+    def record(self, unit:JobUnit) -> None:
+        """
+        Writes the allocation actually in effect to the JobUnit
+        """
+        unit.stat("Host CPUs", self.cpus)
+        unit.stat("Jobs per host", self.jobs_per_host)
+        unit.stat("Intra-op threads", torch.get_num_threads())
+        unit.stat("Inter-op threads", self.inter_op)
+        unit.stat("Loader workers", self.loader_workers)
+        unit.stat("BLAS threads", self.blas)
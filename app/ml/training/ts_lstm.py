@@ -1,61 +1,116 @@
 import asyncio
-import os
+import time
+from datetime import date
+from typing import Any, Iterable, Iterator, Sequence
 import joblib
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, IterableDataset, Sampler
 
 from app.batch.models.job_unit import JobUnit
 from app.core.config.config import get_config
 from app.core.utils.logger import get_logger
 from app.ml.core.models.model_type import ModelType
-from app.ml.core.models.training_run import RunStatus
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.core.utils.fingerprint import config_hash, dataset_fingerprint
+from app.ml.core.utils.windowing import WindowSpec
 from app.ml.data.models.ticker import Ticker
-from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
-from app.ml.model_defs.lstm import LSTMModel
+from app.ml.data.models.vw_ticker_timeseries import SERIES_KEY, TickerTimeseries
+from app.ml.model_defs.architectures import build_model
+from app.ml.training.batch_size import BatchSizeProbe
+from app.ml.training.checkpoint import BestState, Checkpoint
+from app.ml.training.profiling import TrainingProfiler
+from app.ml.training.threads import ThreadBudget
 from app.ml.training.trainable import Trainable
 
 L = get_logger(__name__)
 
 class Trainer(Trainable):
+    # Config keys a fine-tune takes from its parent run
+    ARCH_KEYS = ("ticker", "f_cols", "t_cols", "arch", "hidden_size", "num_layers", "dropout", "kernel_size")
+
     def __init__(self):
         super().__init__()
 
     def run(self, unit):
         super().run(unit)
+        self.budget = ThreadBudget.from_config(self.config)
+        # Set when the run was created; only runs created elsewhere are hashed here
+        if not self.config.get("config_hash"):
+            self.config["config_hash"] = config_hash(self.config)
         try:
-            asyncio.run(self._train(unit))
+            with self.budget.apply():
+                self.budget.record(unit)
+                L.info(f"Thread budget: {self.budget.to_dict()}")
+                asyncio.run(self._run(unit))
             self.training_run.status = RunStatus.COMPLETE
-        except (RuntimeError, ValueError, torch.cuda.OutOfMemoryError) as e:
+        except (RuntimeError, ValueError, MemoryError, torch.cuda.OutOfMemoryError) as e:
             L.error(f"Training failed: {str(e)}", exc_info=True)
             self.training_run.status = RunStatus.FAILED
             raise
         finally:
             self.training_run._update()
 
-    async def _load(self) -> pd.DataFrame:
-        ticker = await Ticker.findByTicker(self.config.get("ticker"))
+    async def _run(self, unit:JobUnit) -> None:
+        # One event loop per job - pooled DB connections are bound to the loop
+        await self._train(unit)
+        await self._record_fingerprint()
+
+    async def _record_fingerprint(self) -> None:
+        """
+        Records the fingerprint of the bars a single-ticker run trained on, so
+        an identical request can reuse this run (TrainingRun.find_reusable)
+        """
+        symbol = self.config.get("ticker")
+        data_end = self.config.get("data_end")
+        if not symbol or not data_end:
+            return
+        self.config["fingerprint"] = await dataset_fingerprint(symbol, self.config.get("f_cols"), until=date.fromisoformat(data_end))
+        self.training_run.data = {**self.config}
+
+    async def _load(self, ascending:bool=False, ticker:str=None) -> pd.DataFrame:
+        symbol = ticker or self.config.get("ticker")
+        ticker = await Ticker.findByTicker(symbol)
+        if not ticker:
+            raise ValueError(f"Unknown ticker {symbol}")
         tts = await TickerTimeseries.findByTicker(ticker=ticker)
         df = pd.DataFrame([r.__dict__ for r in tts])
-        return df.sort_values(by="date", ascending=False)
-
-    async def _train(self, unit:JobUnit) -> LSTMModel:
-        df = await self._load()
+        return df.sort_values(by="date", ascending=ascending)
+
+    async def _timed_load(self, unit:JobUnit, ascending:bool=False, ticker:str=None) -> pd.DataFrame:
+        """
+        _load, with the time spent on the DB query and frame build added to the
+        unit's "DB load s" stat
+        """
+        start = time.perf_counter()
+        df = await self._load(ascending=ascending, ticker=ticker)
+        unit.accumulate("DB load s", round(time.perf_counter() - start, 4))
+        return df
+
+    async def _train(self, unit:JobUnit) -> torch.nn.Module:
+        if self.config.get("gid_parent_run"):
+            return await self._finetune(unit)
+        if self.config.get("stream"):
+            return await self._train_streaming(unit)
+
+        spec = WindowSpec.from_config(self.config)
+        df = await self._timed_load(unit, ascending=spec.chronological)
+        if self.config.get("folds"):
+            return self._walk_forward(unit, df, spec)
         gid_training_run = self.config.get("gid_training_run")
         ticker = self.config.get("ticker")
-        f_cols = self.config.get("f_cols")
-        epochs = self.config.get("epochs")
-        hidden_size = self.config.get("hidden_size")
-        num_layers = self.config.get("num_layers")
-        dropout = self.config.get("dropout")
-        batch_size = self.config.get("batch_size")
-        learning_rate = self.config.get("learning_rate")
-        weight_decay = self.config.get("weight_decay")
-        patience = self.config.get("patience")
-        grad_clip = self.config.get("grad_clip")
         train_split = self.config.get("train_split")
 
+        # Resume from the last checkpoint of this run, if a worker died mid-run.
+        # Bars added since then are left out so the split and scaling match.
+        ckpt = Checkpoint.load(gid_training_run)
+        if ckpt:
+            df = df[df["date"] <= ckpt["data_end"]]
+            unit.log(f"Resuming from checkpoint after epoch {ckpt['epoch']+1}")
+            L.info(f"Resuming TrainingRun {gid_training_run} from checkpoint after epoch {ckpt['epoch']+1}")
+
         # GPU support
         device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         L.info(f"Training on device: {device}")
@@ -67,153 +122,659 @@ class Trainer(Trainable):
 
         L.info(f"Train size: {len(train_df)}, Validation size: {len(val_df)}")
 
+        # Record the window actually trained on so predictors can honour it,
+        # and the last bar so a fine-tune can tell which bars are new
+        self.config["window"] = spec.to_dict()
+        self.config["data_end"] = str(df["date"].max())
+        self.config["split"] = Trainer.split_range(train_df["date"], val_df["date"])
+        self.training_run.data = {**self.config}
+
         # Create datasets - validation reuses training scaler
         scaler_path = f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl"
         train_dataset = TimeSeriesLSTM(
             train_df,
             scaler_path=scaler_path,
             ticker=ticker,
-            feature_cols=f_cols
+            spec=spec,
+            scaler=joblib.load(scaler_path) if ckpt else None
         )
         val_dataset = TimeSeriesLSTM(
             val_df,
             ticker=ticker,
-            feature_cols=f_cols,
+            spec=spec,
             scaler=train_dataset.scaler
         )
 
-        train_loader = DataLoader(
-            train_dataset,
-            batch_size=batch_size,
-            shuffle=False,
-            num_workers=2,
-            pin_memory=True if torch.cuda.is_available() else False
+        # Initialize model with dropout
+        model = Trainer._build_model(self.config, spec).to(device)
+        batch_size = self._batch_size(unit, model, train_dataset, device)
+        return self._fit(
+            unit,
+            model,
+            Trainer._loader(train_dataset, batch_size, self.budget.loader_workers),
+            Trainer._loader(val_dataset, batch_size, self.budget.loader_workers),
+            device,
+            ckpt=ckpt,
+            data_end=df["date"].max()
         )
-        val_loader = DataLoader(
-            val_dataset,
-            batch_size=batch_size,
-            shuffle=False,
-            num_workers=2,
-            pin_memory=True if torch.cuda.is_available() else False
+
+    async def _train_streaming(self, unit:JobUnit) -> torch.nn.Module:
+        """
+        Trains without materializing the history: the scaler is fit from
+        min/max aggregates computed in the DB and both splits are streamed in
+        keyset-paginated chunks of 'chunk_rows' bars (StreamingTimeSeries).
+        """
+        spec = WindowSpec.from_config(self.config)
+        if not spec.chronological:
+            raise ValueError("Streaming training needs chronological windows")
+        gid_training_run = self.config.get("gid_training_run")
+        batch_size = self.config.get("batch_size")
+        chunk_rows = self.config.get("chunk_rows") or 10000
+        symbol = self.config.get("ticker")
+        ticker = await Ticker.findByTicker(symbol)
+        if not ticker:
+            raise ValueError(f"Unknown ticker {symbol}")
+
+        # A resumed run only sees the bars it had when it was checkpointed
+        ckpt = Checkpoint.load(gid_training_run)
+        if ckpt:
+            unit.log(f"Resuming from checkpoint after epoch {ckpt['epoch']+1}")
+            L.info(f"Resuming TrainingRun {gid_training_run} from checkpoint after epoch {ckpt['epoch']+1}")
+        start = time.perf_counter()
+        rows, data_end = TickerTimeseries._summary(ticker.gid, until=ckpt["data_end"] if ckpt else None)
+        train_size = int(self.config.get("train_split") * rows)
+        if spec.count(train_size) == 0 or spec.count(rows - train_size + spec.span - 1) == 0:
+            raise ValueError(f"Not enough data to train {symbol} ({rows} rows)")
+        # Validation starts span - 1 rows early so its first target is the first validation bar
+        train_end = TickerTimeseries._date_at(ticker.gid, train_size - 1)
+        val_after = TickerTimeseries._date_at(ticker.gid, train_size - spec.span)
+
+        scaler_path = f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl"
+        if ckpt:
+            scaler = joblib.load(scaler_path)
+        else:
+            scaler = StreamingTimeSeries.scaler_from_range(*TickerTimeseries._range(ticker.gid, spec.f_cols, until=train_end))
+            joblib.dump(scaler, scaler_path)
+        unit.accumulate("DB load s", round(time.perf_counter() - start, 4))
+        L.info(f"Streaming {symbol} - Train rows: {train_size}, Validation rows: {rows - train_size}, Chunk rows: {chunk_rows}")
+
+        self.config["window"] = spec.to_dict()
+        self.config["data_end"] = str(data_end)
+        self.config["split"] = Trainer.split_range(
+            (TickerTimeseries._date_at(ticker.gid, 0), train_end),
+            (TickerTimeseries._date_at(ticker.gid, train_size - spec.span + 1), data_end)
         )
+        self.training_run.data = {**self.config}
 
-        # Initialize model with dropout
-        model = LSTMModel(
-            input_size=len(train_dataset.f_cols),
-            hidden_size=hidden_size,
-            num_layers=num_layers,
-            output_size=len(train_dataset.f_cols),
-            dropout=dropout
-        ).to(device)
-
-        criterion = torch.nn.MSELoss()
-        optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate, weight_decay=weight_decay)
-
-        # Learning rate scheduler - reduces LR when validation loss plateaus
-        scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
-            optimizer, mode='min', factor=0.5, patience=5
+        train_dataset = StreamingTimeSeries(ticker.gid, spec, scaler, until=train_end, batch_size=batch_size, chunk_rows=chunk_rows)
+        val_dataset = StreamingTimeSeries(ticker.gid, spec, scaler, after=val_after, until=data_end, batch_size=batch_size, chunk_rows=chunk_rows)
+
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model = Trainer._build_model(self.config, spec).to(device)
+        # Workers would each replay the whole stream, so batches stay in-process
+        return self._fit(
+            unit,
+            model,
+            DataLoader(train_dataset, batch_size=None, num_workers=0, pin_memory=torch.cuda.is_available()),
+            DataLoader(val_dataset, batch_size=None, num_workers=0, pin_memory=torch.cuda.is_available()),
+            device,
+            ckpt=ckpt,
+            data_end=data_end
         )
 
-        # Early stopping setup
-        best_val_loss = float('inf')
-        best_epoch = 0
-        patience_counter = 0
+    async def _finetune(self, unit:JobUnit) -> torch.nn.Module:
+        """
+        Warm start from the parent run in 'gid_parent_run': the parent's weights,
+        scaler, window and architecture are reused and the model is trained for
+        'finetune_epochs' on the last 'replay' bars the parent saw plus every bar
+        added since. Validation uses the windows whose targets are the new bars.
+        """
+        gid_training_run = self.config.get("gid_training_run")
+        gid_parent_run = self.config.get("gid_parent_run")
+
+        parent = await TrainingRun.find_by_id(gid_parent_run)
+        if not parent or parent.status != RunStatus.COMPLETE:
+            raise ValueError(f"Parent TrainingRun {gid_parent_run} is not a complete run")
+        if parent.gid_model_type != self.training_run.gid_model_type:
+            raise ValueError(f"Parent TrainingRun {gid_parent_run} is a different model type")
+
+        # The network and its inputs must be the parent's
+        for k in Trainer.ARCH_KEYS:
+            if k in parent.data:
+                self.config[k] = parent.data[k]
+        spec = WindowSpec.trained(parent.data)
+        replay = self.config.get("replay") or 250
+        self.config["epochs"] = self.config.get("finetune_epochs") or 5
+        if self.config.get("finetune_learning_rate"):
+            self.config["learning_rate"] = self.config.get("finetune_learning_rate")
+
+        df = await self._timed_load(unit, ascending=True)
+        ckpt = Checkpoint.load(gid_training_run)
+        if ckpt:
+            df = df[df["date"] <= ckpt["data_end"]]
+            unit.log(f"Resuming from checkpoint after epoch {ckpt['epoch']+1}")
+
+        # Bars up to the parent's last bar are old; runs which predate the
+        # recorded data_end are treated as having seen everything
+        parent_end = parent.data.get("data_end")
+        old = int((df["date"] <= date.fromisoformat(parent_end)).sum()) if parent_end else len(df)
+        new_bars = len(df) - old
+        df = df.iloc[max(0, old - replay):]
+        val_df = df.iloc[-(max(new_bars, 1) + spec.span - 1):]
+
+        unit.log(f"Fine-tuning from TrainingRun {gid_parent_run} on {len(df) - new_bars} replay + {new_bars} new bars")
+        L.info(f"Fine-tuning from TrainingRun {gid_parent_run} on {len(df) - new_bars} replay + {new_bars} new bars")
+
+        lineage = parent.data.get("lineage") or {}
+        self.config["window"] = spec.to_dict()
+        self.config["data_end"] = str(df["date"].max())
+        self.config["lineage"] = {
+            "gid_parent_run": gid_parent_run,
+            "gid_root_run": lineage.get("gid_root_run", gid_parent_run),
+            "depth": lineage.get("depth", 0) + 1,
+            "parent_data_end": parent_end,
+            "replay_bars": len(df) - new_bars,
+            "new_bars": new_bars
+        }
+        self.config["split"] = Trainer.split_range(df["date"], val_df["date"])
+        self.training_run.data = {**self.config}
 
-        # Metrics tracking
-        train_losses = []
-        val_losses = []
-        learning_rates = []
+        # The run keeps its own copy of the scaler so it is served on its own
+        scaler = joblib.load(f"{get_config().obj_dir}/{gid_parent_run}_scaler.pkl")
+        joblib.dump(scaler, f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl")
+        ticker = self.config.get("ticker")
+        train_dataset = TimeSeriesLSTM(spec.sort(df), ticker=ticker, spec=spec, scaler=scaler)
+        val_dataset = TimeSeriesLSTM(spec.sort(val_df), ticker=ticker, spec=spec, scaler=scaler)
 
-        L.info(f"Starting training for {epochs} epochs...")
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model = Trainer._build_model(self.config, spec)
+        model.load_state_dict(torch.load(f"{get_config().mdl_dir}/{gid_parent_run}.pth", map_location="cpu"))
+        model = model.to(device)
+        batch_size = self._batch_size(unit, model, train_dataset, device)
+        return self._fit(
+            unit,
+            model,
+            Trainer._loader(train_dataset, batch_size, self.budget.loader_workers),
+            Trainer._loader(val_dataset, batch_size, self.budget.loader_workers),
+            device,
+            ckpt=ckpt,
+            data_end=df["date"].max()
+        )
 
-        for epoch in range(epochs):
-            # Training phase
-            model.train()
-            train_loss = 0
-            for x_batch, y_batch in train_loader:
-                x_batch, y_batch = x_batch.to(device), y_batch.to(device)
+    def _walk_forward(self, unit:JobUnit, df:pd.DataFrame, spec:WindowSpec) -> torch.nn.Module:
+        """
+        Walk-forward training over 'folds' consecutive validation blocks. Each
+        fold trains on the rows before its block ('expanding'), or the last
+        'fold_window' of them ('rolling'), starting from the previous fold's
+        best weights. The series is scaled once with a scaler fit on the rows
+        before the first block, so no fold sees scaling from its own future.
+        The last fold's weights are the run's artifact.
+        """
+        if not spec.chronological:
+            raise ValueError("Walk-forward training needs chronological windows")
+        gid_training_run = self.config.get("gid_training_run")
+        ticker = self.config.get("ticker")
+        mode = self.config.get("fold_mode") or "expanding"
+        bounds = Trainer.fold_bounds(
+            len(df),
+            self.config.get("folds"),
+            self.config.get("train_split"),
+            spec,
+            mode=mode,
+            window=self.config.get("fold_window")
+        )
 
-                optimizer.zero_grad()
-                y_pred = model(x_batch)
-                loss:torch.Tensor = criterion(y_pred, y_batch)
-                loss.backward()
+        scaler = MinMaxScaler().fit(df.iloc[:bounds[0][1]][spec.f_cols].values)
+        joblib.dump(scaler, f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl")
+        data = torch.tensor(scaler.transform(df[spec.f_cols].values), dtype=torch.float32)
+        dates = df["date"].tolist()
 
-                # Gradient clipping to prevent exploding gradients
-                torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=grad_clip)
+        self.config["window"] = spec.to_dict()
+        self.config["data_end"] = str(df["date"].max())
+        self.training_run.data = {**self.config}
 
-                optimizer.step()
-                train_loss += loss.item()
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model = Trainer._build_model(self.config, spec).to(device)
+        profiler = TrainingProfiler(device)
+        folds = []
+        for i, (start, val_start, val_end) in enumerate(bounds):
+            unit.log(f"Fold {i+1}/{len(bounds)} - Train rows {start}-{val_start-1}, Validation rows {val_start}-{val_end-1}")
+            L.info(f"Fold {i+1}/{len(bounds)} - Train rows {start}-{val_start-1}, Validation rows {val_start}-{val_end-1}")
+            # Validation windows take their inputs from the rows before the block
+            train_dataset = TimeSeriesLSTM.from_scaled(data[start:val_start], ticker=ticker, spec=spec, scaler=scaler)
+            val_dataset = TimeSeriesLSTM.from_scaled(data[val_start - spec.span + 1:val_end], ticker=ticker, spec=spec, scaler=scaler)
+            if i == 0:
+                batch_size = self._batch_size(unit, model, train_dataset, device)
+            best_state, metrics = self._run_epochs(
+                unit,
+                model,
+                Trainer._loader(train_dataset, batch_size, self.budget.loader_workers),
+                Trainer._loader(val_dataset, batch_size, self.budget.loader_workers),
+                device,
+                epochs=self.config.get("fold_epochs"),
+                checkpoint=False,
+                profiler=profiler
+            )
+            folds.append({
+                "fold": i,
+                "train_start": str(dates[start]),
+                "train_end": str(dates[val_start - 1]),
+                "val_end": str(dates[val_end - 1]),
+                "train_windows": len(train_dataset),
+                "val_windows": len(val_dataset),
+                "epochs": len(metrics["val_losses"]),
+                "best_epoch": metrics["best_epoch"],
+                "best_val_loss": metrics["best_val_loss"],
+                "final_train_loss": metrics["final_train_loss"]
+            })
+            unit.stat(f"Fold {i+1} best val loss", metrics["best_val_loss"])
+            if i < len(bounds) - 1:
+                best_state.close()
+        profiler.end_run(unit)
+
+        self.config["walk_forward"] = {
+            "mode": mode,
+            "folds": folds,
+            "mean_val_loss": sum(f["best_val_loss"] for f in folds) / len(folds)
+        }
+        # The artifact is the last fold's model
+        start, val_start, val_end = bounds[-1]
+        self.config["split"] = Trainer.split_range(dates[start:val_start], dates[val_start - spec.span + 1:val_end])
+        self.training_run.data = {**self.config}
+        self._save_artifacts(unit, best_state, {**metrics, "folds": folds})
+        return model
+
+    @staticmethod
+    def fold_bounds(
+        rows:int,
+        folds:int,
+        train_split:float,
+        spec:WindowSpec,
+        mode:str="expanding",
+        window:int=None
+    ) -> list[tuple[int, int, int]]:
+        """
+        Splits rows into walk-forward folds as (train_start, val_start, val_end)
+        row indices. The first train_split of the rows is the initial training
+        block; the rest is cut into 'folds' equal validation blocks, the last
+        taking any remainder. Rolling folds train on the last 'window' rows
+        (default: the initial block) before their validation block.
+        """
+        if mode not in ("expanding", "rolling"):
+            raise ValueError(f"Unknown fold_mode '{mode}' - use 'expanding' or 'rolling'")
+        initial = int(train_split * rows)
+        block = (rows - initial) // folds if folds > 0 else 0
+        if block < 1:
+            raise ValueError(f"Cannot cut {rows} rows into {folds} folds after {initial} training rows")
+        window = window or initial
+
+        bounds = []
+        for i in range(folds):
+            val_start = initial + i * block
+            val_end = rows if i == folds - 1 else val_start + block
+            start = max(0, val_start - window) if mode == "rolling" else 0
+            if spec.count(val_start - start) == 0:
+                raise ValueError(f"Fold {i+1} has no training windows ({val_start - start} rows)")
+            bounds.append((start, val_start, val_end))
+        return bounds
+
+    @staticmethod
+    def split_range(train_dates:Sequence[Any], val_dates:Sequence[Any]) -> dict[str, list[str]]:
+        """
+        The bars a run trained and validated on, as inclusive [first, last]
+        dates. Jobs which work from a trained run (distillation, quantization)
+        select its splits with these rather than re-deriving them.
+        """
+        return {
+            "train": [str(min(train_dates)), str(max(train_dates))] if len(train_dates) else None,
+            "validation": [str(min(val_dates)), str(max(val_dates))] if len(val_dates) else None
+        }
+
+    def _batch_size(self, unit:JobUnit, model:torch.nn.Module, dataset:"TimeSeriesLSTM", device:torch.device) -> int:
+        """
+        The configured batch_size, or with auto_batch the size a BatchSizeProbe
+        picks for this model, data and worker. The choice is recorded under
+        'batch_probe', and a resumed run keeps it.
+        """
+        if not self.config.get("auto_batch"):
+            return self.config.get("batch_size")
+        if self.config.get("batch_probe"):
+            return self.config["batch_probe"]["chosen"]
+        probe = BatchSizeProbe.from_config(self.config, device)
+        chosen = probe.choose(model, dataset, self.config.get("learning_rate"))
+        self.config["batch_probe"] = probe.record(unit, chosen)
+        self.training_run.data = {**self.config}
+        return chosen
+
+    def _fit(
+        self,
+        unit:JobUnit,
+        model:torch.nn.Module,
+        train_loader:Iterable[tuple[torch.Tensor, ...]],
+        val_loader:Iterable[tuple[torch.Tensor, ...]],
+        device:torch.device,
+        ckpt:dict[str, Any]=None,
+        data_end:Any=None
+    ) -> torch.nn.Module:
+        """
+        Runs the training loop for this run's config - LR scheduling, early stopping,
+        checkpointing - then writes the best weights and metrics artifacts.
+        data_end is the last bar trained on, recorded in checkpoints.
+        """
+        best_state, metrics = self._run_epochs(unit, model, train_loader, val_loader, device, ckpt=ckpt, data_end=data_end)
+        self._save_artifacts(unit, best_state, metrics)
+        return model
+
+    def _save_artifacts(self, unit:JobUnit, best_state:BestState, metrics:dict[str, Any]) -> None:
+        """
+        Writes the final weights and metrics of the run and drops its checkpoint
+        """
+        gid_training_run = self.config.get("gid_training_run")
+        best_state.save(f"{get_config().mdl_dir}/{gid_training_run}.pth")
+        best_state.close()
+        Checkpoint.clear(gid_training_run)
+        joblib.dump(metrics, f"{get_config().obj_dir}/{gid_training_run}_metrics.pkl")
 
-            train_loss = train_loss / len(train_loader)
+        unit.log(f"Training complete! Best Val Loss: {metrics['best_val_loss']:.6f} at epoch {metrics['best_epoch']+1}")
+        L.info(f"Training complete! Best Val Loss: {metrics['best_val_loss']:.6f} at epoch {metrics['best_epoch']+1}")
+
+    def _run_epochs(
+        self,
+        unit:JobUnit,
+        model:torch.nn.Module,
+        train_loader:Iterable[tuple[torch.Tensor, ...]],
+        val_loader:Iterable[tuple[torch.Tensor, ...]],
+        device:torch.device,
+        ckpt:dict[str, Any]=None,
+        data_end:Any=None,
+        epochs:int=None,
+        checkpoint:bool=True,
+        profiler:TrainingProfiler=None
+    ) -> tuple[BestState, dict[str, Any]]:
+        """
+        Runs this run's EpochLoop with its logging, profiling and checkpoints.
+        Leaves the best weights loaded in the model and returns them with the
+        run's metrics. Checkpoints are only written if checkpoint
+        is set; the profiler's run summary is only written if it was created here.
+        """
+        gid_training_run = self.config.get("gid_training_run")
+        epochs = epochs or self.config.get("epochs")
+        checkpoint_every = self.config.get("checkpoint_every") or 0
 
-            # Validation phase
-            model.eval()
-            val_loss = 0
-            with torch.no_grad():
-                for x_batch, y_batch in val_loader:
-                    x_batch, y_batch = x_batch.to(device), y_batch.to(device)
-                    y_pred = model(x_batch)
-                    loss = criterion(y_pred, y_batch)
-                    val_loss += loss.item()
+        owns_profiler = profiler is None
+        profiler = profiler or TrainingProfiler(device)
 
-            val_loss = val_loss / len(val_loader)
+        # Early stopping setup - best weights are kept in memory
+        best_state = BestState(gid_training_run, persist=self.config.get("persist_best", False))
+        loop = EpochLoop(self.config, model, device, best_state)
+        if ckpt:
+            loop.load(ckpt)
+            torch.set_rng_state(ckpt["rng_state"])
 
-            # Track metrics
-            train_losses.append(train_loss)
-            val_losses.append(val_loss)
-            current_lr = optimizer.param_groups[0]['lr']
-            learning_rates.append(current_lr)
+        L.info(f"Starting training for {epochs} epochs...")
 
+        for epoch in loop.epochs(train_loader, val_loader, epochs, profiler):
+            train_loss, val_loss, current_lr = loop.train_losses[-1], loop.val_losses[-1], loop.learning_rates[-1]
             unit.log(f"Epoch {epoch+1}/{epochs} - Train Loss: {train_loss:.6f}, Val Loss: {val_loss:.6f}, LR: {current_lr:.6f}")
             L.info(f"Epoch {epoch+1}/{epochs} - Train Loss: {train_loss:.6f}, Val Loss: {val_loss:.6f}, LR: {current_lr:.6f}")
 
-            # Learning rate scheduling
-            scheduler.step(val_loss)
-
-            # Early stopping check
-            if val_loss < best_val_loss:
-                best_val_loss = val_loss
-                best_epoch = epoch
-                patience_counter = 0
-                # Save best model
-                torch.save(model.state_dict(), f"{get_config().mdl_dir}/{gid_training_run}_best.pth")
-                L.info(f"New best model saved! Val Loss: {best_val_loss:.6f}")
-            else:
-                patience_counter += 1
-
-            if patience_counter >= patience:
-                L.info(f"Early stopping triggered at epoch {epoch+1}. Best epoch was {best_epoch+1}")
-                break
-
-        # Load best model weights
-        model.load_state_dict(torch.load(f"{get_config().mdl_dir}/{gid_training_run}_best.pth"))
-
-        # Save final model and clean up checkpoint
-        best_path = f"{get_config().mdl_dir}/{gid_training_run}_best.pth"
-        torch.save(model.state_dict(), f"{get_config().mdl_dir}/{gid_training_run}.pth")
-        os.remove(best_path)
-
-        # Save training metrics
-        metrics = {
-            'train_losses': train_losses,
-            'val_losses': val_losses,
-            'learning_rates': learning_rates,
-            'best_epoch': best_epoch,
-            'best_val_loss': best_val_loss,
-            'final_train_loss': train_losses[-1],
-            'final_val_loss': val_losses[-1]
-        }
-        joblib.dump(metrics, f"{get_config().obj_dir}/{gid_training_run}_metrics.pkl")
+            p = profiler.end_epoch(unit)
+            timings = (
+                f"Epoch {epoch+1} timings - Data: {p['data']:.3f}s, Forward: {p['forward']:.3f}s, "
+                f"Backward: {p['backward']:.3f}s, Optimizer: {p['optimizer']:.3f}s, Validation: {p['validation']:.3f}s, "
+                f"Samples/s: {p['samples_per_s']:.0f}, Peak RSS: {p['peak_rss_mb']:.0f}MB, Threads: {p['torch_threads']}"
+            )
+            unit.log(timings)
+            L.info(timings)
+
+            if loop.best_epoch == epoch:
+                L.info(f"New best model! Val Loss: {loop.best_val_loss:.6f}")
+
+            if checkpoint and checkpoint_every and (epoch + 1) % checkpoint_every == 0:
+                Checkpoint.save(gid_training_run, {
+                    **loop.state(),
+                    "data_end": data_end,
+                    "rng_state": torch.get_rng_state()
+                })
+
+            if loop.stopped:
+                L.info(f"Early stopping triggered at epoch {epoch+1}. Best epoch was {loop.best_epoch+1}")
+
+        if owns_profiler:
+            profiler.end_run(unit)
+
+        return best_state, loop.finish()
+
+    @staticmethod
+    def _loader(dataset:"TimeSeriesLSTM", batch_size:int, num_workers:int=0) -> DataLoader:
+        """
+        Batches are contiguous slices of the window view, so there is no
+        per-sample indexing or collation. num_workers comes from the job's
+        ThreadBudget and is 0 (no worker IPC) unless configured.
+        """
+        return DataLoader(
+            dataset,
+            sampler=ContiguousBatchSampler(len(dataset), batch_size),
+            batch_size=None,
+            num_workers=num_workers,
+            persistent_workers=num_workers > 0,
+            pin_memory=True if torch.cuda.is_available() else False
+        )
 
-        unit.log(f"Training complete! Best Val Loss: {best_val_loss:.6f} at epoch {best_epoch+1}")
-        L.info(f"Training complete! Best Val Loss: {best_val_loss:.6f} at epoch {best_epoch+1}")
+    @staticmethod
+    def _build_model(config:dict[str, Any], spec:WindowSpec) -> torch.nn.Module:
+        """
+        The run's architecture ('arch': lstm, gru or tcn) sized for the window
+        """
+        return build_model(config, spec.n_features, spec.n_targets)
+
+    @staticmethod
+    def _train_epoch(
+        model:torch.nn.Module,
+        batches:Iterable[tuple[torch.Tensor, ...]],
+        criterion:torch.nn.Module,
+        optimizer:torch.optim.Optimizer,
+        grad_clip:float,
+        device:torch.device,
+        profiler:TrainingProfiler=None
+    ) -> float:
+        """
+        Runs one pass over the training batches and returns the mean batch loss.
+        Batches are (*inputs, y); the inputs are passed to the model positionally.
+        Phases are timed on the profiler if one is given.
+        """
+        profiler = profiler or TrainingProfiler()
+        model.train()
+        train_loss = 0
+        n = 0
+        for *x_batch, y_batch in profiler.iterate(batches):
+            with profiler.phase("data"):
+                x_batch, y_batch = [x.to(device) for x in x_batch], y_batch.to(device)
+
+            with profiler.phase("forward"):
+                optimizer.zero_grad()
+                y_pred = model(*x_batch)
+                loss:torch.Tensor = criterion(y_pred, y_batch)
 
-        return model
+            with profiler.phase("backward"):
+                loss.backward()
+
+            with profiler.phase("optimizer"):
+                # Gradient clipping to prevent exploding gradients
+                torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=grad_clip)
+                optimizer.step()
+
+            train_loss += loss.item()
+            profiler.samples(len(y_batch))
+            n += 1
+
+        return train_loss / n
+
+    @staticmethod
+    def _validate(
+        model:torch.nn.Module,
+        batches:Iterable[tuple[torch.Tensor, ...]],
+        criterion:torch.nn.Module,
+        device:torch.device
+    ) -> float:
+        """
+        Returns the mean batch loss over the validation batches
+        """
+        model.eval()
+        val_loss = 0
+        n = 0
+        with torch.no_grad():
+            for *x_batch, y_batch in batches:
+                x_batch, y_batch = [x.to(device) for x in x_batch], y_batch.to(device)
+                y_pred = model(*x_batch)
+                loss = criterion(y_pred, y_batch)
+                val_loss += loss.item()
+                n += 1
+
+        return val_loss / n
+
+class EpochLoop:
+    """
+    The epoch loop shared by the trainers: Adam, ReduceLROnPlateau on the
+    validation loss, early stopping after 'patience' epochs without a new best
+    and the best weights kept in a BestState.
+
+    The loop can be paused and picked up again: state() holds everything
+    needed to resume it with load(), so the same loop backs checkpoints and
+    sweep rungs. Callers log, checkpoint, etc. between the epochs it yields.
+    """
+
+    def __init__(
+        self,
+        config:dict[str, Any],
+        model:torch.nn.Module,
+        device:torch.device,
+        best_state:BestState,
+        criterion:torch.nn.Module=None
+    ):
+        self.model = model
+        self.device = device
+        self.best_state = best_state
+        self.patience = config.get("patience")
+        self.grad_clip = config.get("grad_clip")
+        self.criterion = criterion or torch.nn.MSELoss()
+        self.optimizer = torch.optim.Adam(model.parameters(), lr=config.get("learning_rate"), weight_decay=config.get("weight_decay"))
+        # Reduces LR when validation loss plateaus
+        self.scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(self.optimizer, mode='min', factor=0.5, patience=5)
+
+        self.epoch = -1
+        self.best_val_loss = float('inf')
+        self.best_epoch = 0
+        self.patience_counter = 0
+        self.stopped = False
+        self.train_losses:list[float] = []
+        self.val_losses:list[float] = []
+        self.learning_rates:list[float] = []
+
+    def load(self, state:dict[str, Any]) -> None:
+        """
+        Resumes from a state() - the model, optimizer and scheduler states,
+        the best weights and the loop's counters and metrics
+        """
+        self.model.load_state_dict(state["model"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.scheduler.load_state_dict(state["scheduler"])
+        if state["best_state"] is not None:
+            self.best_state.load(state["best_state"])
+        self.epoch = state["epoch"]
+        self.best_val_loss = state["best_val_loss"]
+        self.best_epoch = state["best_epoch"]
+        self.patience_counter = state["patience_counter"]
+        self.stopped = state.get("stopped", False)
+        self.train_losses = state["train_losses"]
+        self.val_losses = state["val_losses"]
+        self.learning_rates = state["learning_rates"]
+
+    def state(self) -> dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "model": self.model.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "scheduler": self.scheduler.state_dict(),
+            "best_state": self.best_state.state,
+            "best_val_loss": self.best_val_loss,
+            "best_epoch": self.best_epoch,
+            "patience_counter": self.patience_counter,
+            "stopped": self.stopped,
+            "train_losses": self.train_losses,
+            "val_losses": self.val_losses,
+            "learning_rates": self.learning_rates
+        }
+
+    def epochs(
+        self,
+        train_batches:Iterable[tuple[torch.Tensor, ...]],
+        val_batches:Iterable[tuple[torch.Tensor, ...]],
+        until:int,
+        profiler:TrainingProfiler=None
+    ) -> Iterator[int]:
+        """
+        Trains up to epoch 'until' (exclusive), yielding each epoch's index once
+        its losses, LR step and best weights are recorded. Ends early once the
+        patience runs out.
+        """
+        profiler = profiler or TrainingProfiler()
+        while not self.stopped and self.epoch + 1 < until:
+            self.epoch += 1
+            train_loss = Trainer._train_epoch(self.model, train_batches, self.criterion, self.optimizer, self.grad_clip, self.device, profiler)
+            with profiler.phase("validation"):
+                val_loss = Trainer._validate(self.model, val_batches, self.criterion, self.device)
+
+            self.train_losses.append(train_loss)
+            self.val_losses.append(val_loss)
+            self.learning_rates.append(self.optimizer.param_groups[0]['lr'])
+            self.scheduler.step(val_loss)
+
+            if val_loss < self.best_val_loss:
+                self.best_val_loss = val_loss
+                self.best_epoch = self.epoch
+                self.patience_counter = 0
+                self.best_state.update(self.model)
+            else:
+                self.patience_counter += 1
+            self.stopped = self.patience_counter >= self.patience
+            yield self.epoch
+
+    def run(
+        self,
+        train_batches:Iterable[tuple[torch.Tensor, ...]],
+        val_batches:Iterable[tuple[torch.Tensor, ...]],
+        until:int
+    ) -> None:
+        for _ in self.epochs(train_batches, val_batches, until):
+            pass
+
+    def finish(self) -> dict[str, Any]:
+        """
+        Leaves the best weights in the model and returns the run's metrics
+        """
+        if not self.best_state.restore(self.model):
+            self.best_state.update(self.model)
+        return {
+            'train_losses': self.train_losses,
+            'val_losses': self.val_losses,
+            'learning_rates': self.learning_rates,
+            'best_epoch': self.best_epoch,
+            'best_val_loss': self.best_val_loss,
+            'final_train_loss': self.train_losses[-1],
+            'final_val_loss': self.val_losses[-1]
+        }
 
 class TimeSeriesLSTM(Dataset):
-    def __init__(self, df:pd.DataFrame, ticker:str, seq_len:int=10, feature_cols:list[str]=None, scaler:MinMaxScaler=None, scaler_path:str=None):
-        self.seq_len = seq_len
-        self.f_cols = feature_cols
+    """
+    Sliding-window dataset over a scaled feature tensor. Every window is a view
+    into a single unfold() of the data, so indexing with a slice returns a whole
+    batch of windows without copying.
+    """
+    def __init__(self, df:pd.DataFrame, ticker:str, seq_len:int=10, feature_cols:list[str]=None, scaler:MinMaxScaler=None, scaler_path:str=None, spec:WindowSpec=None):
+        self.spec = spec if spec is not None else WindowSpec(feature_cols, seq_len=seq_len)
+        self.seq_len = self.spec.seq_len
+        self.f_cols = self.spec.f_cols
         self.ticker = ticker
 
         features = df[self.f_cols].values
@@ -229,11 +790,105 @@ class TimeSeriesLSTM(Dataset):
                 joblib.dump(self.scaler, scaler_path)
 
         self.data = torch.tensor(scaled, dtype=torch.float32)
+        self.x, self.y = self.spec.windows(self.data)
+
+    @classmethod
+    def from_scaled(cls, data:torch.Tensor, ticker:str, spec:WindowSpec, scaler:MinMaxScaler) -> "TimeSeriesLSTM":
+        """
+        Dataset over rows that are already scaled, e.g. a slice of a series
+        scaled once for several folds. data is used as is, without a copy.
+        """
+        dataset = cls.__new__(cls)
+        dataset.spec = spec
+        dataset.seq_len = spec.seq_len
+        dataset.f_cols = spec.f_cols
+        dataset.ticker = ticker
+        dataset.scaler = scaler
+        dataset.data = data
+        dataset.x, dataset.y = spec.windows(data)
+        return dataset
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, index:int|slice) -> tuple[torch.Tensor, torch.Tensor]:
+        return self.x[index], self.y[index]
+
+class StreamingTimeSeries(IterableDataset):
+    """
+    Sliding-window batches over a ticker's series, read from the DB in
+    chunks of chunk_rows bars keyset-paginated on SERIES_KEY, and scaled with
+    a precomputed scaler. The last rows of each chunk that have not started a window yet
+    are carried into the next, so windows span chunk boundaries and only one
+    chunk is held at a time. Yields (x, y) batches in order; use with
+    DataLoader(batch_size=None).
+
+    after/until bound the series by date (after is exclusive).
+    """
+    def __init__(
+        self,
+        ticker_gid:int,
+        spec:WindowSpec,
+        scaler:MinMaxScaler,
+        after:date=None,
+        until:date=None,
+        batch_size:int=64,
+        chunk_rows:int=10000
+    ):
+        if chunk_rows < spec.span:
+            raise ValueError(f"chunk_rows {chunk_rows} is shorter than a window ({spec.span} rows)")
+        self.ticker_gid = ticker_gid
+        self.spec = spec
+        self.scaler = scaler
+        self.after = after
+        self.until = until
+        self.batch_size = batch_size
+        self.chunk_rows = chunk_rows
+
+    @staticmethod
+    def scaler_from_range(mins:list[float], maxs:list[float]) -> MinMaxScaler:
+        """
+        A MinMaxScaler equal to one fit on any data with these per-column bounds
+        """
+        return MinMaxScaler().fit(np.array([mins, maxs], dtype=np.float64))
+
+    def _chunks(self) -> Iterator[np.ndarray]:
+        cursor = None
+        while True:
+            rows = TickerTimeseries._chunk(self.ticker_gid, self.spec.f_cols, after=self.after, until=self.until, cursor=cursor, limit=self.chunk_rows)
+            if not rows:
+                return
+            cursor = rows[-1][:len(SERIES_KEY)]
+            yield np.array([r[len(SERIES_KEY):] for r in rows], dtype=np.float64)
+            if len(rows) < self.chunk_rows:
+                return
+
+    def __iter__(self) -> Iterator[tuple[torch.Tensor, torch.Tensor]]:
+        tail = None
+        for chunk in self._chunks():
+            scaled = torch.tensor(self.scaler.transform(chunk), dtype=torch.float32)
+            data = scaled if tail is None else torch.cat([tail, scaled])
+            x, y = self.spec.windows(data)
+            for s in ContiguousBatchSampler(len(x), self.batch_size):
+                yield x[s], y[s]
+            # Rows from the next window's start on are still needed
+            tail = data[len(x) * self.spec.stride:]
+
+class ContiguousBatchSampler(Sampler[slice]):
+    """
+    Yields in-order slices of batch_size indices. Used with DataLoader(batch_size=None)
+    so each batch is fetched from the dataset in a single indexing call.
+    """
+    def __init__(self, length:int, batch_size:int, drop_last:bool=False):
+        self.length = length
+        self.batch_size = batch_size
+        self.drop_last = drop_last
 
     def __len__(self) -> int:
-        return len(self.data) - self.seq_len
+        if self.drop_last:
+            return self.length // self.batch_size
+        return (self.length + self.batch_size - 1) // self.batch_size
 
-    def __getitem__(self, index) -> tuple[torch.Tensor, torch.Tensor]:
-        x = self.data[index:index + self.seq_len]
-        y = self.data[index + self.seq_len][:]
-        return x, y
+    def __iter__(self):
+        for start in range(0, len(self) * self.batch_size, self.batch_size):
+            yield slice(start, min(start + self.batch_size, self.length))
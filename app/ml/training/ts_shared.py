@@ -0,0 +1,180 @@
+from typing import Any, Iterator
+
+import joblib
+import torch
+from sklearn.preprocessing import MinMaxScaler
+from torch.utils.data import Dataset, DataLoader, Sampler
+
+from app.batch.models.job_unit import JobUnit
+from app.core.config.config import get_config
+from app.core.utils.logger import get_logger
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.model_defs.lstm import SharedLSTMModel
+from app.ml.training.checkpoint import Checkpoint
+from app.ml.training.ts_lstm import ContiguousBatchSampler, TimeSeriesLSTM, Trainer
+
+L = get_logger(__name__)
+
+class SharedTrainer(Trainer):
+    """
+    Trains one SharedLSTMModel across many tickers.
+
+    Config is the usual Trainer config plus:
+        tickers - tickers to train on, or
+        market - train on every active ticker of the market
+        embedding_dim - size of the learned ticker embedding
+
+    Each ticker is scaled on its own and split in time on its own. All scalers
+    are written to a single {gid}_scaler.pkl as {ticker: MinMaxScaler}; its
+    order is the ticker's embedding index.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    async def _train(self, unit:JobUnit) -> SharedLSTMModel:
+        spec = WindowSpec.from_config(self.config)
+        gid_training_run = self.config.get("gid_training_run")
+        batch_size = self.config.get("batch_size")
+        train_split = self.config.get("train_split")
+        scaler_path = f"{get_config().obj_dir}/{gid_training_run}_scaler.pkl"
+
+        # On resume the vocabulary is fixed by the saved scalers
+        ckpt = Checkpoint.load(gid_training_run)
+        if ckpt:
+            scalers:dict[str, MinMaxScaler] = joblib.load(scaler_path)
+            tickers = list(scalers.keys())
+            unit.log(f"Resuming from checkpoint after epoch {ckpt['epoch']+1}")
+            L.info(f"Resuming TrainingRun {gid_training_run} from checkpoint after epoch {ckpt['epoch']+1}")
+        else:
+            scalers = {}
+            tickers = await self._tickers()
+
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        L.info(f"Training shared model on device: {device}")
+
+        train_series:list[torch.Tensor] = []
+        val_series:list[torch.Tensor] = []
+        data_end = None
+        for ticker in tickers:
+            df = await self._timed_load(unit, ascending=spec.chronological, ticker=ticker)
+            if ckpt:
+                df = df[df["date"] <= ckpt["data_end"]]
+            train_size = int(train_split * len(df))
+            if not ckpt and (spec.count(train_size) == 0 or spec.count(len(df) - train_size) == 0):
+                unit.log(f"Skipping {ticker} - not enough data ({len(df)} rows)")
+                continue
+
+            train_dataset = TimeSeriesLSTM(df.iloc[:train_size], ticker=ticker, spec=spec, scaler=scalers.get(ticker))
+            val_dataset = TimeSeriesLSTM(df.iloc[train_size:], ticker=ticker, spec=spec, scaler=train_dataset.scaler)
+            scalers[ticker] = train_dataset.scaler
+            train_series.append(train_dataset.data)
+            val_series.append(val_dataset.data)
+            data_end = df["date"].max() if data_end is None else max(data_end, df["date"].max())
+
+        if not scalers:
+            raise ValueError("No ticker has enough data to train")
+        if not ckpt:
+            joblib.dump(scalers, scaler_path)
+
+        self.config["window"] = spec.to_dict()
+        self.config["tickers"] = list(scalers.keys())
+        self.config["n_tickers"] = len(scalers)
+        self.training_run.data = {**self.config}
+
+        train_dataset = SharedWindows(train_series, spec)
+        val_dataset = SharedWindows(val_series, spec)
+        L.info(f"{len(scalers)} tickers - Train windows: {len(train_dataset)}, Validation windows: {len(val_dataset)}")
+
+        # Contiguous batches would hold a single ticker, so training batches
+        # are drawn across tickers. The split itself stays temporal per ticker.
+        train_loader = DataLoader(
+            train_dataset,
+            sampler=ShuffledBatchSampler(len(train_dataset), batch_size),
+            batch_size=None,
+            num_workers=self.budget.loader_workers,
+            persistent_workers=self.budget.loader_workers > 0,
+            pin_memory=True if torch.cuda.is_available() else False
+        )
+        val_loader = DataLoader(
+            val_dataset,
+            sampler=ContiguousBatchSampler(len(val_dataset), batch_size),
+            batch_size=None,
+            num_workers=self.budget.loader_workers,
+            persistent_workers=self.budget.loader_workers > 0,
+            pin_memory=True if torch.cuda.is_available() else False
+        )
+
+        model = SharedTrainer._build_model(self.config, spec).to(device)
+        return self._fit(unit, model, train_loader, val_loader, device, ckpt=ckpt, data_end=data_end)
+
+    async def _tickers(self) -> list[str]:
+        tickers = self.config.get("tickers")
+        if tickers:
+            return list(tickers)
+        market = self.config.get("market")
+        if market:
+            return [t.ticker for t in await Ticker.findAllByMarket(market) if t.active]
+        raise ValueError("Shared model needs 'tickers' or 'market'")
+
+    @staticmethod
+    def _build_model(config:dict[str, Any], spec:WindowSpec) -> SharedLSTMModel:
+        return SharedLSTMModel(
+            n_tickers=config.get("n_tickers"),
+            embedding_dim=config.get("embedding_dim") or 8,
+            input_size=spec.n_features,
+            hidden_size=config.get("hidden_size"),
+            num_layers=config.get("num_layers"),
+            output_size=spec.n_targets,
+            dropout=config.get("dropout")
+        )
+
+class SharedWindows(Dataset):
+    """
+    Windows over many scaled series. The series are concatenated into one
+    (rows, features) tensor and each window is kept as its start row and
+    ticker index, so windows never span two tickers and nothing is copied
+    until a batch is gathered.
+
+    Items are (x, ticker_idx, y).
+    """
+    def __init__(self, series:list[torch.Tensor], spec:WindowSpec):
+        self.spec = spec
+        self.data = torch.cat(series) if series else torch.empty((0, spec.n_features))
+        starts = []
+        ticker_idx = []
+        offset = 0
+        for i, s in enumerate(series):
+            n = spec.count(len(s))
+            starts.append(offset + torch.arange(n) * spec.stride)
+            ticker_idx.append(torch.full((n,), i, dtype=torch.long))
+            offset += len(s)
+        self.starts = torch.cat(starts) if starts else torch.empty(0, dtype=torch.long)
+        self.ticker_idx = torch.cat(ticker_idx) if ticker_idx else torch.empty(0, dtype=torch.long)
+        self._steps = torch.arange(spec.seq_len)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index:int|slice|torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        starts = self.starts[index]
+        x = self.data[starts[..., None] + self._steps]
+        y = self.data[starts + self.spec.span - 1][..., self.spec.t_idx]
+        return x, self.ticker_idx[index], y
+
+class ShuffledBatchSampler(Sampler[torch.Tensor]):
+    """
+    Yields a fresh random permutation of the indices, batch_size at a time,
+    for use with DataLoader(batch_size=None). Draws from torch's global RNG
+    so checkpointed runs resume with the same order.
+    """
+    def __init__(self, length:int, batch_size:int):
+        self.length = length
+        self.batch_size = batch_size
+
+    def __iter__(self) -> Iterator[torch.Tensor]:
+        yield from torch.randperm(self.length).split(self.batch_size)
+
+    def __len__(self) -> int:
+        return (self.length + self.batch_size - 1) // self.batch_size
@@ -0,0 +1,49 @@
+"""
+Unit tests for app/ml/model_defs/architectures.py, gru.py and tcn.py
+
+Every architecture must take and return the LSTMModel shapes, and the TCN
+must be causal.
+"""
+
+import pytest
+import torch
+
+from app.ml.model_defs.architectures import build_model
+from app.ml.model_defs.gru import GRUModel
+from app.ml.model_defs.lstm import LSTMModel
+from app.ml.model_defs.tcn import TCNModel
+
+
+CONFIG = {"hidden_size": 8, "num_layers": 2, "dropout": 0.0}
+
+
+class TestBuildModel:
+    @pytest.mark.parametrize("arch,cls", [(None, LSTMModel), ("lstm", LSTMModel), ("gru", GRUModel), ("tcn", TCNModel)])
+    def test_builds_arch(self, arch, cls):
+        model = build_model({**CONFIG, "arch": arch}, input_size=3, output_size=2)
+        assert isinstance(model, cls)
+        assert model(torch.randn(4, 10, 3)).shape == (4, 2)
+
+    def test_unknown_arch_raises(self):
+        with pytest.raises(ValueError):
+            build_model({**CONFIG, "arch": "transformer"}, input_size=3, output_size=2)
+
+    def test_tcn_kernel_size_from_config(self):
+        model = build_model({**CONFIG, "arch": "tcn", "kernel_size": 5}, input_size=3, output_size=1)
+        assert model.kernel_size == 5
+
+
+class TestTCNModel:
+    def test_causal(self):
+        torch.manual_seed(0)
+        model = TCNModel(input_size=2, hidden_size=4, num_layers=3, output_size=1, dropout=0.0).eval()
+        x = torch.randn(1, 12, 2)
+        before = model.blocks(x.transpose(1, 2))
+        x[:, 8:] += 10.0
+        after = model.blocks(x.transpose(1, 2))
+        assert torch.allclose(before[:, :, :8], after[:, :, :8])
+        assert not torch.allclose(before[:, :, 8:], after[:, :, 8:])
+
+    def test_receptive_field(self):
+        assert TCNModel.receptive_field(1, 3) == 5
+        assert TCNModel.receptive_field(3, 3) == 29
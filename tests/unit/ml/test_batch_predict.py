@@ -0,0 +1,59 @@
+"""
+Unit tests for app/ml/prediction/batch.py
+
+A grouped forward pass must return what each model returns on its own.
+"""
+
+import torch
+
+from app.ml.model_defs.architectures import build_model, quantize
+from app.ml.prediction.batch import BatchPredictor
+
+
+CONFIG = {"hidden_size": 8, "num_layers": 2, "dropout": 0.2}
+
+
+def model(arch:str="lstm", hidden_size:int=8) -> torch.nn.Module:
+    return build_model({**CONFIG, "arch": arch, "hidden_size": hidden_size}, input_size=3, output_size=2).eval()
+
+
+class TestForward:
+    def test_packed_matches_individual(self):
+        torch.manual_seed(0)
+        inputs = {(gid, None): (model(), torch.randn(1, 10, 3)) for gid in range(5)}
+        outputs = BatchPredictor.forward(inputs)
+        with torch.no_grad():
+            for key, (m, x) in inputs.items():
+                assert torch.allclose(outputs[key], m(x)[0], atol=1e-5)
+
+    def test_mixed_groups(self):
+        torch.manual_seed(0)
+        inputs = {
+            (1, None): (model(), torch.randn(1, 10, 3)),
+            (2, None): (model(), torch.randn(1, 10, 3)),
+            (3, None): (model(hidden_size=4), torch.randn(1, 10, 3)),
+            (4, None): (model(), torch.randn(1, 12, 3)),
+            (5, None): (model("gru"), torch.randn(1, 10, 3)),
+            (6, None): (model("tcn"), torch.randn(1, 10, 3)),
+            (7, "int8"): (quantize(model()), torch.randn(1, 10, 3))
+        }
+        outputs = BatchPredictor.forward(inputs)
+        assert set(outputs) == set(inputs)
+        with torch.no_grad():
+            for key, (m, x) in inputs.items():
+                assert outputs[key].shape == (2,)
+                assert torch.allclose(outputs[key], m(x)[0], atol=1e-5)
+
+
+class TestPackable:
+    def test_float_lstm_groups_by_shape_and_window(self):
+        x = torch.randn(1, 10, 3)
+        assert BatchPredictor.packable(model(), x) == BatchPredictor.packable(model(), x)
+        assert BatchPredictor.packable(model(), x) != BatchPredictor.packable(model(hidden_size=4), x)
+        assert BatchPredictor.packable(model(), x) != BatchPredictor.packable(model(), torch.randn(1, 12, 3))
+
+    def test_other_models_not_packed(self):
+        x = torch.randn(1, 10, 3)
+        assert BatchPredictor.packable(model("gru"), x) is None
+        assert BatchPredictor.packable(model("tcn"), x) is None
+        assert BatchPredictor.packable(quantize(model()), x) is None
@@ -0,0 +1,72 @@
+"""
+Unit tests for app/ml/training/batch_size.py
+
+Selection is tested with measure() stubbed out; one real probe checks that
+the model being trained is left untouched.
+"""
+
+import torch
+
+from app.ml.training.batch_size import BatchSizeProbe
+
+
+class _Windows(torch.utils.data.Dataset):
+    def __init__(self, n:int=256):
+        self.x = torch.randn(n, 5, 2)
+        self.y = torch.randn(n, 1)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        return self.x[index], self.y[index]
+
+
+def _probe(results:dict, **kwargs) -> BatchSizeProbe:
+    probe = BatchSizeProbe(torch.device("cpu"), **kwargs)
+
+    def measure(model, dataset, size, learning_rate):
+        r = results[size]
+        if isinstance(r, BaseException):
+            raise r
+        return r
+
+    probe.measure = measure
+    return probe
+
+
+class TestBatchSizeProbe:
+    def test_candidates_capped_by_windows(self):
+        probe = BatchSizeProbe(torch.device("cpu"), min_batch_size=16, max_batch_size=1024)
+        assert probe.candidates(100) == [16, 32, 64]
+        assert probe.candidates(10) == [16]
+
+    def test_stops_when_throughput_flattens(self):
+        probe = _probe({16: (1000, 10), 32: (1800, 10), 64: (1850, 10), 128: (4000, 10)}, max_batch_size=128)
+        assert probe.choose(None, _Windows()) == 32
+        assert [p["batch_size"] for p in probe.probes] == [16, 32, 64]
+
+    def test_stops_over_budget(self):
+        probe = _probe({16: (1000, 100), 32: (2000, 400), 64: (4000, 900)}, max_batch_size=64, budget_mb=500)
+        assert probe.choose(None, _Windows()) == 32
+
+    def test_stops_on_oom(self):
+        probe = _probe({16: (1000, 10), 32: MemoryError()}, max_batch_size=64)
+        assert probe.choose(None, _Windows()) == 16
+        assert probe.probes[-1] == {"batch_size": 32, "oom": True}
+
+    def test_falls_back_to_min(self):
+        probe = _probe({16: (1000, 900)}, max_batch_size=16, budget_mb=500)
+        assert probe.choose(None, _Windows()) == 16
+
+    def test_real_probe_leaves_model_and_rng(self):
+        model = torch.nn.Sequential(torch.nn.Flatten(), torch.nn.Linear(10, 1))
+        before = {k: v.clone() for k, v in model.state_dict().items()}
+        dataset = _Windows()
+        probe = BatchSizeProbe(torch.device("cpu"), min_batch_size=16, max_batch_size=64, steps=1)
+        rng = torch.get_rng_state()
+        chosen = probe.choose(model, dataset)
+        assert chosen in (16, 32, 64)
+        assert all(torch.equal(before[k], v) for k, v in model.state_dict().items())
+        assert torch.equal(rng, torch.get_rng_state())
+        assert probe.probes[0]["samples_per_s"] > 0
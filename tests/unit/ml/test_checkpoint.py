@@ -0,0 +1,95 @@
+"""
+Unit tests for app/ml/training/checkpoint.py (Checkpoint, BestState)
+
+MDL_DIR is pointed at pytest's tmp_path so real files are written and read.
+"""
+
+import os
+
+import pytest
+import torch
+
+from app.ml.training.checkpoint import BestState, Checkpoint
+
+
+@pytest.fixture
+def mdl_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MDL_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestCheckpoint:
+    def test_path_keyed_by_run(self, mdl_dir):
+        assert Checkpoint.path(42) == f"{mdl_dir}/42_ckpt.pth"
+
+    def test_load_missing_returns_none(self, mdl_dir):
+        assert Checkpoint.load(1) is None
+
+    def test_save_load_round_trip(self, mdl_dir):
+        model = torch.nn.Linear(3, 2)
+        optimizer = torch.optim.Adam(model.parameters())
+        Checkpoint.save(7, {
+            "epoch": 4,
+            "model": model.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "val_losses": [0.5, 0.4],
+        })
+        state = Checkpoint.load(7)
+        assert state["epoch"] == 4
+        assert state["val_losses"] == [0.5, 0.4]
+        assert torch.equal(state["model"]["weight"], model.weight.detach())
+
+    def test_save_leaves_no_temp_file(self, mdl_dir):
+        Checkpoint.save(3, {"epoch": 0})
+        assert os.listdir(mdl_dir) == ["3_ckpt.pth"]
+
+    def test_corrupt_checkpoint_returns_none(self, mdl_dir):
+        with open(Checkpoint.path(5), "wb") as f:
+            f.write(b"not a checkpoint")
+        assert Checkpoint.load(5) is None
+
+    def test_clear(self, mdl_dir):
+        Checkpoint.save(9, {"epoch": 0})
+        Checkpoint.clear(9)
+        Checkpoint.clear(9)
+        assert not os.path.exists(Checkpoint.path(9))
+
+
+class TestBestState:
+    def test_restore_without_update(self, mdl_dir):
+        assert BestState(1).restore(torch.nn.Linear(2, 2)) is False
+
+    def test_update_copies_weights(self, mdl_dir):
+        model = torch.nn.Linear(2, 2)
+        best = BestState(1)
+        best.update(model)
+        before = model.weight.detach().clone()
+        with torch.no_grad():
+            model.weight.add_(1.0)
+        assert torch.equal(best.state["weight"], before)
+        assert best.restore(model) is True
+        assert torch.equal(model.weight.detach(), before)
+
+    def test_no_disk_writes_by_default(self, mdl_dir):
+        best = BestState(1)
+        best.update(torch.nn.Linear(2, 2))
+        best.close()
+        assert os.listdir(mdl_dir) == []
+
+    def test_persist_writes_latest_state(self, mdl_dir):
+        model = torch.nn.Linear(2, 2)
+        best = BestState(2, persist=True)
+        for _ in range(3):
+            with torch.no_grad():
+                model.weight.add_(1.0)
+            best.update(model)
+        best._executor.shutdown(wait=True)
+        on_disk = torch.load(best.path)
+        assert torch.equal(on_disk["weight"], model.weight.detach())
+
+    def test_close_removes_intermediate_file(self, mdl_dir):
+        best = BestState(3, persist=True)
+        best.update(torch.nn.Linear(2, 2))
+        best.save(f"{mdl_dir}/3.pth")
+        best.close()
+        assert os.listdir(mdl_dir) == ["3.pth"]
@@ -0,0 +1,124 @@
+"""
+Unit tests for app/ml/training/distill.py
+
+Student sizing, the teacher's recorded split, the blended distillation
+target and magnitude pruning.
+"""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.ticker import Ticker
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.model_defs.architectures import build_model
+from app.ml.training.distill import Distiller
+
+
+TEACHER = {"arch": "lstm", "hidden_size": 64, "num_layers": 2, "dropout": 0.0, "ticker": "AAPL"}
+
+
+class TestStudentConfig:
+    def test_defaults_to_half_width(self):
+        config = Distiller.student_config(TEACHER, {})
+        assert config["hidden_size"] == 32
+        assert config["num_layers"] == 2
+        assert config["arch"] == "lstm"
+        assert config["ticker"] == "AAPL"
+
+    def test_explicit_size(self):
+        config = Distiller.student_config(TEACHER, {"student_hidden_size": 16, "student_num_layers": 1})
+        assert (config["hidden_size"], config["num_layers"]) == (16, 1)
+
+    def test_larger_than_teacher_raises(self):
+        with pytest.raises(ValueError):
+            Distiller.student_config(TEACHER, {"student_hidden_size": 128})
+
+
+class TestBlendedTarget:
+    def test_same_gradient_as_weighted_losses(self):
+        torch.manual_seed(0)
+        s = torch.randn(8, 2, requires_grad=True)
+        t, y = torch.randn(8, 2), torch.randn(8, 2)
+        alpha = 0.3
+        mse = torch.nn.MSELoss()
+
+        weighted = alpha * mse(s, t) + (1 - alpha) * mse(s, y)
+        (g1,) = torch.autograd.grad(weighted, s)
+        blended = mse(s, alpha * t + (1 - alpha) * y)
+        (g2,) = torch.autograd.grad(blended, s)
+        assert torch.allclose(g1, g2, atol=1e-6)
+
+
+class TestPruning:
+    def test_masks_cover_weight_matrices_only(self):
+        model = build_model({**TEACHER, "hidden_size": 8}, input_size=3, output_size=1)
+        masks = Distiller.magnitude_masks(model, 0.5)
+        assert masks
+        assert all("weight" in n and "bias" not in n for n in masks)
+
+    def test_amount_is_global_fraction(self):
+        model = build_model({**TEACHER, "hidden_size": 8}, input_size=3, output_size=1)
+        masks = Distiller.magnitude_masks(model, 0.5)
+        assert Distiller.sparsity(model, masks) == pytest.approx(0.5, abs=0.01)
+
+    def test_zero_amount_keeps_everything(self):
+        model = build_model({**TEACHER, "hidden_size": 8}, input_size=3, output_size=1)
+        assert Distiller.sparsity(model, Distiller.magnitude_masks(model, 0)) == 0
+
+    def test_apply_masks_zeroes_smallest(self):
+        model = build_model({**TEACHER, "hidden_size": 8}, input_size=3, output_size=1)
+        before = {n: p.detach().clone() for n, p in model.named_parameters()}
+        masks = Distiller.magnitude_masks(model, 0.3)
+        Distiller.apply_masks(model, masks)
+        params = dict(model.named_parameters())
+        for n, mask in masks.items():
+            assert torch.all(params[n][~mask] == 0)
+            assert torch.equal(params[n][mask], before[n][mask])
+        assert torch.equal(params["lstm.bias_ih_l0"], before["lstm.bias_ih_l0"])
+
+    def test_masks_held_through_optimizer_steps(self):
+        torch.manual_seed(0)
+        model = build_model({**TEACHER, "hidden_size": 8}, input_size=3, output_size=1)
+        masks = Distiller.magnitude_masks(model, 0.5)
+        Distiller.apply_masks(model, masks)
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.1)
+        optimizer.register_step_post_hook(lambda *_: Distiller.apply_masks(model, masks))
+        for _ in range(3):
+            optimizer.zero_grad()
+            model(torch.randn(4, 5, 3)).sum().backward()
+            optimizer.step()
+        assert Distiller.sparsity(model, masks) == pytest.approx(0.5, abs=0.01)
+        params = dict(model.named_parameters())
+        assert all(torch.all(params[n][~m] == 0) for n, m in masks.items())
+
+
+class TestSplit:
+    @pytest.fixture
+    def bars(self, mocker):
+        rows = [SimpleNamespace(date=date(2026, 1, 1) + timedelta(days=i), close=float(i)) for i in range(20)]
+        mocker.patch.object(Ticker, "findByTicker", return_value=Ticker(gid=1, ticker="AAPL"))
+        mocker.patch.object(TickerTimeseries, "findByTicker", return_value=list(reversed(rows)))
+
+    async def test_recorded_ranges(self, bars):
+        # e.g. a fine-tune: validation is the tail, inside the training range
+        config = {**TEACHER, "train_split": 0.5, "split": {"train": ["2026-01-05", "2026-01-20"], "validation": ["2026-01-16", "2026-01-20"]}}
+        train_df, val_df = await Distiller.split(config, WindowSpec(["close"], seq_len=2, chronological=True))
+        assert train_df["close"].tolist() == [float(i) for i in range(4, 20)]
+        assert val_df["close"].tolist() == [float(i) for i in range(15, 20)]
+
+    async def test_unrecorded_runs_cut_at_train_split(self, bars):
+        config = {**TEACHER, "train_split": 0.5, "data_end": "2026-01-10"}
+        train_df, val_df = await Distiller.split(config, WindowSpec(["close"], seq_len=2, chronological=True))
+        assert train_df["close"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert val_df["close"].tolist() == [5.0, 6.0, 7.0, 8.0, 9.0]
+
+
+class TestCountParams:
+    def test_student_is_smaller(self):
+        teacher = build_model(TEACHER, input_size=3, output_size=1)
+        student = build_model(Distiller.student_config(TEACHER, {}), input_size=3, output_size=1)
+        assert Distiller.count_params(student) < Distiller.count_params(teacher)
@@ -0,0 +1,68 @@
+"""
+Unit tests for EpochLoop in app/ml/training/ts_lstm.py
+
+A loop paused after some epochs and resumed from its state() must train
+exactly as one that never stopped, and patience must end the loop.
+"""
+
+import torch
+
+from app.ml.training.checkpoint import BestState
+from app.ml.training.ts_lstm import EpochLoop
+
+
+CONFIG = {"learning_rate": 0.01, "weight_decay": 0, "patience": 3, "grad_clip": 1.0}
+DEVICE = torch.device("cpu")
+
+
+def batches() -> list[tuple[torch.Tensor, torch.Tensor]]:
+    g = torch.Generator().manual_seed(0)
+    x = torch.randn(32, 4, generator=g)
+    y = x.sum(1, keepdim=True)
+    return [(x[s:s + 8], y[s:s + 8]) for s in range(0, 32, 8)]
+
+
+def loop(config:dict=CONFIG) -> EpochLoop:
+    torch.manual_seed(0)
+    return EpochLoop(config, torch.nn.Linear(4, 1), DEVICE, BestState(1))
+
+
+class TestEpochLoop:
+    def test_resume_matches_uninterrupted(self):
+        data = batches()
+        whole = loop()
+        whole.run(data, data, 6)
+
+        first = loop()
+        first.run(data, data, 3)
+        resumed = EpochLoop(CONFIG, torch.nn.Linear(4, 1), DEVICE, BestState(1))
+        resumed.load(first.state())
+        resumed.run(data, data, 6)
+
+        assert resumed.epoch == whole.epoch == 5
+        assert resumed.val_losses == whole.val_losses
+        assert torch.equal(resumed.model.weight, whole.model.weight)
+        assert torch.equal(resumed.best_state.state["weight"], whole.best_state.state["weight"])
+
+    def test_yields_each_epoch(self):
+        data = batches()
+        assert list(loop().epochs(data, data, 4)) == [0, 1, 2, 3]
+
+    def test_patience_stops(self):
+        data = batches()
+        # Validation against the wrong targets gets worse as training goes on
+        wrong = [(x, -y) for x, y in data]
+        l = loop()
+        l.run(data, wrong, 50)
+        assert l.stopped
+        assert l.epoch == l.best_epoch + CONFIG["patience"]
+        assert list(l.epochs(data, wrong, 50)) == []
+
+    def test_finish_restores_best(self):
+        data = batches()
+        wrong = [(x, -y) for x, y in data]
+        l = loop()
+        l.run(data, wrong, 50)
+        metrics = l.finish()
+        assert torch.equal(l.model.weight, l.best_state.state["weight"])
+        assert metrics["best_val_loss"] == min(metrics["val_losses"])
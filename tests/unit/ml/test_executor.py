@@ -0,0 +1,110 @@
+"""
+Unit tests for app/ml/prediction/executor.py
+
+Concurrent requests for one model are batched into one forward pass and each
+caller gets its own rows back.
+"""
+
+import asyncio
+import threading
+
+import pytest
+import torch
+
+from app.ml.prediction.executor import InferenceExecutor
+
+
+class Recorder(torch.nn.Module):
+    """
+    Doubles its input and records the batch sizes and threads it ran with
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches:list[int] = []
+        self.threads:set[str] = set()
+
+    def forward(self, x, offset=None):
+        self.batches.append(len(x))
+        self.threads.add(threading.current_thread().name)
+        out = x * 2
+        return out + offset[:, None] if offset is not None else out
+
+
+class Failing(torch.nn.Module):
+    def forward(self, x):
+        raise RuntimeError("boom")
+
+
+class TestSubmit:
+    async def test_concurrent_requests_share_a_batch(self):
+        executor = InferenceExecutor(threads=2, window_ms=20, max_batch=64)
+        model = Recorder()
+        xs = [torch.full((1, 3), float(i)) for i in range(5)]
+        outs = await asyncio.gather(*[executor.submit("m", model, x) for x in xs])
+
+        assert model.batches == [5]
+        for x, out in zip(xs, outs):
+            assert torch.equal(out, x * 2)
+        assert executor.stats()["batches"] == 1
+        assert executor.stats()["mean_batch"] == 5
+
+    async def test_runs_off_the_event_loop(self):
+        executor = InferenceExecutor(threads=1, window_ms=1)
+        model = Recorder()
+        await executor.submit("m", model, torch.ones(1, 3))
+        assert threading.current_thread().name not in model.threads
+        assert all(t.startswith("inference") for t in model.threads)
+
+    async def test_max_batch_flushes_early(self):
+        executor = InferenceExecutor(threads=1, window_ms=10000, max_batch=2)
+        model = Recorder()
+        outs = await asyncio.wait_for(
+            asyncio.gather(*[executor.submit("m", model, torch.ones(1, 3)) for _ in range(4)]),
+            timeout=5
+        )
+        assert len(outs) == 4
+        assert model.batches == [2, 2]
+
+    async def test_models_batched_separately(self):
+        executor = InferenceExecutor(threads=2, window_ms=20)
+        a, b = Recorder(), Recorder()
+        await asyncio.gather(
+            executor.submit("a", a, torch.ones(1, 3)),
+            executor.submit("b", b, torch.ones(1, 3)),
+            executor.submit("a", a, torch.ones(1, 3))
+        )
+        assert a.batches == [2]
+        assert b.batches == [1]
+
+    async def test_multiple_inputs_and_row_counts(self):
+        executor = InferenceExecutor(threads=1, window_ms=20)
+        model = Recorder()
+        first, second = await asyncio.gather(
+            executor.submit("m", model, torch.zeros(2, 3), torch.tensor([1.0, 2.0])),
+            executor.submit("m", model, torch.zeros(1, 3), torch.tensor([3.0]))
+        )
+        assert first.shape == (2, 3) and second.shape == (1, 3)
+        assert torch.equal(first[:, 0], torch.tensor([1.0, 2.0]))
+        assert torch.equal(second[:, 0], torch.tensor([3.0]))
+
+    async def test_errors_reach_every_caller(self):
+        executor = InferenceExecutor(threads=1, window_ms=20)
+        results = await asyncio.gather(
+            executor.submit("m", Failing(), torch.ones(1, 3)),
+            executor.submit("m", Failing(), torch.ones(1, 3)),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestCall:
+    async def test_runs_on_pool(self):
+        executor = InferenceExecutor(threads=1)
+        name = await executor.call(lambda: threading.current_thread().name)
+        assert name.startswith("inference")
+
+    async def test_propagates_errors(self):
+        executor = InferenceExecutor(threads=1)
+        with pytest.raises(ValueError):
+            await executor.call(int, "x")
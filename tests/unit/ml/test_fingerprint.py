@@ -0,0 +1,57 @@
+"""
+Unit tests for the config hashing in app/ml/core/utils/fingerprint.py
+
+Requests which would train the same model must hash the same; anything that
+changes what is learned must change the hash.
+"""
+
+from app.ml.core.utils.fingerprint import config_hash, normalize_config
+
+
+BASE = {
+    "ticker": "AAPL",
+    "f_cols": ["open", "close"],
+    "seq_len": 10,
+    "chronological": True,
+    "hidden_size": 64,
+    "learning_rate": 0.001,
+}
+
+
+class TestConfigHash:
+    def test_key_order_does_not_matter(self):
+        assert config_hash(BASE) == config_hash(dict(reversed(list(BASE.items()))))
+
+    def test_execution_and_output_keys_ignored(self):
+        other = {
+            **BASE,
+            "gid_training_run": 12,
+            "gid_pack_run": 11,
+            "checkpoint_every": 5,
+            "jobs_per_host": 2,
+            "stream": True,
+            "data_end": "2026-01-02",
+            "split": {"train": ["2025-01-02", "2025-10-01"], "validation": ["2025-10-02", "2026-01-02"]},
+            "config_hash": "abc",
+            "auto_batch": True,
+            "max_batch_size": 512,
+            "memory_budget_mb": 2048,
+        }
+        assert config_hash(other) == config_hash(BASE)
+
+    def test_unset_values_ignored(self):
+        assert config_hash({**BASE, "gid_parent_run": None, "t_cols": []}) == config_hash(BASE)
+
+    def test_window_defaults_resolved(self):
+        explicit = {**BASE, "horizon": 1, "stride": 1, "t_cols": ["open", "close"]}
+        assert config_hash(explicit) == config_hash(BASE)
+
+    def test_hyperparameters_change_hash(self):
+        assert config_hash({**BASE, "hidden_size": 128}) != config_hash(BASE)
+        assert config_hash({**BASE, "seq_len": 20}) != config_hash(BASE)
+        assert config_hash({**BASE, "ticker": "MSFT"}) != config_hash(BASE)
+
+    def test_normalized_window(self):
+        n = normalize_config(BASE)
+        assert "seq_len" not in n
+        assert n["window"]["seq_len"] == 10
@@ -0,0 +1,126 @@
+"""
+Unit tests for app/ml/prediction/server.py and client.py
+
+Requests round-trip over a Unix socket, bad requests come back as ValueError
+and server failures as InferenceServerError, and a RemotePredictor only falls
+back to its local predictor when the server is unreachable.
+"""
+
+import asyncio
+
+import pytest
+
+from app.ml.prediction.client import InferenceClient, InferenceServerError, RemotePredictor
+from app.ml.prediction.predictable import Predictable
+from app.ml.prediction.server import InferenceServer
+
+
+class Run:
+    gid = 7
+    data = {"ticker": "AAPL"}
+
+
+class LocalPredictor(Predictable):
+    async def predict(self):
+        self.config["served_by"] = "local"
+        return 1.5
+
+    def __load_model__(self): ...
+    def __prep_sequence__(self):
+        return self.config["artifact"]
+    def __predict_next__(self): ...
+
+
+@pytest.fixture
+async def server(tmp_path, mocker):
+    path = str(tmp_path / "inference.sock")
+    srv = InferenceServer(path)
+
+    async def predict(gid_training_run, config):
+        if gid_training_run == 0:
+            raise ValueError("TrainingRun 0 not found")
+        if gid_training_run == 1:
+            raise RuntimeError("CUDA error")
+        if gid_training_run == 2:
+            await asyncio.sleep(1)
+        return {"prediction": 2.5, "config": {**config, "served_by": "server"}}
+
+    mocker.patch.object(srv, "predict", side_effect=predict)
+    task = asyncio.create_task(srv.serve())
+    for _ in range(100):
+        if (tmp_path / "inference.sock").exists():
+            break
+        await asyncio.sleep(0.01)
+    yield path
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+class TestClient:
+    async def test_predict_round_trip(self, server):
+        response = await InferenceClient(server).predict(7, {"artifact": "close"})
+        assert response["prediction"] == 2.5
+        assert response["config"] == {"artifact": "close", "served_by": "server"}
+
+    async def test_server_errors_raise_value_error(self, server):
+        with pytest.raises(ValueError, match="not found"):
+            await InferenceClient(server).predict(0, {})
+
+    async def test_internal_errors_raise_server_error(self, server):
+        with pytest.raises(InferenceServerError, match="CUDA error"):
+            await InferenceClient(server).predict(1, {})
+
+    async def test_timeout_raises_server_error(self, server, mocker):
+        mocker.patch.object(InferenceClient, "TIMEOUT_S", 0.05)
+        with pytest.raises(InferenceServerError, match="did not answer"):
+            await InferenceClient(server).predict(2, {})
+
+    async def test_unknown_op(self, server):
+        with pytest.raises(ValueError, match="Unknown op"):
+            await InferenceClient(server).request({"op": "nope"})
+
+    async def test_missing_socket(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            await InferenceClient(str(tmp_path / "missing.sock")).predict(7, {})
+
+
+class TestRemotePredictor:
+    async def test_predicts_on_server(self, server):
+        predictor = RemotePredictor(InferenceClient(server), LocalPredictor())
+        predictor.training_run = Run()
+        predictor.configure({"artifact": "close"})
+        assert await predictor.predict() == 2.5
+        assert predictor.config["served_by"] == "server"
+
+    async def test_falls_back_in_process(self, tmp_path):
+        predictor = RemotePredictor(InferenceClient(str(tmp_path / "missing.sock")), LocalPredictor())
+        predictor.training_run = Run()
+        predictor.configure({"artifact": "close"})
+        assert await predictor.predict() == 1.5
+        assert predictor.config["served_by"] == "local"
+        assert predictor.local.training_run is predictor.training_run
+
+    async def test_prediction_errors_do_not_fall_back(self, server):
+        predictor = RemotePredictor(InferenceClient(server), LocalPredictor())
+        predictor.training_run = Run()
+        predictor.training_run.gid = 0
+        predictor.configure({})
+        with pytest.raises(ValueError):
+            await predictor.predict()
+
+    async def test_slow_predictions_do_not_fall_back(self, server, mocker):
+        mocker.patch.object(InferenceClient, "TIMEOUT_S", 0.05)
+        predictor = RemotePredictor(InferenceClient(server), LocalPredictor())
+        predictor.training_run = Run()
+        predictor.training_run.gid = 2
+        predictor.configure({})
+        with pytest.raises(InferenceServerError):
+            await predictor.predict()
+        assert "served_by" not in predictor.config
+
+    def test_hooks_delegate_to_local(self, tmp_path):
+        predictor = RemotePredictor(InferenceClient(str(tmp_path / "missing.sock")), LocalPredictor())
+        predictor.training_run = Run()
+        predictor.configure({"artifact": "close"})
+        assert predictor.__prep_sequence__() == "close"
@@ -0,0 +1,104 @@
+"""
+Unit tests for app/ml/prediction/model_cache.py
+
+Hits, misses, LRU eviction by artifact size and reloading of changed files.
+"""
+
+import os
+
+import pytest
+import torch
+
+from app.ml.prediction.model_cache import CachedModel, ModelCache
+
+
+def artifact(tmp_path, name:str, size:int) -> str:
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self) -> CachedModel:
+        self.calls += 1
+        return CachedModel(torch.nn.Linear(2, 1), scaler=None, config={})
+
+
+class TestModelCache:
+    def test_hit_after_miss(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        path = artifact(tmp_path, "1.pth", 100)
+        loader = Loader()
+        first = cache.get_or_load((1, None), [path], loader)
+        second = cache.get_or_load((1, None), [path], loader)
+
+        assert first is second
+        assert loader.calls == 1
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 100)
+        assert stats["hit_rate"] == 0.5
+
+    def test_model_in_eval_mode(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        entry = cache.get_or_load((1, None), [artifact(tmp_path, "1.pth", 10)], Loader())
+        assert not entry.model.training
+
+    def test_variants_are_separate_entries(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        loader = Loader()
+        cache.get_or_load((1, None), [artifact(tmp_path, "1.pth", 10)], loader)
+        cache.get_or_load((1, "int8"), [artifact(tmp_path, "1_int8.pth", 10)], loader)
+        assert loader.calls == 2
+        assert cache.stats()["entries"] == 2
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ModelCache(max_mb=250 / (1024 * 1024))
+        paths = {gid: artifact(tmp_path, f"{gid}.pth", 100) for gid in (1, 2, 3)}
+        loader = Loader()
+        cache.get_or_load((1, None), [paths[1]], loader)
+        cache.get_or_load((2, None), [paths[2]], loader)
+        cache.get_or_load((1, None), [paths[1]], loader)
+        cache.get_or_load((3, None), [paths[3]], loader)
+
+        assert list(cache.entries) == [(1, None), (3, None)]
+        assert cache.stats()["evictions"] == 1
+        assert cache.nbytes == 200
+
+    def test_oversized_entry_not_cached(self, tmp_path):
+        cache = ModelCache(max_mb=50 / (1024 * 1024))
+        loader = Loader()
+        path = artifact(tmp_path, "1.pth", 100)
+        cache.get_or_load((1, None), [path], loader)
+        cache.get_or_load((1, None), [path], loader)
+        assert loader.calls == 2
+        assert cache.stats()["entries"] == 0
+
+    def test_changed_file_reloads(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        path = artifact(tmp_path, "1.pth", 100)
+        loader = Loader()
+        cache.get_or_load((1, None), [path], loader)
+        mtime = os.path.getmtime(path)
+        os.utime(path, (mtime + 10, mtime + 10))
+        cache.get_or_load((1, None), [path], loader)
+
+        assert loader.calls == 2
+        assert cache.stats()["entries"] == 1
+        assert cache.nbytes == 100
+
+    def test_invalidate_drops_every_variant(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        cache.get_or_load((1, None), [artifact(tmp_path, "1.pth", 10)], Loader())
+        cache.get_or_load((1, "int8"), [artifact(tmp_path, "1_int8.pth", 10)], Loader())
+        cache.get_or_load((2, None), [artifact(tmp_path, "2.pth", 10)], Loader())
+        cache.invalidate(1)
+        assert list(cache.entries) == [(2, None)]
+        assert cache.nbytes == 10
+
+    def test_missing_file_raises(self, tmp_path):
+        cache = ModelCache(max_mb=1)
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_load((1, None), [str(tmp_path / "missing.pth")], Loader())
@@ -0,0 +1,120 @@
+"""
+Unit tests for app/ml/model_defs/lstm.py PackedLSTMModel and the per-model
+helpers of app/ml/training/pack.py
+
+A packed network must compute exactly what its K LSTMModels compute, and one
+model's step must never move another model's weights.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.lstm import LSTMModel, PackedLSTMModel
+from app.ml.training.pack import PackTrainer, _PackedAdam, _PackedPlateau
+from app.ml.training.ts_lstm import TimeSeriesLSTM
+
+
+def _models(k:int=3) -> list[LSTMModel]:
+    torch.manual_seed(0)
+    return [LSTMModel(input_size=2, hidden_size=8, num_layers=2, output_size=2, dropout=0.0).eval() for _ in range(k)]
+
+
+# ---------------------------------------------------------------------------
+# PackedLSTMModel
+# ---------------------------------------------------------------------------
+
+class TestPackedLSTMModel:
+    def test_forward_matches_models(self):
+        models = _models()
+        packed = PackedLSTMModel.from_models(models).eval()
+        x = torch.randn(3, 5, 7, 2)
+        with torch.no_grad():
+            out = packed(x)
+            expected = torch.stack([m(x[i]) for i, m in enumerate(models)])
+        assert out.shape == (3, 5, 2)
+        assert torch.allclose(out, expected, atol=1e-6)
+
+    def test_unpack_round_trip(self):
+        models = _models()
+        packed = PackedLSTMModel.from_models(models)
+        for i, m in enumerate(models):
+            state = packed.unpack(i)
+            assert state.keys() == m.state_dict().keys()
+            for key, value in m.state_dict().items():
+                assert torch.equal(state[key], value)
+
+    def test_unpack_loads_into_lstm_model(self):
+        packed = PackedLSTMModel.from_models(_models(2))
+        m = LSTMModel(input_size=2, hidden_size=8, num_layers=2, output_size=2, dropout=0.0)
+        m.load_state_dict(packed.unpack(1))
+
+
+# ---------------------------------------------------------------------------
+# PackTrainer helpers
+# ---------------------------------------------------------------------------
+
+class TestPackTrainer:
+    def test_stack_pads_and_masks(self):
+        spec = WindowSpec(["open", "close"], seq_len=3, chronological=True)
+        sets = [
+            TimeSeriesLSTM(pd.DataFrame({"open": np.arange(rows, dtype=float), "close": np.arange(rows, dtype=float)}), ticker="T", spec=spec)
+            for rows in (10, 6)
+        ]
+        x, y, mask = PackTrainer._stack(sets, spec)
+        assert x.shape == (2, 7, 3, 2)
+        assert mask.sum(1).tolist() == [7, 3]
+        ds_x, ds_y = sets[1].x, sets[1].y
+        assert torch.equal(x[1, :3], ds_x)
+        assert torch.equal(y[1, :3], ds_y)
+
+    def test_masked_loss_ignores_padding(self):
+        pred = torch.zeros(2, 4, 1)
+        y = torch.ones(2, 4, 1)
+        y[1, 2:] = 100.0
+        mask = torch.tensor([[True] * 4, [True, True, False, False]])
+        assert PackTrainer._masked_loss(pred, y, mask).tolist() == [1.0, 1.0]
+
+    def test_frozen_model_keeps_weights_and_optimizer_state(self):
+        packed = PackedLSTMModel.from_models(_models(2))
+        optimizer = _PackedAdam(packed.parameters())
+        for lr in ([0.01, 0.01], [0.01, 0.0]):
+            optimizer.zero_grad()
+            packed(torch.randn(2, 4, 5, 2)).sum().backward()
+            before = packed.unpack(1)
+            moments = [(m[1].clone(), v[1].clone()) for m, v in zip(optimizer.exp_avg, optimizer.exp_avg_sq)]
+            optimizer.step(torch.tensor(lr))
+        after = packed.unpack(1)
+        for key in before:
+            assert torch.equal(before[key], after[key])
+        for (m, v), exp_avg, exp_avg_sq in zip(moments, optimizer.exp_avg, optimizer.exp_avg_sq):
+            assert torch.equal(m, exp_avg[1]) and torch.equal(v, exp_avg_sq[1])
+        assert optimizer.steps.tolist() == [2, 1]
+
+    def test_packed_adam_matches_adam(self):
+        torch.manual_seed(0)
+        weight = torch.randn(2, 3, requires_grad=True)
+        packed = _PackedAdam([weight], weight_decay=0.01)
+        single = torch.nn.Parameter(weight[0].detach().clone())
+        adam = torch.optim.Adam([single], lr=0.01, weight_decay=0.01)
+        for _ in range(5):
+            x = torch.randn(3)
+            packed.zero_grad()
+            (weight @ x).pow(2).sum().backward()
+            packed.step(torch.tensor([0.01, 0.02]))
+            adam.zero_grad()
+            (single @ x).pow(2).backward()
+            adam.step()
+        assert torch.allclose(weight[0], single, atol=1e-6)
+
+
+class TestPackedPlateau:
+    def test_reduces_per_model(self):
+        plateau = _PackedPlateau(2, 0.1, factor=0.5, patience=1)
+        active = torch.tensor([True, True])
+        plateau.step(torch.tensor([1.0, 1.0]), active)
+        for loss in ([0.5, 1.0], [0.4, 1.0]):
+            plateau.step(torch.tensor(loss), active)
+        assert plateau.lr.tolist() == pytest.approx([0.1, 0.05])
@@ -0,0 +1,96 @@
+"""
+Unit tests for app/ml/prediction/precompute.py
+
+Runs are selected by status, ticker and gid; every target of a run becomes
+one batch item, shared runs are predicted on each of their tickers, and
+results become prediction rows keyed by the ticker's last bar date.
+"""
+
+from datetime import date, datetime, timezone
+
+from app.ml.core.models.training_run import RunStatus, TrainingRun
+from app.ml.data.models.ticker import Ticker
+from app.ml.prediction.precompute import Precomputer
+from app.ml.prediction.ts_shared import SharedPredictor
+
+
+def run(gid:int, ticker:str="AAPL", status:str=RunStatus.COMPLETE, t_cols:list[str]=None, tickers:list[str]=None) -> TrainingRun:
+    data = {"ticker": ticker, "tickers": tickers, "n_tickers": len(tickers) if tickers else None, "window": {"f_cols": ["open", "close"], "seq_len": 5, "t_cols": t_cols}}
+    return TrainingRun(gid=gid, data=data, status=status)
+
+
+class TestRuns:
+    async def test_complete_runs_with_tickers(self, mocker):
+        pack = TrainingRun(gid=5, data={"tickers": ["AAPL", "NVDA"], "pack": {"AAPL": 6, "NVDA": 7}}, status=RunStatus.COMPLETE)
+        runs = [run(1), run(2, ticker=None), run(3, "MSFT"), run(4, ticker=None, tickers=["AAPL", "NVDA"]), pack]
+        mocker.patch.object(TrainingRun, "find_by_status", return_value=runs)
+        assert [r.gid for r in await Precomputer.runs({})] == [1, 3, 4]
+        assert [r.gid for r in await Precomputer.runs({"tickers": ["MSFT"]})] == [3]
+        assert [r.gid for r in await Precomputer.runs({"tickers": ["NVDA"]})] == [4]
+
+    def test_shared_runs_predict_each_ticker(self):
+        shared = run(4, ticker=None, tickers=["AAPL", "NVDA", "MSFT"])
+        assert Precomputer.tickers(shared, {}) == ["AAPL", "NVDA", "MSFT"]
+        assert Precomputer.tickers(shared, {"tickers": ["MSFT", "AAPL"]}) == ["AAPL", "MSFT"]
+        assert Precomputer.tickers(run(1), {}) == ["AAPL"]
+
+    async def test_selected_runs_must_be_complete(self, mocker):
+        mocker.patch.object(TrainingRun, "find_by_ids", return_value=[run(1), run(2, status=RunStatus.FAILED)])
+        assert [r.gid for r in await Precomputer.runs({"gid_training_runs": [1, 2]})] == [1]
+
+
+class TestPredictShared:
+    async def test_one_pass_per_ticker(self, mocker):
+        predict = mocker.patch.object(SharedPredictor, "predict_targets", side_effect=[{"open": 1.0, "close": 2.0}, ValueError("No bars for NVDA")])
+        results = await Precomputer.predict_shared(run(4, ticker=None, tickers=["AAPL", "NVDA"]), ["AAPL", "NVDA"])
+
+        assert predict.call_count == 2
+        assert results == [
+            {"gid_training_run": 4, "ticker": "AAPL", "artifact": "open", "prediction": 1.0},
+            {"gid_training_run": 4, "ticker": "AAPL", "artifact": "close", "prediction": 2.0},
+            {"gid_training_run": 4, "ticker": "NVDA", "artifact": "open", "error": "No bars for NVDA"},
+            {"gid_training_run": 4, "ticker": "NVDA", "artifact": "close", "error": "No bars for NVDA"}
+        ]
+
+
+class TestItems:
+    def test_one_item_per_target(self):
+        items = Precomputer.items([run(1), run(2, t_cols=["close"])])
+        assert items == [
+            {"gid_training_run": 1, "artifact": "open"},
+            {"gid_training_run": 1, "artifact": "close"},
+            {"gid_training_run": 2, "artifact": "close"}
+        ]
+
+
+class TestRows:
+    def test_results_to_rows(self):
+        now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+        runs = [run(1), run(2, "MSFT"), run(3, "NVDA")]
+        tickers = {"AAPL": Ticker(gid=10, ticker="AAPL"), "MSFT": Ticker(gid=20, ticker="MSFT")}
+        results = [
+            {"gid_training_run": 1, "artifact": "close", "prediction": 101.5, "variant": "int8"},
+            {"gid_training_run": 2, "artifact": "close", "error": "No bars for MSFT"},
+            {"gid_training_run": 3, "artifact": "close", "prediction": 9.0}
+        ]
+        predictions, errors = Precomputer.rows(runs, results, tickers, {10: date(2026, 2, 27)}, 99, now)
+
+        assert len(predictions) == 1
+        p = predictions[0]
+        assert (p.gid_training_run, p.gid_ticker, p.as_of, p.artifact, p.value) == (1, 10, date(2026, 2, 27), "close", 101.5)
+        assert (p.variant, p.gid_job_unit, p.created) == ("int8", 99, now)
+        assert len(errors) == 2
+        assert "No bars for MSFT" in errors[0]
+        assert "TrainingRun 3" in errors[1]
+
+    def test_shared_results_carry_their_ticker(self):
+        now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+        tickers = {"AAPL": Ticker(gid=10, ticker="AAPL"), "NVDA": Ticker(gid=30, ticker="NVDA")}
+        results = [
+            {"gid_training_run": 4, "ticker": "AAPL", "artifact": "close", "prediction": 101.5},
+            {"gid_training_run": 4, "ticker": "NVDA", "artifact": "close", "prediction": 9.0}
+        ]
+        predictions, errors = Precomputer.rows([run(4, ticker=None, tickers=["AAPL", "NVDA"])], results, tickers, {10: date(2026, 2, 27), 30: date(2026, 2, 26)}, 99, now)
+
+        assert errors == []
+        assert [(p.gid_ticker, p.as_of, p.value) for p in predictions] == [(10, date(2026, 2, 27), 101.5), (30, date(2026, 2, 26), 9.0)]
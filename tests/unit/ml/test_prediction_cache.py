@@ -0,0 +1,95 @@
+"""
+Unit tests for app/ml/prediction/prediction_cache.py
+
+Responses are found again by the request that produced them, miss once the
+ticker's bars generation moves on, and a cache without Redis never hits.
+"""
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.ml.prediction.prediction_cache import PredictionCache
+
+RUN = {"ticker": "AAPL", "variant": None, "seq_len": 30}
+RESPONSE = {"prediction": 101.5, "gid_training_run": 7, "config": {"artifact": "close"}}
+
+
+@pytest.fixture
+def cache():
+    return PredictionCache(fakeredis.FakeRedis(decode_responses=True), ttl_s=60)
+
+
+class TestGet:
+    def test_hit_after_put(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, cache.generation("AAPL"), RESPONSE)
+        assert cache.get(7, "close") == RESPONSE
+        assert cache.get(7, "close", ticker="AAPL") == RESPONSE
+
+    def test_misses_other_requests(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        assert cache.get(8, "close") is None
+        assert cache.get(7, "open") is None
+        assert cache.get(7, "close", ticker="MSFT") is None
+        assert cache.get(7, "close", variant="int8") is None
+
+    def test_serving_variant_is_the_default(self, cache):
+        cache.put(7, {**RUN, "variant": "int8"}, "AAPL", None, "close", 1, 0, RESPONSE)
+        assert cache.get(7, "close") == RESPONSE
+        assert cache.get(7, "close", variant="int8") == RESPONSE
+
+    def test_horizons_cached_separately(self, cache):
+        path = {**RESPONSE, "prediction": [101.5, 102.0, 102.4]}
+        cache.put(7, RUN, "AAPL", None, "close", 3, 0, path)
+        assert cache.get(7, "close") is None
+        assert cache.get(7, "close", steps=3) == path
+
+    def test_entries_expire(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        key = PredictionCache.key(7, "AAPL", None, "close", 30, 1, 0)
+        assert 0 < cache.redis.ttl(key) <= 60
+
+
+class TestInvalidate:
+    def test_new_bars_miss(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, cache.generation("AAPL"), RESPONSE)
+        cache.invalidate(["AAPL"])
+        assert cache.generation("AAPL") == 1
+        assert cache.get(7, "close") is None
+
+    def test_other_tickers_keep_entries(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        cache.invalidate(["MSFT", "MSFT"])
+        assert cache.generation("MSFT") == 1
+        assert cache.get(7, "close") == RESPONSE
+
+    def test_bars_written_while_predicting(self, cache):
+        generation = cache.generation("AAPL")
+        cache.invalidate(["AAPL"])
+        cache.put(7, RUN, "AAPL", None, "close", 1, generation, RESPONSE)
+        assert cache.get(7, "close") is None
+
+    def test_forget_run(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        cache.put(7, RUN, "AAPL", "int8", "close", 1, 0, RESPONSE)
+        cache.put(8, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        cache.forget_run(7)
+        assert cache.redis.keys("pred:7:*") == []
+        assert cache.get(7, "close") is None
+        assert cache.get(8, "close") == RESPONSE
+
+
+class TestUnavailable:
+    def test_disabled_cache_misses(self, cache):
+        cache.put(7, RUN, "AAPL", None, "close", 1, 0, RESPONSE)
+        cache.enabled = False
+        assert cache.get(7, "close") is None
+        assert cache.generation("AAPL") == 0
+        cache.invalidate(["AAPL"])
+        cache.enabled = True
+        assert cache.generation("AAPL") == 0
+
+    def test_redis_errors_are_misses(self, cache, mocker):
+        mocker.patch.object(cache.redis, "get", side_effect=ConnectionError("down"))
+        assert cache.get(7, "close") is None
+        assert cache.generation("AAPL") == 0
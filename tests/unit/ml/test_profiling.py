@@ -0,0 +1,61 @@
+"""
+Unit tests for app/ml/training/profiling.py
+
+Phase time must land in the phase that spent it, and each epoch must be
+written to the unit as the latest-epoch stat and folded into the run total.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+from app.ml.training.profiling import TrainingProfiler
+
+
+def _unit() -> MagicMock:
+    unit = MagicMock()
+    unit.stats = {}
+    unit.totals = {}
+    unit.stat.side_effect = lambda k, v: unit.stats.__setitem__(k, v)
+    unit.accumulate.side_effect = lambda k, v: unit.totals.__setitem__(k, unit.totals.get(k, 0) + v)
+    return unit
+
+
+class TestTrainingProfiler:
+    def test_phase_accumulates(self):
+        p = TrainingProfiler()
+        with p.phase("forward"):
+            time.sleep(0.01)
+        with p.phase("forward"):
+            time.sleep(0.01)
+        assert p.epoch["forward"] >= 0.02
+        assert p.epoch["backward"] == 0.0
+
+    def test_iterate_times_fetches(self):
+        p = TrainingProfiler()
+
+        def slow():
+            for i in range(3):
+                time.sleep(0.005)
+                yield i
+
+        assert list(p.iterate(slow())) == [0, 1, 2]
+        assert p.epoch["data"] >= 0.015
+
+    def test_end_epoch_writes_stats_and_totals(self):
+        p = TrainingProfiler()
+        unit = _unit()
+        for _ in range(2):
+            with p.phase("forward"):
+                time.sleep(0.005)
+            p.samples(64)
+            s = p.end_epoch(unit)
+        assert s["samples_per_s"] > 0
+        assert unit.stats["Epoch forward s"] == s["forward"]
+        assert unit.totals["Samples"] == 128
+        assert unit.totals["Forward s"] >= 0.01
+        assert p.epoch["forward"] == 0.0 and p.epochs == 2
+
+        p.end_run(unit)
+        assert unit.stats["Epochs"] == 2
+        assert unit.stats["Samples/s"] > 0
+        assert unit.stats["Peak RSS MB"] > 0
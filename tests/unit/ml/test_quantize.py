@@ -0,0 +1,94 @@
+"""
+Unit tests for quantize() in app/ml/model_defs/architectures.py and
+app/ml/training/quantize.py
+
+The int8 copy must track the float model, and its state dict must load into
+a freshly quantized model.
+"""
+
+import io
+
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.architectures import build_model, quantize
+from app.ml.training.quantize import Quantizer
+
+
+CONFIG = {"hidden_size": 16, "num_layers": 2, "dropout": 0.0}
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return build_model(CONFIG, input_size=3, output_size=2).eval()
+
+
+class TestQuantize:
+    @pytest.mark.parametrize("arch", ["lstm", "gru", "tcn"])
+    def test_shapes_match(self, arch):
+        model = build_model({**CONFIG, "arch": arch}, input_size=3, output_size=2).eval()
+        assert quantize(model)(torch.randn(4, 10, 3)).shape == (4, 2)
+
+    def test_leaves_float_model(self, model):
+        quantize(model)
+        assert isinstance(model.lstm, torch.nn.LSTM)
+        assert model.linear.weight.dtype == torch.float32
+
+    def test_tracks_float_outputs(self, model):
+        x = torch.rand(32, 10, 3)
+        with torch.no_grad():
+            drift = (quantize(model)(x) - model(x)).abs().max().item()
+        assert drift < 0.05
+
+    def test_state_dict_round_trip(self, model):
+        quantized = quantize(model)
+        buffer = io.BytesIO()
+        torch.save(quantized.state_dict(), buffer)
+        buffer.seek(0)
+
+        loaded = quantize(build_model(CONFIG, input_size=3, output_size=2))
+        loaded.load_state_dict(torch.load(buffer, weights_only=False))
+        x = torch.rand(4, 10, 3)
+        with torch.no_grad():
+            assert torch.allclose(loaded(x), quantized(x))
+
+
+class TestParity:
+    def test_reports_drift(self, model):
+        spec = WindowSpec(["open", "close", "volume"], seq_len=10, t_cols=["close", "volume"])
+        scaler = MinMaxScaler().fit(np.array([[0, 0, 0], [10, 100, 1000]]))
+        x, y = torch.rand(16, 10, 3), torch.rand(16, 2)
+        parity = Quantizer.parity(model, quantize(model), x, y, spec, scaler)
+
+        assert parity["windows"] == 16
+        assert 0 <= parity["mean_abs_drift"] <= parity["max_abs_drift"]
+        assert set(parity["max_target_drift"]) == {"close", "volume"}
+        assert parity["max_target_drift"]["volume"] >= 0
+        assert parity["float_val_loss"] >= 0 and parity["int8_val_loss"] >= 0
+
+    def test_identical_models_have_no_drift(self, model):
+        spec = WindowSpec(["open", "close", "volume"], seq_len=10, t_cols=["close", "volume"])
+        scaler = MinMaxScaler().fit(np.array([[0, 0, 0], [1, 1, 1]]))
+        parity = Quantizer.parity(model, model, torch.rand(4, 10, 3), torch.rand(4, 2), spec, scaler)
+        assert parity["max_abs_drift"] == 0
+        assert parity["float_val_loss"] == parity["int8_val_loss"]
+
+
+class TestLatency:
+    def test_positive(self, model):
+        assert Quantizer.latency_ms(model, torch.rand(1, 10, 3), samples=3) > 0
+
+
+class TestSource:
+    def test_quantized_source_raises(self):
+        run = {"gid_training_run": 1, "variants": {"int8": {"file": "1_int8.pth", "quantized": True}}}
+        with pytest.raises(ValueError):
+            Quantizer.source(run, "int8")
+
+    def test_unknown_variant_raises(self):
+        with pytest.raises(ValueError):
+            Quantizer.source({"gid_training_run": 1}, "student")
@@ -0,0 +1,90 @@
+"""
+Unit tests for architectures.rollout and WindowSpec.feedback
+
+A stateful rollout must equal re-encoding the window extended by the bars
+predicted so far; other models and legacy windows re-encode the slid window.
+"""
+
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.architectures import build_model, rollout
+from app.ml.model_defs.lstm import SharedLSTMModel
+
+
+CONFIG = {"hidden_size": 8, "num_layers": 2, "dropout": 0.2}
+
+
+def model(arch:str="lstm") -> torch.nn.Module:
+    return build_model({**CONFIG, "arch": arch}, input_size=3, output_size=3).eval()
+
+
+class TestRollout:
+    @pytest.mark.parametrize("arch", ["lstm", "gru"])
+    def test_state_reuse_matches_re_encoding(self, arch):
+        torch.manual_seed(0)
+        m, x = model(arch), torch.randn(2, 10, 3)
+        path = rollout(m, x, 4, [0, 1, 2])
+
+        assert path.shape == (2, 4, 3)
+        with torch.no_grad():
+            for k in range(4):
+                seen = torch.cat([x, path[:, :k]], dim=1)
+                assert torch.allclose(path[:, k], m(seen), atol=1e-5)
+
+    def test_one_step_is_forward(self):
+        torch.manual_seed(0)
+        m, x = model(), torch.randn(1, 10, 3)
+        with torch.no_grad():
+            assert torch.allclose(rollout(m, x, 1, [0, 1, 2])[:, 0], m(x))
+
+    def test_windows_roll_out_together(self):
+        torch.manual_seed(0)
+        m, x = model(), torch.randn(3, 10, 3)
+        path = rollout(m, x, 5, [0, 1, 2])
+        for i in range(3):
+            assert torch.allclose(path[i], rollout(m, x[i:i + 1], 5, [0, 1, 2])[0], atol=1e-5)
+
+    def test_tcn_slides_the_window(self):
+        torch.manual_seed(0)
+        m, x = model("tcn"), torch.randn(1, 10, 3)
+        path = rollout(m, x, 2, [0, 1, 2])
+        with torch.no_grad():
+            assert torch.allclose(path[:, 1], m(torch.cat([x[:, 1:], path[:, :1]], dim=1)), atol=1e-5)
+
+    def test_legacy_window_prepends(self):
+        torch.manual_seed(0)
+        m, x = model(), torch.randn(1, 10, 3)
+        path = rollout(m, x, 2, [0, 1, 2], chronological=False)
+        with torch.no_grad():
+            assert torch.allclose(path[:, 1], m(torch.cat([path[:, :1], x[:, :-1]], dim=1)), atol=1e-5)
+
+    def test_feedback_reorders_outputs(self):
+        torch.manual_seed(0)
+        m, x = model(), torch.randn(1, 10, 3)
+        path = rollout(m, x, 2, [2, 1, 0])
+        with torch.no_grad():
+            assert torch.allclose(path[:, 1], m(torch.cat([x, path[:, :1, [2, 1, 0]]], dim=1)), atol=1e-5)
+
+    def test_extra_inputs(self):
+        torch.manual_seed(0)
+        m = SharedLSTMModel(n_tickers=2, input_size=3, hidden_size=8, num_layers=2, output_size=3).eval()
+        x, idx = torch.randn(1, 10, 3), torch.tensor([1])
+        path = rollout(m, x, 3, [0, 1, 2], extra=(idx,))
+        with torch.no_grad():
+            assert torch.allclose(path[:, 2], m(torch.cat([x, path[:, :2]], dim=1), idx), atol=1e-5)
+
+
+class TestFeedback:
+    def test_maps_features_to_outputs(self):
+        assert WindowSpec(f_cols=["open", "close"]).feedback() == [0, 1]
+        assert WindowSpec(f_cols=["open", "close"], t_cols=["close", "open"]).feedback() == [1, 0]
+
+    def test_needs_every_feature_predicted(self):
+        with pytest.raises(ValueError, match="every feature"):
+            WindowSpec(f_cols=["open", "close"], t_cols=["close"]).feedback()
+
+    def test_needs_a_next_bar_model(self):
+        with pytest.raises(ValueError, match="next-bar"):
+            WindowSpec(f_cols=["open", "close"], horizon=5).feedback()
@@ -0,0 +1,91 @@
+"""
+Unit tests for StreamingTimeSeries in app/ml/training/ts_lstm.py
+
+TickerTimeseries._chunk is replaced with a keyset pager over an in-memory
+series. Streamed windows must equal the windows of the whole series, however
+the chunks fall, including inside a date with several SMA rows.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.data.models.vw_ticker_timeseries import TickerTimeseries
+from app.ml.training.ts_lstm import StreamingTimeSeries
+
+
+ROWS = 53
+DATES = [date(2020, 1, 1) + timedelta(days=i) for i in range(ROWS)]
+KEYS = [(d, "close", "day", 10) for d in DATES]
+VALUES = np.stack([np.arange(ROWS, dtype=float), np.arange(ROWS, dtype=float) * 3.0], axis=1)
+
+
+def _pager(series:list[tuple[tuple, np.ndarray]], calls:list):
+    def _chunk(ticker_gid, columns, after=None, until=None, cursor=None, limit=10000):
+        calls.append(cursor)
+        rows = [
+            (*k, *v) for k, v in series
+            if (after is None or k[0] > after) and (until is None or k[0] <= until) and (cursor is None or k > cursor)
+        ]
+        return rows[:limit]
+    return _chunk
+
+
+@pytest.fixture(autouse=True)
+def fake_chunks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(TickerTimeseries, "_chunk", staticmethod(_pager(list(zip(KEYS, VALUES)), calls)))
+    return calls
+
+
+def _collect(ds:StreamingTimeSeries) -> tuple[torch.Tensor, torch.Tensor]:
+    xs, ys = zip(*list(ds))
+    return torch.cat(xs), torch.cat(ys)
+
+
+def _scaler():
+    return StreamingTimeSeries.scaler_from_range(VALUES.min(axis=0).tolist(), VALUES.max(axis=0).tolist())
+
+
+class TestStreamingTimeSeries:
+    @pytest.mark.parametrize("chunk_rows,stride", [(7, 1), (8, 2), (20, 3), (100, 1)])
+    def test_matches_full_series(self, chunk_rows, stride):
+        spec = WindowSpec(["open", "close"], seq_len=4, horizon=2, stride=stride, chronological=True)
+        scaler = _scaler()
+        x, y = _collect(StreamingTimeSeries(1, spec, scaler, batch_size=5, chunk_rows=chunk_rows))
+        full_x, full_y = spec.windows(torch.tensor(scaler.transform(VALUES), dtype=torch.float32))
+        assert torch.equal(x, full_x)
+        assert torch.equal(y, full_y)
+
+    def test_pages_by_last_key(self, fake_chunks):
+        spec = WindowSpec(["open", "close"], seq_len=3, chronological=True)
+        list(StreamingTimeSeries(1, spec, _scaler(), chunk_rows=20))
+        assert fake_chunks == [None, KEYS[19], KEYS[39]]
+
+    def test_page_boundary_inside_a_date(self, monkeypatch):
+        # Two SMA windows per date, so a 7-row page ends mid-date
+        series = [((d, "close", "day", w), v) for d, v in zip(DATES, VALUES) for w in (10, 20)]
+        monkeypatch.setattr(TickerTimeseries, "_chunk", staticmethod(_pager(series, [])))
+        spec = WindowSpec(["open", "close"], seq_len=3, chronological=True)
+        x, _ = _collect(StreamingTimeSeries(1, spec, _scaler(), chunk_rows=7))
+        full_x, _ = spec.windows(torch.tensor(_scaler().transform(np.array([v for _, v in series])), dtype=torch.float32))
+        assert torch.equal(x, full_x)
+
+    def test_bounds(self):
+        spec = WindowSpec(["open", "close"], seq_len=3, chronological=True)
+        _, y = _collect(StreamingTimeSeries(1, spec, _scaler(), after=DATES[9], until=DATES[29], chunk_rows=6))
+        # Rows 10..29; first target is row 13
+        assert len(y) == 17
+
+    def test_chunk_shorter_than_window_raises(self):
+        spec = WindowSpec(["open"], seq_len=10, chronological=True)
+        with pytest.raises(ValueError):
+            StreamingTimeSeries(1, spec, _scaler(), chunk_rows=5)
+
+    def test_scaler_from_range_matches_fit(self):
+        from sklearn.preprocessing import MinMaxScaler
+        fitted = MinMaxScaler().fit(VALUES)
+        assert np.allclose(_scaler().transform(VALUES), fitted.transform(VALUES))
@@ -0,0 +1,83 @@
+"""
+Unit tests for the ASHA scheduling helpers in app/ml/training/sweep.py
+
+Only the pure scheduling logic is covered; trials themselves are not trained.
+"""
+
+from app.ml.training.sweep import Sweeper
+
+
+def _state(stopped:bool=False) -> dict:
+    return {"stopped": stopped}
+
+
+# ---------------------------------------------------------------------------
+# sample / rungs
+# ---------------------------------------------------------------------------
+
+class TestSample:
+    def test_full_grid(self):
+        grid = Sweeper.sample({"a": [1, 2], "b": ["x", "y", "z"]})
+        assert len(grid) == 6
+        assert {"a": 2, "b": "z"} in grid
+
+    def test_sampled_subset_is_seeded(self):
+        space = {"a": list(range(5)), "b": list(range(5))}
+        first = Sweeper.sample(space, trials=4, seed=7)
+        assert len(first) == 4
+        assert first == Sweeper.sample(space, trials=4, seed=7)
+
+    def test_empty_space(self):
+        assert Sweeper.sample({}) == []
+
+
+class TestRungs:
+    def test_geometric_budgets(self):
+        assert Sweeper.rungs(1, 3, 81) == [1, 3, 9, 27, 81]
+
+    def test_capped_at_epochs(self):
+        assert Sweeper.rungs(2, 3, 50) == [2, 6, 18, 50]
+
+    def test_single_rung(self):
+        assert Sweeper.rungs(10, 3, 10) == [10]
+
+
+# ---------------------------------------------------------------------------
+# next_job
+# ---------------------------------------------------------------------------
+
+class TestNextJob:
+    def test_starts_new_trial_when_nothing_promotable(self):
+        results = [[], []]
+        promoted = [set(), set()]
+        waiting = [0, 1, 2]
+        assert Sweeper.next_job(results, promoted, [None] * 3, waiting, eta=3) == (0, 0)
+        assert waiting == [1, 2]
+
+    def test_promotes_top_fraction(self):
+        results = [[(0.5, 0), (0.1, 1), (0.9, 2)], []]
+        promoted = [set(), set()]
+        states = [_state(), _state(), _state()]
+        assert Sweeper.next_job(results, promoted, states, [3], eta=3) == (1, 1)
+        # trial 1 already promoted, only one in the top third - start a new one
+        assert Sweeper.next_job(results, promoted, states, [3], eta=3) == (3, 0)
+
+    def test_prefers_highest_rung(self):
+        results = [[(0.5, 0), (0.1, 1), (0.3, 2), (0.9, 3)], [(0.2, 1), (0.4, 2)], []]
+        promoted = [{1, 2}, set(), set()]
+        states = [_state() for _ in range(4)]
+        assert Sweeper.next_job(results, promoted, states, [4], eta=2) == (1, 2)
+
+    def test_skips_stopped_trials(self):
+        results = [[(0.1, 0), (0.5, 1), (0.9, 2)], []]
+        promoted = [set(), set()]
+        states = [_state(stopped=True), _state(), _state()]
+        assert Sweeper.next_job(results, promoted, states, [], eta=3) is None
+        assert 0 in promoted[0]
+
+    def test_draining_promotes_best_of_small_rung(self):
+        results = [[(0.5, 0), (0.1, 1)], []]
+        promoted = [set(), set()]
+        states = [_state(), _state()]
+        assert Sweeper.next_job(results, promoted, states, [], eta=3) is None
+        assert Sweeper.next_job(results, promoted, states, [], eta=3, draining=True) == (1, 1)
@@ -0,0 +1,58 @@
+"""
+Unit tests for app/ml/training/threads.py
+
+The budget splits the host's CPUs between the jobs sharing it; explicit
+config values win over the derived ones.
+"""
+
+from unittest.mock import MagicMock
+
+import torch
+
+from app.ml.training.threads import ThreadBudget
+
+
+class TestThreadBudget:
+    def test_splits_cpus_between_jobs(self):
+        b = ThreadBudget.from_config({"jobs_per_host": 2}, cpus=8)
+        assert b.intra_op == 4
+        assert b.inter_op == 1
+        assert b.loader_workers == 0
+        assert b.blas == 4
+
+    def test_never_below_one_thread(self):
+        b = ThreadBudget.from_config({"jobs_per_host": 4}, cpus=2)
+        assert b.intra_op == 1
+        assert b.blas == 1
+
+    def test_jobs_per_host_defaults_to_env(self, monkeypatch):
+        monkeypatch.setenv("JOBS_PER_HOST", "3")
+        assert ThreadBudget.from_config({}, cpus=12).intra_op == 4
+
+    def test_config_overrides(self):
+        b = ThreadBudget.from_config({
+            "jobs_per_host": 2,
+            "intra_op_threads": 3,
+            "loader_workers": 2,
+            "blas_threads": 1
+        }, cpus=8)
+        assert b.intra_op == 3
+        assert b.loader_workers == 2
+        assert b.blas == 1
+
+    def test_apply_sets_and_restores_threads(self):
+        before = torch.get_num_threads()
+        b = ThreadBudget(cpus=2, jobs_per_host=2)
+        with b.apply():
+            assert torch.get_num_threads() == 1
+        assert torch.get_num_threads() == before
+
+    def test_record_writes_allocation(self):
+        unit = MagicMock()
+        b = ThreadBudget(cpus=8, jobs_per_host=2)
+        with b.apply():
+            b.record(unit)
+        stats = {c.args[0]: c.args[1] for c in unit.stat.call_args_list}
+        assert stats["Intra-op threads"] == 4
+        assert stats["Jobs per host"] == 2
+        assert stats["Loader workers"] == 0
@@ -0,0 +1,84 @@
+"""
+Unit tests for the windowed dataset in app/ml/training/ts_lstm.py
+
+Windows must match the original per-index slicing exactly, and batches fetched
+through ContiguousBatchSampler must be views into the dataset's tensor.
+"""
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader
+
+from app.ml.training.ts_lstm import TimeSeriesLSTM, ContiguousBatchSampler
+
+
+F_COLS = ["open", "close"]
+
+
+def _make_df(rows:int=25) -> pd.DataFrame:
+    return pd.DataFrame({
+        "open": np.arange(rows, dtype=float),
+        "close": np.arange(rows, dtype=float) * 2.0,
+    })
+
+
+# ---------------------------------------------------------------------------
+# TimeSeriesLSTM
+# ---------------------------------------------------------------------------
+
+class TestTimeSeriesLSTM:
+    def test_len(self):
+        ds = TimeSeriesLSTM(_make_df(25), ticker="T", seq_len=10, feature_cols=F_COLS)
+        assert len(ds) == 15
+
+    def test_windows_match_slicing(self):
+        ds = TimeSeriesLSTM(_make_df(25), ticker="T", seq_len=10, feature_cols=F_COLS)
+        for i in range(len(ds)):
+            x, y = ds[i]
+            assert torch.equal(x, ds.data[i:i + 10])
+            assert torch.equal(y, ds.data[i + 10])
+
+    def test_slice_returns_view(self):
+        ds = TimeSeriesLSTM(_make_df(25), ticker="T", seq_len=10, feature_cols=F_COLS)
+        x, y = ds[2:6]
+        assert x.shape == (4, 10, 2)
+        assert y.shape == (4, 2)
+        assert x.untyped_storage().data_ptr() == ds.data.untyped_storage().data_ptr()
+
+    def test_short_series_is_empty(self):
+        ds = TimeSeriesLSTM(_make_df(5), ticker="T", seq_len=10, feature_cols=F_COLS)
+        assert len(ds) == 0
+        assert ds[0:4][0].shape == (0, 10, 2)
+
+    def test_reuses_given_scaler(self):
+        train = TimeSeriesLSTM(_make_df(25), ticker="T", seq_len=5, feature_cols=F_COLS)
+        val = TimeSeriesLSTM(_make_df(25) + 100, ticker="T", seq_len=5, feature_cols=F_COLS, scaler=train.scaler)
+        assert val.scaler is train.scaler
+        assert val.data.max() > 1.0
+
+
+# ---------------------------------------------------------------------------
+# ContiguousBatchSampler
+# ---------------------------------------------------------------------------
+
+class TestContiguousBatchSampler:
+    def test_slices_cover_range(self):
+        sampler = ContiguousBatchSampler(10, 4)
+        assert list(sampler) == [slice(0, 4), slice(4, 8), slice(8, 10)]
+        assert len(sampler) == 3
+
+    def test_drop_last(self):
+        sampler = ContiguousBatchSampler(10, 4, drop_last=True)
+        assert list(sampler) == [slice(0, 4), slice(4, 8)]
+        assert len(sampler) == 2
+
+    def test_empty(self):
+        assert list(ContiguousBatchSampler(0, 4)) == []
+
+    def test_dataloader_batches(self):
+        ds = TimeSeriesLSTM(_make_df(25), ticker="T", seq_len=10, feature_cols=F_COLS)
+        loader = DataLoader(ds, sampler=ContiguousBatchSampler(len(ds), 4), batch_size=None)
+        batches = list(loader)
+        assert [len(x) for x, _ in batches] == [4, 4, 4, 3]
+        assert torch.equal(torch.cat([y for _, y in batches]), ds.data[10:])
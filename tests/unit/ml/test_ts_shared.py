@@ -0,0 +1,70 @@
+"""
+Unit tests for the cross-ticker windows in app/ml/training/ts_shared.py
+
+A shared window must match the same window cut from its own series, and no
+window may span two tickers.
+"""
+
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.model_defs.lstm import SharedLSTMModel
+from app.ml.training.ts_shared import SharedWindows, ShuffledBatchSampler
+
+
+SPEC = WindowSpec(["open", "close"], seq_len=3, horizon=2, t_cols=["close"], chronological=True)
+
+
+def _series() -> list[torch.Tensor]:
+    return [
+        torch.arange(20, dtype=torch.float32).reshape(10, 2),
+        torch.arange(100, 112, dtype=torch.float32).reshape(6, 2),
+        torch.zeros((2, 2))
+    ]
+
+
+# ---------------------------------------------------------------------------
+# SharedWindows
+# ---------------------------------------------------------------------------
+
+class TestSharedWindows:
+    def test_len_skips_short_series(self):
+        ds = SharedWindows(_series(), SPEC)
+        assert len(ds) == SPEC.count(10) + SPEC.count(6)
+
+    def test_windows_match_per_series(self):
+        series = _series()
+        ds = SharedWindows(series, SPEC)
+        x, t, y = ds[:]
+        offset = 0
+        for i, s in enumerate(series):
+            sx, sy = SPEC.windows(s)
+            n = len(sx)
+            assert torch.equal(x[offset:offset + n], sx)
+            assert torch.equal(y[offset:offset + n], sy)
+            assert (t[offset:offset + n] == i).all()
+            offset += n
+
+    def test_int_and_tensor_index(self):
+        ds = SharedWindows(_series(), SPEC)
+        x, t, y = ds[0]
+        assert x.shape == (3, 2) and y.shape == (1,) and t.item() == 0
+        x, t, y = ds[torch.tensor([0, len(ds) - 1])]
+        assert x.shape == (2, 3, 2) and t.tolist() == [0, 1]
+
+
+class TestShuffledBatchSampler:
+    def test_covers_every_index_once(self):
+        batches = list(ShuffledBatchSampler(10, 4))
+        assert [len(b) for b in batches] == [4, 4, 2]
+        assert sorted(torch.cat(batches).tolist()) == list(range(10))
+
+
+class TestSharedLSTMModel:
+    def test_embedding_changes_output(self):
+        torch.manual_seed(0)
+        model = SharedLSTMModel(n_tickers=2, embedding_dim=4, input_size=2, hidden_size=8, num_layers=1, output_size=1, dropout=0.0).eval()
+        x = torch.randn(1, 5, 2).repeat(2, 1, 1)
+        out = model(x, torch.tensor([0, 1]))
+        assert out.shape == (2, 1)
+        assert not torch.equal(out[0], out[1])
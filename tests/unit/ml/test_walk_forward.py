@@ -0,0 +1,56 @@
+"""
+Unit tests for the walk-forward fold layout in app/ml/training/ts_lstm.py
+
+Folds must tile the rows after the initial block without gaps, and every
+fold's training rows must end where its validation block starts.
+"""
+
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec
+from app.ml.training.ts_lstm import TimeSeriesLSTM, Trainer
+
+
+SPEC = WindowSpec(["close"], seq_len=5, chronological=True)
+
+
+class TestFoldBounds:
+    def test_expanding_folds_tile_the_tail(self):
+        bounds = Trainer.fold_bounds(100, 4, 0.6, SPEC)
+        assert bounds == [(0, 60, 70), (0, 70, 80), (0, 80, 90), (0, 90, 100)]
+
+    def test_last_fold_takes_remainder(self):
+        bounds = Trainer.fold_bounds(103, 4, 0.6, SPEC)
+        assert bounds[-1] == (0, 91, 103)
+
+    def test_rolling_folds_keep_window(self):
+        bounds = Trainer.fold_bounds(100, 2, 0.5, SPEC, mode="rolling", window=30)
+        assert bounds == [(20, 50, 75), (45, 75, 100)]
+
+    def test_rolling_defaults_to_initial_block(self):
+        bounds = Trainer.fold_bounds(100, 2, 0.5, SPEC, mode="rolling")
+        assert [v - s for s, v, _ in bounds] == [50, 50]
+
+    def test_too_many_folds_raises(self):
+        with pytest.raises(ValueError):
+            Trainer.fold_bounds(20, 10, 0.8, SPEC)
+
+    def test_unknown_mode_raises(self):
+        with pytest.raises(ValueError):
+            Trainer.fold_bounds(100, 2, 0.5, SPEC, mode="sliding")
+
+    def test_no_training_windows_raises(self):
+        with pytest.raises(ValueError):
+            Trainer.fold_bounds(100, 2, 0.04, SPEC)
+
+
+class TestFromScaled:
+    def test_windows_are_views_of_slice(self):
+        data = torch.arange(40, dtype=torch.float32).reshape(40, 1)
+        start, val_start, val_end = Trainer.fold_bounds(40, 2, 0.5, SPEC)[0]
+        val = TimeSeriesLSTM.from_scaled(data[val_start - SPEC.span + 1:val_end], ticker="T", spec=SPEC, scaler=None)
+        # One validation window per row of the block, targets are the block's rows
+        assert len(val) == val_end - val_start
+        assert val.y[:, 0].tolist() == list(range(val_start, val_end))
+        assert val.x.data_ptr() >= data.data_ptr()
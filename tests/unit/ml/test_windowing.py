@@ -0,0 +1,135 @@
+"""
+Unit tests for app/ml/core/utils/windowing.py
+
+WindowSpec.windows() is checked against a plain per-index loop for a range of
+lookback/horizon/stride/target combinations.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+from app.ml.core.utils.windowing import WindowSpec, LEGACY_SEQ_LEN
+
+
+F_COLS = ["open", "high", "low", "close"]
+
+
+def _data(rows:int=40) -> torch.Tensor:
+    return torch.arange(rows * len(F_COLS), dtype=torch.float32).reshape(rows, len(F_COLS))
+
+
+def _loop_windows(data:torch.Tensor, spec:WindowSpec):
+    xs, ys = [], []
+    s = 0
+    while s + spec.seq_len + spec.horizon - 1 < len(data):
+        xs.append(data[s:s + spec.seq_len])
+        ys.append(data[s + spec.seq_len + spec.horizon - 1, spec.t_idx])
+        s += spec.stride
+    return xs, ys
+
+
+# ---------------------------------------------------------------------------
+# Construction
+# ---------------------------------------------------------------------------
+
+class TestWindowSpecConfig:
+    def test_from_config_defaults(self):
+        spec = WindowSpec.from_config({"f_cols": F_COLS})
+        assert spec.seq_len == LEGACY_SEQ_LEN
+        assert spec.horizon == 1
+        assert spec.stride == 1
+        assert spec.t_cols == F_COLS
+        assert spec.chronological is False
+
+    def test_from_config_values(self):
+        spec = WindowSpec.from_config({
+            "f_cols": F_COLS, "seq_len": 20, "horizon": 3, "stride": 2,
+            "t_cols": ["close"], "chronological": True
+        })
+        assert (spec.seq_len, spec.horizon, spec.stride) == (20, 3, 2)
+        assert spec.t_idx == [3]
+        assert spec.chronological is True
+
+    def test_trained_round_trip(self):
+        spec = WindowSpec(F_COLS, seq_len=30, horizon=2, t_cols=["close"], chronological=True)
+        restored = WindowSpec.trained({"f_cols": F_COLS, "seq_len": 5, "window": spec.to_dict()})
+        assert restored.to_dict() == spec.to_dict()
+
+    def test_trained_legacy_run(self):
+        spec = WindowSpec.trained({"f_cols": F_COLS, "seq_len": 50})
+        assert spec.seq_len == LEGACY_SEQ_LEN
+        assert spec.chronological is False
+
+    def test_unknown_target_raises(self):
+        with pytest.raises(ValueError):
+            WindowSpec(F_COLS, t_cols=["volume"])
+
+    def test_bad_stride_raises(self):
+        with pytest.raises(ValueError):
+            WindowSpec(F_COLS, stride=0)
+
+
+# ---------------------------------------------------------------------------
+# windows()
+# ---------------------------------------------------------------------------
+
+class TestWindows:
+    @pytest.mark.parametrize("seq_len,horizon,stride,t_cols", [
+        (10, 1, 1, None),
+        (5, 3, 1, None),
+        (7, 1, 4, ["close"]),
+        (6, 2, 3, ["high", "close"]),
+    ])
+    def test_matches_loop(self, seq_len, horizon, stride, t_cols):
+        data = _data()
+        spec = WindowSpec(F_COLS, seq_len=seq_len, horizon=horizon, stride=stride, t_cols=t_cols)
+        x, y = spec.windows(data)
+        xs, ys = _loop_windows(data, spec)
+        assert len(x) == len(xs) == spec.count(len(data))
+        assert torch.equal(x, torch.stack(xs))
+        assert torch.equal(y, torch.stack(ys))
+
+    def test_inputs_are_views(self):
+        data = _data()
+        x, y = WindowSpec(F_COLS, seq_len=8).windows(data)
+        assert x.untyped_storage().data_ptr() == data.untyped_storage().data_ptr()
+        assert y.untyped_storage().data_ptr() == data.untyped_storage().data_ptr()
+
+    def test_too_short(self):
+        x, y = WindowSpec(F_COLS, seq_len=10, horizon=2).windows(_data(11))
+        assert x.shape == (0, 10, 4)
+        assert y.shape == (0, 4)
+
+
+# ---------------------------------------------------------------------------
+# latest() / sort()
+# ---------------------------------------------------------------------------
+
+class TestLatest:
+    def test_chronological_takes_tail(self):
+        data = np.arange(20).reshape(10, 2)
+        assert np.array_equal(WindowSpec(["a", "b"], seq_len=3, chronological=True).latest(data), data[7:])
+
+    def test_legacy_takes_head(self):
+        data = np.arange(20).reshape(10, 2)
+        assert np.array_equal(WindowSpec(["a", "b"], seq_len=3).latest(data), data[:3])
+
+    def test_short_raises(self):
+        with pytest.raises(ValueError):
+            WindowSpec(["a"], seq_len=5).latest(np.zeros((3, 1)))
+
+    def test_sort_direction(self):
+        df = pd.DataFrame({"date": [2, 1, 3], "a": [0, 0, 0]})
+        assert list(WindowSpec(["a"], chronological=True).sort(df)["date"]) == [1, 2, 3]
+        assert list(WindowSpec(["a"]).sort(df)["date"]) == [3, 2, 1]
+
+    @pytest.mark.parametrize("chronological", [True, False])
+    def test_tail_matches_full_history(self, chronological):
+        # The last seq_len bars, oldest first, give the same window as the full sorted history
+        spec = WindowSpec(["a", "b"], seq_len=3, chronological=chronological)
+        df = pd.DataFrame({"date": range(10), "a": range(10), "b": range(10, 20)}).sample(frac=1, random_state=0)
+        full = spec.latest(spec.sort(df)[["a", "b"]].values)
+        tail = df.sort_values("date")[["a", "b"]].values[-spec.seq_len:]
+        assert np.array_equal(spec.latest(spec.order(tail)), full)